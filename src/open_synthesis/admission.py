@@ -0,0 +1,134 @@
+"""FIFO admission control for generation requests.
+
+vLLM batches many concurrent sequences, so the server admits up to
+``max_concurrent`` requests at once (match it to vLLM's ``max_num_seqs``)
+and queues the rest in arrival order. A request that waits longer than
+``queue_timeout`` is dropped. A full queue is rejected immediately.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
+
+class QueueFull(Exception):
+    """The wait queue is at capacity."""
+
+
+class QueueTimeout(TimeoutError):
+    """A request waited in the queue longer than allowed."""
+
+
+class Ticket:
+    """A request's place in line; admitted once its future resolves."""
+
+    def __init__(self, controller: AdmissionController) -> None:
+        self._controller = controller
+        self._future: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        self.enqueued_at = time.monotonic()
+        self.released = False
+
+    @property
+    def admitted(self) -> bool:
+        return self._future.done() and not self._future.cancelled()
+
+    @property
+    def position(self) -> int:
+        """1-based position in the wait queue, or 0 once admitted."""
+        if self.admitted:
+            return 0
+        try:
+            return self._controller._waiters.index(self) + 1
+        except ValueError:
+            return 0
+
+    async def wait(self, timeout: float | None) -> bool:
+        """Wait up to ``timeout`` seconds for admission; True once admitted."""
+        if not self.admitted:
+            await asyncio.wait([self._future], timeout=timeout)
+        return self.admitted
+
+    def release(self) -> None:
+        """Free the slot (or leave the queue). Safe to call more than once."""
+        if not self.released:
+            self.released = True
+            self._controller._release(self)
+
+
+class AdmissionController:
+    """Bounded concurrency with a bounded FIFO wait queue."""
+
+    def __init__(self, max_concurrent: int, max_queue: int, queue_timeout: float) -> None:
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._active = 0
+        self._waiters: deque[Ticket] = deque()
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.max_depth = 0
+        self._wait_total = 0.0
+
+    @property
+    def full(self) -> bool:
+        return self._active >= self.max_concurrent and len(self._waiters) >= self.max_queue
+
+    def enter(self) -> Ticket:
+        """Take a ticket: admitted at once if a slot is free, else queued.
+
+        Raises QueueFull when every slot is busy and the queue is at capacity.
+        """
+        if self.full:
+            self.rejected += 1
+            raise QueueFull(f"Server busy: {len(self._waiters)} requests already queued")
+        ticket = Ticket(self)
+        self._waiters.append(ticket)
+        self.max_depth = max(self.max_depth, len(self._waiters))
+        self._wake()
+        return ticket
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[Ticket]:
+        """Hold a slot for the duration of the block, waiting in line if needed."""
+        ticket = self.enter()
+        try:
+            if not await ticket.wait(self.queue_timeout):
+                self.timed_out += 1
+                raise QueueTimeout(f"Waited {self.queue_timeout:.0f}s in queue")
+            yield ticket
+        finally:
+            ticket.release()
+
+    def _wake(self) -> None:
+        while self._active < self.max_concurrent and self._waiters:
+            ticket = self._waiters.popleft()
+            self._active += 1
+            self.admitted += 1
+            self._wait_total += time.monotonic() - ticket.enqueued_at
+            ticket._future.set_result(None)
+
+    def _release(self, ticket: Ticket) -> None:
+        if ticket.admitted:
+            self._active -= 1
+        else:
+            # Left the queue before admission (timeout or disconnect).
+            self._waiters.remove(ticket)
+            ticket._future.cancel()
+        self._wake()
+
+    def stats(self) -> dict[str, float]:
+        return {
+            "active": self._active,
+            "max_concurrent": self.max_concurrent,
+            "queue_depth": len(self._waiters),
+            "max_queue_depth": self.max_depth,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "mean_wait_ms": round(self._wait_total / self.admitted * 1000, 1) if self.admitted else 0.0,
+        }
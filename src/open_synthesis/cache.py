@@ -0,0 +1,160 @@
+"""SQLite-backed key/value cache with TTLs and size-bounded LRU eviction."""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+import time
+from collections.abc import Iterable
+from pathlib import Path
+from typing import Any, NamedTuple
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    meta TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    stored_at REAL NOT NULL,
+    expires_at REAL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed_at);
+"""
+
+
+class CacheEntry(NamedTuple):
+    value: bytes
+    meta: dict[str, Any]
+    stored_at: float
+    expires_at: float | None
+
+    @property
+    def fresh(self) -> bool:
+        return self.expires_at is None or self.expires_at > time.time()
+
+
+class DiskCache:
+    """Persistent cache in a single SQLite file.
+
+    Entries are returned even after they expire so callers can revalidate
+    or serve stale data; ``CacheEntry.fresh`` tells them apart. When the
+    stored bytes exceed ``max_bytes`` the least recently used entries are
+    evicted. Safe to share across threads.
+    """
+
+    def __init__(self, path: str | Path, max_bytes: int) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(_SCHEMA)
+        self._size: int = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    def get(self, key: str) -> CacheEntry | None:
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys: Iterable[str]) -> dict[str, CacheEntry]:
+        keys = list(keys)
+        found: dict[str, CacheEntry] = {}
+        now = time.time()
+        with self._lock:
+            # Stay well under SQLite's bound-parameter limit.
+            for start in range(0, len(keys), 500):
+                batch = keys[start:start + 500]
+                marks = ",".join("?" * len(batch))
+                rows = self._db.execute(
+                    f"SELECT key, value, meta, stored_at, expires_at FROM entries WHERE key IN ({marks})",
+                    batch,
+                ).fetchall()
+                for key, value, meta, stored_at, expires_at in rows:
+                    found[key] = CacheEntry(value, json.loads(meta), stored_at, expires_at)
+                if rows:
+                    self._db.executemany(
+                        "UPDATE entries SET accessed_at = ? WHERE key = ?",
+                        [(now, row[0]) for row in rows],
+                    )
+        return found
+
+    def put(self, key: str, value: bytes, meta: dict[str, Any] | None = None, ttl: float | None = None) -> None:
+        self.put_many([(key, value)], meta=meta, ttl=ttl)
+
+    def put_many(
+        self,
+        items: Iterable[tuple[str, bytes]],
+        meta: dict[str, Any] | None = None,
+        ttl: float | None = None,
+    ) -> None:
+        now = time.time()
+        expires_at = now + ttl if ttl is not None else None
+        meta_json = json.dumps(meta or {})
+        rows = [(k, v, meta_json, len(v), now, expires_at, now) for k, v in items]
+        if not rows:
+            return
+        with self._lock:
+            self._db.execute("BEGIN")
+            for row in rows:
+                old = self._db.execute("SELECT size FROM entries WHERE key = ?", (row[0],)).fetchone()
+                if old:
+                    self._size -= old[0]
+                self._db.execute("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?)", row)
+                self._size += row[3]
+            self._db.execute("COMMIT")
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def refresh(self, key: str, ttl: float | None, meta: dict[str, Any] | None = None) -> None:
+        """Extend an entry's lifetime after successful revalidation."""
+        now = time.time()
+        expires_at = now + ttl if ttl is not None else None
+        with self._lock:
+            if meta is None:
+                self._db.execute(
+                    "UPDATE entries SET stored_at = ?, expires_at = ?, accessed_at = ? WHERE key = ?",
+                    (now, expires_at, now, key),
+                )
+            else:
+                self._db.execute(
+                    "UPDATE entries SET meta = ?, stored_at = ?, expires_at = ?, accessed_at = ? WHERE key = ?",
+                    (json.dumps(meta), now, expires_at, now, key),
+                )
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            old = self._db.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+            if old:
+                self._db.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self._size -= old[0]
+
+    def _evict(self) -> None:
+        """Drop least recently used entries until the cache is back under 90% of its cap."""
+        target = int(self.max_bytes * 0.9)
+        self._db.execute("BEGIN")
+        while self._size > target:
+            rows = self._db.execute(
+                "SELECT key, size FROM entries ORDER BY accessed_at LIMIT 256"
+            ).fetchall()
+            if not rows:
+                self._size = 0
+                break
+            for key, size in rows:
+                if self._size <= target:
+                    break
+                self._db.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self._size -= size
+        self._db.execute("COMMIT")
+
+    @property
+    def size_bytes(self) -> int:
+        return self._size
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
@@ -21,6 +21,8 @@ def ingest(
     query: Annotated[str, typer.Argument(help="Search query for data sources")],
     domain: Annotated[str, typer.Option(help="Domain/collection name for vector store")] = "default",
     sources: Annotated[Optional[str], typer.Option(help="Comma-separated source names (default: all)")] = None,
+    offline: Annotated[bool, typer.Option(help="Serve source responses only from the HTTP cache")] = False,
+    force: Annotated[bool, typer.Option(help="Search every source even if the ledger shows the query was ingested")] = False,
     config: Annotated[Optional[Path], typer.Option(help="Path to TOML config file")] = None,
 ) -> None:
     """Ingest documents from data sources into the vector store."""
@@ -30,12 +32,33 @@ def ingest(
     from open_synthesis.corpus.manager import CorpusManager
 
     settings = load_settings(config)
+    if offline:
+        settings.http.offline = True
     manager = CorpusManager(settings)
     source_list = sources.split(",") if sources else None
 
+    async def _ingest() -> dict:
+        try:
+            return await manager.ingest(query, domain, source_names=source_list, force=force)
+        finally:
+            await manager.close()
+
     console.print(f"[bold]Ingesting:[/bold] {query!r} into domain [cyan]{domain}[/cyan]")
-    result = asyncio.run(manager.ingest(query, domain, source_names=source_list))
-    console.print(f"[green]Done.[/green] Ingested {result['documents']} documents, {result['chunks']} chunks.")
+    result = asyncio.run(_ingest())
+    console.print(
+        f"[green]Done.[/green] Ingested {result['documents']} documents: "
+        f"{result['new']} new, {result['updated']} updated, {result['unchanged']} unchanged chunks."
+    )
+    for name, earlier in sorted(result.get("skipped", {}).items()):
+        console.print(f"  [dim]Skipped {name}: already ingested for {earlier!r}[/dim]")
+    for host, wait in sorted(result.get("rate_limited", {}).items(), key=lambda x: -x[1]):
+        console.print(f"  [yellow]Rate limited:[/yellow] {host} ({wait:.1f}s queued)")
+    emb = result.get("embedding_cache")
+    if emb and emb["hits"]:
+        console.print(
+            f"  Embedding cache: {emb['hits']} of {emb['hits'] + emb['misses']} chunks reused "
+            f"({emb['hit_rate']:.0%})"
+        )
 
 
 @app.command()
@@ -97,6 +120,8 @@ def validate(
         console.print(f"[red]Hallucination flags:[/red] {validated.hallucination_flags}")
     else:
         console.print("[green]No hallucination flags.[/green]")
+    for name, reason in validated.validation_errors.items():
+        console.print(f"[yellow]Validation pass {name} failed:[/yellow] {reason}")
 
     output = input_file.with_suffix(".validated.json")
     output.write_text(json.dumps(validated.model_dump(mode="json"), indent=2))
@@ -109,6 +134,7 @@ def paper(
     domain: Annotated[str, typer.Option(help="Domain/collection name for vector store")] = "default",
     sources_list: Annotated[Optional[str], typer.Option("--sources", help="Comma-separated source names (default: all)")] = None,
     output: Annotated[Optional[Path], typer.Option(help="Save paper as markdown file")] = None,
+    offline: Annotated[bool, typer.Option(help="Serve source responses only from the HTTP cache")] = False,
     config: Annotated[Optional[Path], typer.Option(help="Path to TOML config file")] = None,
 ) -> None:
     """Generate a multi-section research paper with per-section retrieval and synthesis."""
@@ -118,6 +144,8 @@ def paper(
     from open_synthesis.synthesis.paper import PaperPipeline
 
     settings = load_settings(config)
+    if offline:
+        settings.http.offline = True
     pipeline = PaperPipeline(settings)
     source_names = sources_list.split(",") if sources_list else None
 
@@ -22,12 +22,72 @@ def _load_toml(path: Path) -> dict[str, Any]:
 
 class EmbeddingSettings(BaseSettings):
     model: str = "all-MiniLM-L6-v2"
+    batch_size: int = 64
+    cache_enabled: bool = True
+    cache_path: str = "./cache/embeddings"
+    cache_max_mb: int = 1024
 
 
 class RetrievalSettings(BaseSettings):
     n_results: int = 20
     dense_weight: float = 0.6
     sparse_weight: float = 0.4
+    stopwords: bool = True
+    stemming: bool = False
+    workers: int = 4
+    timeout: float = 10.0
+    decompose_queries: bool = False  # add LLM sub-queries to the question before retrieval
+
+
+class RerankSettings(BaseSettings):
+    enabled: bool = True
+    model: str = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+    max_length: int = 256  # tokens per (query, chunk) pair
+    batch_size: int = 8
+    max_candidates: int = 50  # fused chunks scored per query
+    early_stop_batches: int = 1  # stop once a full top-k survives this many batches; 0 scores all
+    backend: str = "torch"  # or "onnx" (uv sync --extra onnx)
+    onnx_file: str = "onnx/model_qint8_avx512_vnni.onnx"
+    cache_enabled: bool = True
+    cache_path: str = "./cache/rerank"
+    cache_ttl: float = 604800.0
+    cache_max_mb: int = 64
+
+
+class HttpSettings(BaseSettings):
+    timeout: float = 30.0
+    max_connections_per_host: int = 10
+    max_keepalive_per_host: int = 10
+    keepalive_expiry: float = 60.0
+    http2: bool = True
+    rate_limit_retries: int = 2
+    cache_enabled: bool = True
+    cache_path: str = "./cache/http"
+    cache_ttl: float = 86400.0
+    cache_max_mb: int = 512
+    offline: bool = False
+
+
+class IngestSettings(BaseSettings):
+    queue_size: int = 8
+    flush_size: int = 512
+    ledger_enabled: bool = True
+    ledger_freshness: float = 604800.0  # seconds a recorded query keeps a source skipped
+    ledger_token_similarity: float = 0.8  # Jaccard over query terms
+    ledger_embedding_similarity: float = 0.9  # cosine; 0 disables the embedding check
+
+
+class ServerSettings(BaseSettings):
+    max_concurrent: int = 16  # match vLLM's max_num_seqs
+    max_queue: int = 64
+    queue_timeout: float = 120.0
+
+
+class PaperSettings(BaseSettings):
+    max_concurrent_sections: int = 4  # sections synthesizing at once
+    prefetch_sections: int = 1  # sections preparing ahead of a free synthesis slot
+    max_concurrent_generations: int = 2  # in-flight vLLM requests per paper run
+    retrieval_timeout: float = 120.0  # per-section deadline; retrieval.timeout is the server's
 
 
 class InferenceSettings(BaseSettings):
@@ -35,12 +95,19 @@ class InferenceSettings(BaseSettings):
     top_p: float = 0.9
     repetition_penalty: float = 1.1
     max_new_tokens: int = 16384
+    max_context_tokens: int = 0  # cap on packed source tokens; 0 fills the context window
+    seed: int | None = None  # set to make synthesis reproducible and cacheable
+    cache_enabled: bool = True
+    cache_path: str = "./cache/llm"
+    cache_ttl: float = 604800.0
+    cache_max_mb: int = 512
 
 
 class RunPodSettings(BaseSettings):
     pod_id: str = ""
     api_key: str = ""
     model: str = "opensynthesis/Llama-3.1-70B-heretic-AWQ"
+    tokenizer: str = ""  # Hugging Face repo for token counting; defaults to model
     base_url: str = ""
     timeout: int = 300
 
@@ -52,12 +119,18 @@ class ValidationSettings(BaseSettings):
     hallucination_check: bool = True
     uncertainty_quantification: bool = True
     human_review_required: bool = True
+    pass_timeout: float = 300.0
 
 
 class Settings(BaseSettings):
     vector_store_path: str = "./vectorstore"
     embedding: EmbeddingSettings = Field(default_factory=EmbeddingSettings)
     retrieval: RetrievalSettings = Field(default_factory=RetrievalSettings)
+    rerank: RerankSettings = Field(default_factory=RerankSettings)
+    http: HttpSettings = Field(default_factory=HttpSettings)
+    ingest: IngestSettings = Field(default_factory=IngestSettings)
+    server: ServerSettings = Field(default_factory=ServerSettings)
+    paper: PaperSettings = Field(default_factory=PaperSettings)
     inference: InferenceSettings = Field(default_factory=InferenceSettings)
     runpod: RunPodSettings = Field(default_factory=RunPodSettings)
     validation: ValidationSettings = Field(default_factory=ValidationSettings)
@@ -74,6 +147,11 @@ def load_settings(config_path: Path | None = None) -> Settings:
     section_classes = {
         "embedding": EmbeddingSettings,
         "retrieval": RetrievalSettings,
+        "rerank": RerankSettings,
+        "http": HttpSettings,
+        "ingest": IngestSettings,
+        "server": ServerSettings,
+        "paper": PaperSettings,
         "inference": InferenceSettings,
         "runpod": RunPodSettings,
         "validation": ValidationSettings,
@@ -7,6 +7,8 @@ from typing import Any
 
 import httpx
 
+from open_synthesis.corpus.ratelimit import RateLimit
+from open_synthesis.corpus.transport import get_transport_manager
 from open_synthesis.types import Document
 
 
@@ -14,25 +16,44 @@ class DataSource(ABC):
     """Base class for all data source integrations.
 
     Subclasses implement async search() and fetch() against a specific API.
+    HTTP clients are borrowed from the process-wide TransportManager, so
+    instances are cheap and connections are reused across sources and ingests.
     """
 
+    # Pacing enforced per host by the shared RateLimiter; None means unpaced.
+    rate_limit: RateLimit | None = None
+    # Replaces rate_limit when an API key is configured.
+    authenticated_rate_limit: RateLimit | None = None
+    # Seconds a cached response stays fresh; None uses the [http] cache_ttl.
+    cache_ttl: float | None = None
+
     def __init__(self, api_key: str | None = None) -> None:
         self.api_key = api_key
         self._client: httpx.AsyncClient | None = None
 
+    def effective_rate_limit(self) -> RateLimit | None:
+        """Rate limit that applies to this instance's credentials."""
+        if self.api_key and self.authenticated_rate_limit is not None:
+            return self.authenticated_rate_limit
+        return self.rate_limit
+
     async def client(self) -> httpx.AsyncClient:
         if self._client is None or self._client.is_closed:
-            self._client = httpx.AsyncClient(timeout=30.0)
+            self._client = get_transport_manager().client(
+                rate_limit=self.effective_rate_limit(),
+                cache_ttl=self.cache_ttl,
+            )
         return self._client
 
     async def close(self) -> None:
+        """Release the borrowed client. Pooled connections stay open."""
         if self._client and not self._client.is_closed:
             await self._client.aclose()
 
     @staticmethod
     @abstractmethod
     def info() -> dict[str, Any]:
-        """Return metadata about this source (description, auth_required, data_type)."""
+        """Return metadata about this source (description, auth_required, data_type, rate_limit)."""
         ...
 
     @abstractmethod
@@ -8,8 +8,9 @@ from typing import Any
 from open_synthesis.types import Chunk, Document
 
 
-def _chunk_id(document_id: str, index: int) -> str:
-    raw = f"{document_id}:{index}"
+def _chunk_id(document_id: str, text: str) -> str:
+    """Content-addressed ID: identical text in the same document always maps to the same ID."""
+    raw = f"{document_id}:{text}"
     return hashlib.sha256(raw.encode()).hexdigest()[:16]
 
 
@@ -21,6 +22,8 @@ def chunk_document(
 
     Uses the full_text if available, otherwise falls back to the abstract.
     Each chunk inherits document metadata (source_type, authors, year, doi).
+    Chunk IDs hash the document ID and chunk text, so re-chunking an
+    unchanged document reproduces the same IDs.
     """
     text = doc.full_text or doc.abstract
     if not text:
@@ -54,13 +57,19 @@ def chunk_document(
         "source_id": doc.source_id,
     }
 
-    return [
-        Chunk(
-            chunk_id=_chunk_id(doc.source_id, i),
+    chunks: list[Chunk] = []
+    seen: set[str] = set()
+    for para in merged:
+        chunk_id = _chunk_id(doc.source_id, para)
+        if chunk_id in seen:  # repeated paragraph (e.g. boilerplate) within one document
+            continue
+        seen.add(chunk_id)
+        index = len(chunks)
+        chunks.append(Chunk(
+            chunk_id=chunk_id,
             document_id=doc.source_id,
             text=para,
-            index=i,
-            metadata=inherited_meta,
-        )
-        for i, para in enumerate(merged)
-    ]
+            index=index,
+            metadata={**inherited_meta, "chunk_index": index},
+        ))
+    return chunks
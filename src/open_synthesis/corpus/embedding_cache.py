@@ -0,0 +1,59 @@
+"""Persistent embedding cache shared across domains and runs."""
+
+from __future__ import annotations
+
+import hashlib
+from pathlib import Path
+
+import numpy as np
+
+from open_synthesis.cache import DiskCache
+
+
+class EmbeddingCache:
+    """Float16 embeddings keyed by (embedding model, sha256 of text).
+
+    The same paper ingested into several domain collections, or the same
+    query asked twice, is encoded once per model.
+    """
+
+    def __init__(self, path: str | Path, model: str, max_bytes: int) -> None:
+        self._store = DiskCache(Path(path) / "embeddings.sqlite", max_bytes)
+        self.model = model
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, text: str) -> str:
+        return f"{self.model}:{hashlib.sha256(text.encode()).hexdigest()}"
+
+    def get_many(self, texts: list[str]) -> dict[int, list[float]]:
+        """Return cached vectors by position in ``texts``."""
+        keys = [self._key(t) for t in texts]
+        entries = self._store.get_many(keys)
+        found = {
+            i: np.frombuffer(entries[k].value, dtype=np.float16).astype(np.float32).tolist()
+            for i, k in enumerate(keys)
+            if k in entries
+        }
+        self.hits += len(found)
+        self.misses += len(texts) - len(found)
+        return found
+
+    def put_many(self, texts: list[str], vectors: np.ndarray) -> list[list[float]]:
+        """Store vectors and return them as they will be served from the cache."""
+        half = np.asarray(vectors, dtype=np.float16)
+        self._store.put_many((self._key(t), v.tobytes()) for t, v in zip(texts, half))
+        return half.astype(np.float32).tolist()
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self) -> dict[str, float]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hit_rate, 3),
+            "bytes": self._store.size_bytes,
+        }
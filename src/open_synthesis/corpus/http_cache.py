@@ -0,0 +1,103 @@
+"""Content-addressed on-disk cache for data source HTTP responses."""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+from pathlib import Path
+from urllib.parse import urlencode
+
+import httpx
+
+from open_synthesis.cache import CacheEntry, DiskCache
+
+# Connection-level headers that must not be replayed from the cache.
+_HOP_BY_HOP = {"connection", "keep-alive", "transfer-encoding", "proxy-connection", "set-cookie"}
+
+
+def request_key(request: httpx.Request) -> str:
+    """Hash a normalized request: method, URL without query, sorted params, body."""
+    url = request.url
+    params = urlencode(sorted(url.params.multi_items()))
+    h = hashlib.sha256()
+    for part in (request.method, str(url.copy_with(query=None)), params):
+        h.update(part.encode())
+        h.update(b"\0")
+    h.update(request.content)
+    return h.hexdigest()
+
+
+class HttpCache:
+    """Response cache keyed by normalized request, with ETag/Last-Modified revalidation.
+
+    Bodies are stored exactly as received (still content-encoded) so a
+    cached response is indistinguishable from a network one to the caller.
+    """
+
+    def __init__(self, path: str | Path, max_bytes: int, default_ttl: float, offline: bool = False) -> None:
+        self._store = DiskCache(Path(path) / "responses.sqlite", max_bytes)
+        self.default_ttl = default_ttl
+        self.offline = offline
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+
+    async def get(self, key: str) -> CacheEntry | None:
+        return await asyncio.to_thread(self._store.get, key)
+
+    def response(self, entry: CacheEntry, request: httpx.Request) -> httpx.Response:
+        """Rebuild a replayable response from a cache entry."""
+        self.hits += 1
+        return httpx.Response(
+            entry.meta["status"],
+            headers=entry.meta["headers"],
+            stream=httpx.ByteStream(entry.value),
+            request=request,
+            extensions={"from_cache": True},
+        )
+
+    @staticmethod
+    def add_validators(request: httpx.Request, entry: CacheEntry) -> None:
+        """Turn a request for a stale entry into a conditional request."""
+        lowered = {k.lower(): v for k, v in entry.meta["headers"]}
+        if "etag" in lowered:
+            request.headers["If-None-Match"] = lowered["etag"]
+        if "last-modified" in lowered:
+            request.headers["If-Modified-Since"] = lowered["last-modified"]
+
+    async def mark_revalidated(self, key: str, ttl: float) -> None:
+        """Extend a stale entry's lifetime after the origin answered 304."""
+        self.revalidated += 1
+        await asyncio.to_thread(self._store.refresh, key, ttl)
+
+    async def store(
+        self, key: str, request: httpx.Request, response: httpx.Response, ttl: float,
+    ) -> httpx.Response:
+        """Read the response body, cache it if allowed, and return a replayable copy."""
+        body = b"".join([part async for part in response.aiter_raw()])
+        await response.aclose()
+        headers = [(k, v) for k, v in response.headers.multi_items() if k.lower() not in _HOP_BY_HOP]
+        if "no-store" not in response.headers.get("Cache-Control", ""):
+            await asyncio.to_thread(
+                self._store.put,
+                key,
+                body,
+                {"status": response.status_code, "headers": headers},
+                ttl,
+            )
+        return httpx.Response(
+            response.status_code,
+            headers=headers,
+            stream=httpx.ByteStream(body),
+            request=request,
+            extensions=response.extensions,
+        )
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "revalidated": self.revalidated,
+            "entries": len(self._store),
+            "bytes": self._store.size_bytes,
+        }
@@ -0,0 +1,129 @@
+"""Staged ingestion pipeline: fetch → dedup/chunk → diff/embed → write.
+
+Each source's results enter the pipeline as soon as that source returns,
+so embedding and Chroma writes overlap with slower sources still fetching.
+CPU-bound stages run in worker threads, and bounded queues between stages
+apply backpressure when the encoder falls behind. Chunks already stored
+with identical content never reach the encoder.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any
+
+from open_synthesis.corpus.base import DataSource
+from open_synthesis.corpus.chunker import chunk_document
+from open_synthesis.corpus.store import VectorStore
+from open_synthesis.types import Chunk, Document
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+
+
+def _dedup_key(doc: Document) -> str:
+    """Deduplicate by DOI, falling back to source_id."""
+    return doc.doi if doc.doi else doc.source_id
+
+
+def _chunk_all(docs: list[Document]) -> list[Chunk]:
+    return [chunk for doc in docs for chunk in chunk_document(doc)]
+
+
+class IngestPipeline:
+    """One ingest run into a single domain collection."""
+
+    def __init__(
+        self,
+        store: VectorStore,
+        domain: str,
+        queue_size: int = 8,
+        flush_size: int = 512,
+    ) -> None:
+        self.store = store
+        self.domain = domain
+        self.flush_size = flush_size
+        self._docs: asyncio.Queue[Any] = asyncio.Queue(maxsize=queue_size)
+        self._chunks: asyncio.Queue[Any] = asyncio.Queue(maxsize=queue_size)
+        self._embedded: asyncio.Queue[Any] = asyncio.Queue(maxsize=queue_size)
+        self._seen: set[str] = set()
+        self.failed: list[DataSource] = []
+        self.documents = 0
+        self.new = 0
+        self.updated = 0
+        self.unchanged = 0
+
+    async def run(self, sources: list[DataSource], query: str, max_results: int) -> dict[str, int]:
+        """Run all stages to completion and return document and chunk counts."""
+        async with asyncio.TaskGroup() as tg:
+            tg.create_task(self._fetch_all(sources, query, max_results))
+            tg.create_task(self._chunk_stage())
+            tg.create_task(self._embed_stage())
+            tg.create_task(self._write_stage())
+        return {
+            "documents": self.documents,
+            "chunks": self.new + self.updated,
+            "new": self.new,
+            "updated": self.updated,
+            "unchanged": self.unchanged,
+        }
+
+    async def _fetch_one(self, src: DataSource, query: str, max_results: int) -> None:
+        try:
+            docs = await src.search(query, max_results)
+        except Exception as exc:
+            logger.warning("%s search failed: %s", type(src).__name__, exc)
+            self.failed.append(src)
+            return
+        if docs:
+            await self._docs.put(docs)
+
+    async def _fetch_all(self, sources: list[DataSource], query: str, max_results: int) -> None:
+        await asyncio.gather(*(self._fetch_one(src, query, max_results) for src in sources))
+        await self._docs.put(_DONE)
+
+    async def _chunk_stage(self) -> None:
+        while (docs := await self._docs.get()) is not _DONE:
+            fresh: list[Document] = []
+            for doc in docs:
+                key = _dedup_key(doc)
+                if key not in self._seen:
+                    self._seen.add(key)
+                    fresh.append(doc)
+            self.documents += len(fresh)
+            chunks = await asyncio.to_thread(_chunk_all, fresh)
+            if chunks:
+                await self._chunks.put(chunks)
+        await self._chunks.put(_DONE)
+
+    async def _embed_stage(self) -> None:
+        done = False
+        while not done:
+            chunks = await self._chunks.get()
+            if chunks is _DONE:
+                break
+            # Fold in whatever else is already queued so the encoder sees
+            # cross-document batches instead of one source's handful of chunks.
+            while len(chunks) < self.flush_size and not self._chunks.empty():
+                more = self._chunks.get_nowait()
+                if more is _DONE:
+                    done = True
+                    break
+                chunks = chunks + more
+            diff = await asyncio.to_thread(self.store.diff_chunks, self.domain, chunks)
+            self.new += len(diff.new)
+            self.updated += len(diff.updated)
+            self.unchanged += diff.unchanged
+            changed = diff.changed
+            embeddings = await asyncio.to_thread(self.store.embed, [c.text for c in changed])
+            await self._embedded.put((changed, embeddings, diff.moved, diff.stale_ids))
+        await self._embedded.put(_DONE)
+
+    async def _write_stage(self) -> None:
+        while (item := await self._embedded.get()) is not _DONE:
+            chunks, embeddings, moved, stale_ids = item
+            await asyncio.to_thread(self.store.write, self.domain, chunks, embeddings)
+            await asyncio.to_thread(self.store.reindex, self.domain, moved)
+            await asyncio.to_thread(self.store.delete, self.domain, stale_ids)
@@ -0,0 +1,211 @@
+"""Ledger of queries already ingested, per domain and source.
+
+``CorpusManager.ingest`` consults the ledger before searching. A source is
+skipped when it already served the same query, or a near-duplicate, into
+the domain within the freshness window and with at least as many results.
+Queries are compared as analyzer term sets (exact match or Jaccard
+similarity) and, when an embedding function is given, by cosine
+similarity of their embeddings. The latter catches paraphrases such as
+"RCT" versus "randomized trial".
+
+Ingests still in progress are tracked in memory, so concurrent
+near-duplicate queries from different paper sections wait for the first
+ingest instead of repeating it. Sources that failed in that ingest are
+searched by the waiter after all.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import sqlite3
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import numpy as np
+
+from open_synthesis.retrieval.analyzer import DEFAULT_ANALYZER, Analyzer
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS ingests (
+    domain TEXT NOT NULL,
+    source TEXT NOT NULL,
+    query TEXT NOT NULL,
+    terms TEXT NOT NULL,
+    embedding BLOB,
+    max_results INTEGER NOT NULL,
+    documents INTEGER NOT NULL,
+    ingested_at REAL NOT NULL,
+    PRIMARY KEY (domain, source, terms)
+);
+CREATE INDEX IF NOT EXISTS ingests_recent ON ingests (domain, ingested_at);
+"""
+
+
+@dataclass(frozen=True)
+class QueryProbe:
+    """A query's normalized forms, computed once per ingest."""
+
+    query: str
+    terms: frozenset[str]
+    embedding: np.ndarray | None = None
+
+
+@dataclass
+class LedgerMatch:
+    """An earlier (or in-flight) ingest that covers a source for a new query."""
+
+    source: str
+    query: str
+    ingested_at: float
+    pending: asyncio.Future[frozenset[str]] | None = None  # resolves to the sources that succeeded
+
+
+@dataclass
+class _Pending:
+    domain: str
+    probe: QueryProbe
+    sources: set[str]
+    max_results: int
+    started_at: float = field(default_factory=time.time)
+    done: asyncio.Future[frozenset[str]] = field(default_factory=lambda: asyncio.get_running_loop().create_future())
+
+
+class IngestLedger:
+    """SQLite-backed record of (domain, source, query) ingests."""
+
+    def __init__(
+        self,
+        path: str | Path,
+        freshness: float,
+        token_similarity: float = 0.8,
+        embedding_similarity: float = 0.0,
+        embed: Callable[[list[str]], list[list[float]]] | None = None,
+        analyzer: Analyzer = DEFAULT_ANALYZER,
+    ) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.freshness = freshness
+        self.token_similarity = token_similarity
+        self.embedding_similarity = embedding_similarity
+        self._embed = embed if embedding_similarity > 0 else None
+        self.analyzer = analyzer
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(_SCHEMA)
+        self._pending: list[_Pending] = []
+        self.skipped = 0
+        self.searched = 0
+
+    async def probe(self, query: str) -> QueryProbe:
+        """Normalize ``query``; embedding it runs off the event loop."""
+        terms = frozenset(self.analyzer.query(query))
+        embedding = None
+        if self._embed is not None:
+            vector = (await asyncio.to_thread(self._embed, [query]))[0]
+            embedding = _unit(np.asarray(vector, dtype=np.float32))
+        return QueryProbe(query, terms, embedding)
+
+    def _similar(self, a: QueryProbe, terms: frozenset[str], embedding: np.ndarray | None) -> bool:
+        if a.terms == terms:
+            return True
+        if a.terms and terms and len(a.terms & terms) / len(a.terms | terms) >= self.token_similarity:
+            return True
+        return (
+            a.embedding is not None
+            and embedding is not None
+            and float(a.embedding @ embedding) >= self.embedding_similarity
+        )
+
+    def match(
+        self, domain: str, probe: QueryProbe, sources: list[str], max_results: int,
+    ) -> dict[str, LedgerMatch]:
+        """Sources already covered for ``probe`` in ``domain``, with what covered them."""
+        covered: dict[str, LedgerMatch] = {}
+        for p in self._pending:
+            if p.domain != domain or p.max_results < max_results:
+                continue
+            if self._similar(probe, p.probe.terms, p.probe.embedding):
+                for source in p.sources & set(sources):
+                    covered.setdefault(source, LedgerMatch(source, p.probe.query, p.started_at, p.done))
+
+        wanted = [s for s in sources if s not in covered]
+        if wanted:
+            self._match_recorded(domain, probe, wanted, max_results, covered)
+        self.skipped += len(covered)
+        self.searched += len(sources) - len(covered)
+        return covered
+
+    async def settle(self, matches: dict[str, LedgerMatch]) -> dict[str, LedgerMatch]:
+        """Wait for in-flight matches; sources that failed there are no longer covered."""
+        waits = {m.pending for m in matches.values() if m.pending is not None}
+        if not waits:
+            return matches
+        await asyncio.wait(waits)
+        covered = {
+            name: m for name, m in matches.items()
+            if m.pending is None or name in m.pending.result()
+        }
+        retried = len(matches) - len(covered)
+        self.skipped -= retried
+        self.searched += retried
+        return covered
+
+    def _match_recorded(
+        self,
+        domain: str,
+        probe: QueryProbe,
+        wanted: list[str],
+        max_results: int,
+        covered: dict[str, LedgerMatch],
+    ) -> None:
+        marks = ",".join("?" * len(wanted))
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT source, query, terms, embedding, ingested_at FROM ingests "
+                f"WHERE domain = ? AND ingested_at >= ? AND max_results >= ? AND source IN ({marks}) "
+                "ORDER BY ingested_at DESC",
+                (domain, time.time() - self.freshness, max_results, *wanted),
+            ).fetchall()
+        for source, query, terms, blob, ingested_at in rows:
+            if source in covered:
+                continue
+            embedding = np.frombuffer(blob, dtype=np.float16).astype(np.float32) if blob else None
+            if self._similar(probe, frozenset(terms.split()), embedding):
+                covered[source] = LedgerMatch(source, query, ingested_at)
+
+    def begin(self, domain: str, probe: QueryProbe, sources: list[str], max_results: int) -> _Pending:
+        """Mark an ingest as in flight so concurrent near-duplicates wait for it."""
+        pending = _Pending(domain, probe, set(sources), max_results)
+        self._pending.append(pending)
+        return pending
+
+    def finish(self, pending: _Pending, succeeded: list[str], documents: int) -> None:
+        """Record the sources that answered and release waiters."""
+        self._pending.remove(pending)
+        pending.done.set_result(frozenset(succeeded))
+        probe = pending.probe
+        blob = probe.embedding.astype(np.float16).tobytes() if probe.embedding is not None else None
+        now = time.time()
+        rows = [
+            (pending.domain, source, probe.query, " ".join(sorted(probe.terms)), blob,
+             pending.max_results, documents, now)
+            for source in succeeded
+        ]
+        with self._lock:
+            self._db.executemany("INSERT OR REPLACE INTO ingests VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def stats(self) -> dict[str, int]:
+        return {"searched": self.searched, "skipped": self.skipped}
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+def _unit(v: np.ndarray) -> np.ndarray:
+    norm = float(np.linalg.norm(v))
+    return v / norm if norm else v
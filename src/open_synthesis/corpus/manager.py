@@ -2,15 +2,16 @@
 
 from __future__ import annotations
 
-import asyncio
+from pathlib import Path
 from typing import Any
 
 from open_synthesis.config import Settings
 from open_synthesis.corpus.base import DataSource
-from open_synthesis.corpus.chunker import chunk_document
+from open_synthesis.corpus.ingest import IngestPipeline
+from open_synthesis.corpus.ledger import IngestLedger
 from open_synthesis.corpus.sources import SOURCE_REGISTRY
 from open_synthesis.corpus.store import VectorStore
-from open_synthesis.types import Document
+from open_synthesis.corpus.transport import configure_transport
 
 
 class CorpusManager:
@@ -18,10 +19,19 @@ class CorpusManager:
 
     def __init__(self, settings: Settings) -> None:
         self.settings = settings
-        self.store = VectorStore(
-            persist_path=settings.vector_store_path,
-            embedding_model=settings.embedding.model,
-        )
+        self.store = VectorStore.from_settings(settings)
+        self.transport = configure_transport(settings.http)
+        self._sources: dict[str, DataSource] = {}
+        cfg = settings.ingest
+        self.ledger: IngestLedger | None = None
+        if cfg.ledger_enabled:
+            self.ledger = IngestLedger(
+                Path(settings.vector_store_path) / "ingest_ledger.sqlite",
+                freshness=cfg.ledger_freshness,
+                token_similarity=cfg.ledger_token_similarity,
+                embedding_similarity=cfg.ledger_embedding_similarity,
+                embed=self.store.embed,
+            )
 
     async def ingest(
         self,
@@ -29,50 +39,90 @@ class CorpusManager:
         domain: str,
         source_names: list[str] | None = None,
         max_results_per_source: int = 20,
+        force: bool = False,
     ) -> dict[str, Any]:
-        """Search sources, deduplicate, chunk, embed, and store."""
-        sources = self._get_sources(source_names)
-        all_docs = await self._search_all(sources, query, max_results_per_source)
-        deduped = self._deduplicate(all_docs)
+        """Search sources, deduplicate, chunk, embed, and store.
 
-        total_chunks = 0
-        for doc in deduped:
-            chunks = chunk_document(doc)
-            total_chunks += self.store.add_chunks(domain, chunks)
+        Stages run concurrently (see IngestPipeline), so documents from fast
+        sources are embedded and written while slow sources are still fetching.
+        Sources that the ledger shows already served this query, or a
+        near-duplicate, are skipped unless ``force`` is set; they are listed
+        under ``skipped`` with the earlier query.
+        """
+        named = self._get_sources(source_names)
+        ledger = self.ledger
+        skipped: dict[str, str] = {}
+        pending = None
+        if ledger is not None:
+            probe = await ledger.probe(query)
+            if not force:
+                matches = ledger.match(domain, probe, list(named), max_results_per_source)
+                # Near-duplicates still ingesting elsewhere: wait so their chunks are stored,
+                # then search the sources that failed there.
+                matches = await ledger.settle(matches)
+                skipped = {name: m.query for name, m in matches.items()}
+                named = {name: src for name, src in named.items() if name not in matches}
+            pending = ledger.begin(domain, probe, list(named), max_results_per_source)
 
-        # Close all source clients
-        for src in sources:
-            await src.close()
+        succeeded: list[str] = []
+        documents = 0
+        try:
+            result = await self._run_pipeline(list(named.values()), query, domain, max_results_per_source)
+            failed = result.pop("failed")
+            succeeded = [name for name, src in named.items() if src not in failed]
+            documents = result["documents"]
+        finally:
+            if pending is not None:
+                ledger.finish(pending, succeeded, documents)
+        result["skipped"] = skipped
+        return result
+
+    async def _run_pipeline(
+        self, sources: list[DataSource], query: str, domain: str, max_results: int,
+    ) -> dict[str, Any]:
+        waits_before = self._rate_limit_waits()
+        cache = self.store.embedding_cache
+        cache_before = (cache.hits, cache.misses) if cache else (0, 0)
+        pipeline = IngestPipeline(
+            self.store,
+            domain,
+            queue_size=self.settings.ingest.queue_size,
+            flush_size=self.settings.ingest.flush_size,
+        )
+        counts = await pipeline.run(sources, query, max_results)
 
-        return {"documents": len(deduped), "chunks": total_chunks}
+        waits_after = self._rate_limit_waits()
+        rate_limited = {
+            host: round(wait - waits_before.get(host, 0.0), 2)
+            for host, wait in waits_after.items()
+            if wait > waits_before.get(host, 0.0)
+        }
+        result = {**counts, "rate_limited": rate_limited, "failed": pipeline.failed}
+        if cache is not None:
+            hits, misses = cache.hits - cache_before[0], cache.misses - cache_before[1]
+            result["embedding_cache"] = {
+                "hits": hits,
+                "misses": misses,
+                "hit_rate": round(hits / (hits + misses), 3) if hits + misses else 0.0,
+            }
+        return result
 
-    def _get_sources(self, names: list[str] | None) -> list[DataSource]:
-        if names:
-            return [SOURCE_REGISTRY[n]() for n in names if n in SOURCE_REGISTRY]
-        return [cls() for cls in SOURCE_REGISTRY.values()]
+    async def close(self) -> None:
+        """Release source clients and close the shared connection pools."""
+        for src in self._sources.values():
+            await src.close()
+        await self.transport.aclose()
+        if self.ledger is not None:
+            self.ledger.close()
 
-    async def _search_all(
-        self,
-        sources: list[DataSource],
-        query: str,
-        max_results: int,
-    ) -> list[Document]:
-        tasks = [src.search(query, max_results) for src in sources]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-        docs: list[Document] = []
-        for result in results:
-            if isinstance(result, Exception):
-                continue
-            docs.extend(result)
-        return docs
+    def _rate_limit_waits(self) -> dict[str, float]:
+        """Cumulative rate-limit queue wait per host, in seconds."""
+        return {host: s["wait_total"] for host, s in self.transport.limiter.stats().items()}
 
-    def _deduplicate(self, docs: list[Document]) -> list[Document]:
-        """Deduplicate by DOI, falling back to source_id."""
-        seen: set[str] = set()
-        unique: list[Document] = []
-        for doc in docs:
-            key = doc.doi if doc.doi else doc.source_id
-            if key not in seen:
-                seen.add(key)
-                unique.append(doc)
-        return unique
+    def _get_sources(self, names: list[str] | None) -> dict[str, DataSource]:
+        """Return source instances by registry name, reusing them across ingests."""
+        selected = [n for n in names if n in SOURCE_REGISTRY] if names else list(SOURCE_REGISTRY)
+        for name in selected:
+            if name not in self._sources:
+                self._sources[name] = SOURCE_REGISTRY[name]()
+        return {name: self._sources[name] for name in selected}
@@ -0,0 +1,114 @@
+"""Per-host token-bucket pacing for data source requests."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+
+from pydantic import BaseModel, ConfigDict
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimit(BaseModel):
+    """A structured rate-limit declaration: ``requests`` per ``period`` seconds.
+
+    ``burst`` is how many requests may go out back-to-back before pacing
+    kicks in; it defaults to the full allowance for one period.
+    """
+
+    model_config = ConfigDict(frozen=True)
+
+    requests: float
+    period: float = 1.0
+    burst: int | None = None
+
+    @property
+    def rate(self) -> float:
+        """Sustained requests per second."""
+        return self.requests / self.period
+
+    @property
+    def capacity(self) -> float:
+        return float(self.burst if self.burst is not None else max(1, int(self.requests)))
+
+
+class _TokenBucket:
+    def __init__(self, limit: RateLimit) -> None:
+        self.limit = limit
+        self.tokens = limit.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.limit.capacity, self.tokens + (now - self.updated) * self.limit.rate)
+        self.updated = now
+
+    def reserve(self) -> float:
+        """Take one token and return how long the caller must wait before using it.
+
+        Tokens may go negative: each caller reserves its own future slot, so
+        concurrent requests are spaced out without queuing behind a lock.
+        """
+        self._refill()
+        self.tokens -= 1.0
+        if self.tokens >= 0:
+            return 0.0
+        return -self.tokens / self.limit.rate
+
+    def penalize(self, delay: float) -> None:
+        """Put the bucket into debt so no new request goes out for ``delay`` seconds."""
+        self._refill()
+        self.tokens = min(self.tokens, -delay * self.limit.rate)
+
+
+class RateLimiter:
+    """Async token-bucket scheduler keyed by host.
+
+    Sources sharing a host (e.g. PubMed and NCBI Gene on eutils) share one
+    bucket; if they declare different limits the stricter one wins.
+    """
+
+    def __init__(self) -> None:
+        self._buckets: dict[str, _TokenBucket] = {}
+        self._stats: dict[str, dict[str, float]] = {}
+
+    def _bucket(self, host: str, limit: RateLimit) -> _TokenBucket:
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            bucket = _TokenBucket(limit)
+            self._buckets[host] = bucket
+        elif limit.rate < bucket.limit.rate:
+            bucket._refill()
+            bucket.limit = limit
+            bucket.tokens = min(bucket.tokens, limit.capacity)
+        return bucket
+
+    async def acquire(self, host: str, limit: RateLimit) -> float:
+        """Wait for a request slot on ``host``. Returns the time spent queued."""
+        wait = self._bucket(host, limit).reserve()
+        stats = self._stats.setdefault(
+            host, {"requests": 0, "delayed": 0, "wait_total": 0.0, "wait_max": 0.0, "throttled": 0},
+        )
+        stats["requests"] += 1
+        if wait > 0:
+            stats["delayed"] += 1
+            stats["wait_total"] += wait
+            stats["wait_max"] = max(stats["wait_max"], wait)
+            logger.debug("Rate limit: waiting %.2fs for %s", wait, host)
+            await asyncio.sleep(wait)
+        return wait
+
+    def backoff(self, host: str, delay: float) -> None:
+        """Record a 429 from ``host`` and hold back its bucket for ``delay`` seconds."""
+        bucket = self._buckets.get(host)
+        if bucket is not None:
+            bucket.penalize(delay)
+        stats = self._stats.get(host)
+        if stats is not None:
+            stats["throttled"] += 1
+
+    def stats(self) -> dict[str, dict[str, float]]:
+        """Per-host request counts and queue wait times since process start."""
+        return {host: dict(s) for host, s in self._stats.items()}
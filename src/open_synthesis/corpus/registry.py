@@ -0,0 +1,98 @@
+"""Process-wide registry of heavyweight store resources.
+
+Embedding models, cross-encoders, Chroma clients, embedding and rerank
+caches and sparse indexes are loaded once per process and shared by
+every VectorStore that asks for the same model or path. Loading is lazy
+and thread-safe: concurrent first requests for one key wait for a single
+load instead of each loading a copy.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections.abc import Callable, Hashable
+from pathlib import Path
+from typing import Any, TypeVar
+
+import chromadb
+from sentence_transformers import CrossEncoder, SentenceTransformer
+
+from open_synthesis.corpus.embedding_cache import EmbeddingCache
+from open_synthesis.retrieval.analyzer import Analyzer
+from open_synthesis.retrieval.inverted_index import InvertedIndex
+from open_synthesis.retrieval.rerank_cache import RerankCache
+
+T = TypeVar("T")
+
+_lock = threading.Lock()
+_key_locks: dict[Hashable, threading.Lock] = {}
+_embedders: dict[str, SentenceTransformer] = {}
+_cross_encoders: dict[tuple[str, int, str, str], CrossEncoder] = {}
+_clients: dict[str, Any] = {}
+_embedding_caches: dict[tuple[str, str], EmbeddingCache] = {}
+_inverted_indexes: dict[tuple[str, str], InvertedIndex] = {}
+_rerank_caches: dict[tuple[str, str], RerankCache] = {}
+
+
+def _get_or_load(registry: dict[Any, T], key: Hashable, load: Callable[[], T]) -> T:
+    value = registry.get(key)
+    if value is not None:
+        return value
+    with _lock:
+        key_lock = _key_locks.setdefault((id(registry), key), threading.Lock())
+    # Loading can take seconds; hold only this key's lock so other keys load in parallel.
+    with key_lock:
+        value = registry.get(key)
+        if value is None:
+            value = load()
+            registry[key] = value
+    return value
+
+
+def get_embedder(model: str) -> SentenceTransformer:
+    """Return the process-wide instance of a sentence-transformer model."""
+    return _get_or_load(_embedders, model, lambda: SentenceTransformer(model))
+
+
+def get_cross_encoder(model: str, max_length: int, backend: str = "torch", file_name: str = "") -> CrossEncoder:
+    """Return the process-wide cross-encoder for a model, length limit and backend.
+
+    ``file_name`` picks an exported model file for the ``onnx`` backend
+    (e.g. a quantized ``onnx/model_qint8_avx512_vnni.onnx``).
+    """
+    model_kwargs = {"file_name": file_name} if backend != "torch" and file_name else None
+    return _get_or_load(
+        _cross_encoders,
+        (model, max_length, backend, file_name),
+        lambda: CrossEncoder(
+            model, max_length=max_length, device="cpu", backend=backend, model_kwargs=model_kwargs,
+        ),
+    )
+
+
+def get_chroma_client(persist_path: str | Path) -> Any:
+    """Return the process-wide Chroma client for a store directory."""
+    path = str(Path(persist_path).resolve())
+    return _get_or_load(_clients, path, lambda: chromadb.PersistentClient(path=path))
+
+
+def get_embedding_cache(path: str | Path, model: str, max_bytes: int) -> EmbeddingCache:
+    """Return the process-wide embedding cache for a cache directory and model."""
+    key = (str(Path(path).resolve()), model)
+    return _get_or_load(_embedding_caches, key, lambda: EmbeddingCache(path, model, max_bytes))
+
+
+def get_rerank_cache(path: str | Path, model: str, max_bytes: int, ttl: float | None) -> RerankCache:
+    """Return the process-wide rerank score cache for a cache directory and model."""
+    key = (str(Path(path).resolve()), model)
+    return _get_or_load(_rerank_caches, key, lambda: RerankCache(path, model, max_bytes, ttl))
+
+
+def get_inverted_index(path: str | Path, analyzer: Analyzer) -> InvertedIndex:
+    """Return the process-wide sparse index stored at ``path``.
+
+    Indexes are keyed by path and analyzer signature, so a store configured
+    with a different analyzer rebuilds the index rather than mixing terms.
+    """
+    key = (str(Path(path).resolve()), analyzer.signature)
+    return _get_or_load(_inverted_indexes, key, lambda: InvertedIndex(key[0], analyzer))
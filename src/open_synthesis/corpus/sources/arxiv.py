@@ -5,12 +5,15 @@ from __future__ import annotations
 from typing import Any
 
 from open_synthesis.corpus.base import DataSource
+from open_synthesis.corpus.ratelimit import RateLimit
 from open_synthesis.types import Document
 
 _BASE = "https://export.arxiv.org/api/query"
 
 
 class ArxivSource(DataSource):
+    rate_limit = RateLimit(requests=1, period=3.0)
+
     @staticmethod
     def info() -> dict[str, Any]:
         return {
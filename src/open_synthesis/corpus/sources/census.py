@@ -6,12 +6,16 @@ import json
 from typing import Any
 
 from open_synthesis.corpus.base import DataSource
+from open_synthesis.corpus.ratelimit import RateLimit
 from open_synthesis.types import Document
 
 _BASE = "https://api.census.gov/data"
 
 
 class CensusSource(DataSource):
+    rate_limit = RateLimit(requests=500, period=86400.0)
+    cache_ttl = 7 * 86400.0
+
     """American Community Survey and decennial census data."""
 
     @staticmethod
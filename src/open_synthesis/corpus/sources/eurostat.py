@@ -13,6 +13,8 @@ _STAT_BASE = "https://ec.europa.eu/eurostat/api/dissemination/statistics/1.0"
 
 
 class EurostatSource(DataSource):
+    cache_ttl = 7 * 86400.0
+
     @staticmethod
     def info() -> dict[str, Any]:
         return {
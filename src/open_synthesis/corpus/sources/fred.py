@@ -6,12 +6,16 @@ import json
 from typing import Any
 
 from open_synthesis.corpus.base import DataSource
+from open_synthesis.corpus.ratelimit import RateLimit
 from open_synthesis.types import Document
 
 _BASE = "https://api.stlouisfed.org/fred"
 
 
 class FredSource(DataSource):
+    rate_limit = RateLimit(requests=120, period=60.0)
+    cache_ttl = 7 * 86400.0
+
     @staticmethod
     def info() -> dict[str, Any]:
         return {
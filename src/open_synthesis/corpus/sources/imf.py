@@ -12,6 +12,8 @@ _BASE = "http://dataservices.imf.org/REST/SDMX_JSON.svc"
 
 
 class ImfSource(DataSource):
+    cache_ttl = 7 * 86400.0
+
     @staticmethod
     def info() -> dict[str, Any]:
         return {
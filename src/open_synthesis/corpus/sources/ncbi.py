@@ -6,12 +6,21 @@ import os
 from typing import Any
 
 from open_synthesis.corpus.base import DataSource
+from open_synthesis.corpus.ratelimit import RateLimit
 from open_synthesis.types import Document
 
 _BASE = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils"
 
 
 class NcbiGeneSource(DataSource):
+    rate_limit = RateLimit(requests=3, period=1.0)
+    authenticated_rate_limit = RateLimit(requests=10, period=1.0)
+
+    def effective_rate_limit(self) -> RateLimit | None:
+        if self.api_key or os.environ.get("NCBI_API_KEY"):
+            return self.authenticated_rate_limit
+        return self.rate_limit
+
     @staticmethod
     def info() -> dict[str, Any]:
         return {
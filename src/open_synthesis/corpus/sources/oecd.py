@@ -12,6 +12,8 @@ _BASE = "https://sdmx.oecd.org/public/rest"
 
 
 class OecdSource(DataSource):
+    cache_ttl = 7 * 86400.0
+
     @staticmethod
     def info() -> dict[str, Any]:
         return {
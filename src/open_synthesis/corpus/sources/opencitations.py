@@ -6,6 +6,7 @@ import re
 from typing import Any
 
 from open_synthesis.corpus.base import DataSource
+from open_synthesis.corpus.ratelimit import RateLimit
 from open_synthesis.types import Document
 
 _BASE = "https://opencitations.net/index/api/v2"
@@ -13,6 +14,8 @@ _DOI_RE = re.compile(r"^10\.\d{4,9}/[^\s]+$")
 
 
 class OpenCitationsSource(DataSource):
+    rate_limit = RateLimit(requests=180, period=60.0)
+
     @staticmethod
     def info() -> dict[str, Any]:
         return {
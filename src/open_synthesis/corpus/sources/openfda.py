@@ -6,12 +6,15 @@ import json
 from typing import Any
 
 from open_synthesis.corpus.base import DataSource
+from open_synthesis.corpus.ratelimit import RateLimit
 from open_synthesis.types import Document
 
 _BASE = "https://api.fda.gov"
 
 
 class OpenFdaSource(DataSource):
+    rate_limit = RateLimit(requests=240, period=60.0)
+
     @staticmethod
     def info() -> dict[str, Any]:
         return {
@@ -6,12 +6,15 @@ from typing import Any
 from urllib.parse import quote
 
 from open_synthesis.corpus.base import DataSource
+from open_synthesis.corpus.ratelimit import RateLimit
 from open_synthesis.types import Document
 
 _BASE = "https://pubchem.ncbi.nlm.nih.gov/rest/pug"
 
 
 class PubChemSource(DataSource):
+    rate_limit = RateLimit(requests=5, period=1.0)
+
     @staticmethod
     def info() -> dict[str, Any]:
         return {
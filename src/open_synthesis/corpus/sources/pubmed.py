@@ -6,6 +6,7 @@ import xml.etree.ElementTree as ET
 from typing import Any
 
 from open_synthesis.corpus.base import DataSource
+from open_synthesis.corpus.ratelimit import RateLimit
 from open_synthesis.types import Document
 
 _ESEARCH = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esearch.fcgi"
@@ -13,6 +14,9 @@ _EFETCH = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/efetch.fcgi"
 
 
 class PubMedSource(DataSource):
+    rate_limit = RateLimit(requests=3, period=1.0)
+    authenticated_rate_limit = RateLimit(requests=10, period=1.0)
+
     @staticmethod
     def info() -> dict[str, Any]:
         return {
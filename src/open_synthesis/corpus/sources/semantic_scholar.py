@@ -5,6 +5,7 @@ from __future__ import annotations
 from typing import Any
 
 from open_synthesis.corpus.base import DataSource
+from open_synthesis.corpus.ratelimit import RateLimit
 from open_synthesis.types import Document
 
 _BASE = "https://api.semanticscholar.org/graph/v1"
@@ -12,6 +13,8 @@ _FIELDS = "paperId,title,abstract,authors,year,externalIds,url"
 
 
 class SemanticScholarSource(DataSource):
+    rate_limit = RateLimit(requests=100, period=300.0)
+
     @staticmethod
     def info() -> dict[str, Any]:
         return {
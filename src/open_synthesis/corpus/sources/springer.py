@@ -6,12 +6,15 @@ import os
 from typing import Any
 
 from open_synthesis.corpus.base import DataSource
+from open_synthesis.corpus.ratelimit import RateLimit
 from open_synthesis.types import Document
 
 _BASE = "https://api.springernature.com/meta/v2/json"
 
 
 class SpringerSource(DataSource):
+    rate_limit = RateLimit(requests=500, period=86400.0)
+
     def __init__(self, api_key: str | None = None) -> None:
         super().__init__(api_key=api_key)
         self._springer_key = api_key or os.environ.get("SPRINGER_API_KEY", "")
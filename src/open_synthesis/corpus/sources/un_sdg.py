@@ -11,6 +11,8 @@ _BASE = "https://unstats.un.org/sdgapi/v1"
 
 
 class UnSdgSource(DataSource):
+    cache_ttl = 7 * 86400.0
+
     @staticmethod
     def info() -> dict[str, Any]:
         return {
@@ -5,6 +5,7 @@ from __future__ import annotations
 from typing import Any
 
 from open_synthesis.corpus.base import DataSource
+from open_synthesis.corpus.ratelimit import RateLimit
 from open_synthesis.types import Document
 
 _BASE = "https://api.unpaywall.org/v2"
@@ -12,6 +13,8 @@ _EMAIL = "support@opensynthesis.dev"
 
 
 class UnpaywallSource(DataSource):
+    rate_limit = RateLimit(requests=100_000, period=86400.0)
+
     @staticmethod
     def info() -> dict[str, Any]:
         return {
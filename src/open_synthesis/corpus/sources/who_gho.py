@@ -12,6 +12,8 @@ _BASE = "https://ghoapi.azureedge.net/api"
 
 
 class WhoGhoSource(DataSource):
+    cache_ttl = 7 * 86400.0
+
     @staticmethod
     def info() -> dict[str, Any]:
         return {
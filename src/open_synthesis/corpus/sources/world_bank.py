@@ -12,6 +12,8 @@ _BASE = "https://api.worldbank.org/v2"
 
 
 class WorldBankSource(DataSource):
+    cache_ttl = 7 * 86400.0
+
     @staticmethod
     def info() -> dict[str, Any]:
         return {
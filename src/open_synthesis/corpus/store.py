@@ -2,60 +2,325 @@
 
 from __future__ import annotations
 
+from collections.abc import Iterator
 from pathlib import Path
+from typing import Any, NamedTuple
 
-import chromadb
 from sentence_transformers import SentenceTransformer
 
+from open_synthesis.config import Settings
+from open_synthesis.corpus.embedding_cache import EmbeddingCache
+from open_synthesis.corpus.registry import (
+    get_chroma_client,
+    get_embedder,
+    get_embedding_cache,
+    get_inverted_index,
+)
+from open_synthesis.retrieval.analyzer import DEFAULT_ANALYZER, Analyzer
+from open_synthesis.retrieval.hybrid import reciprocal_rank_fusion
+from open_synthesis.retrieval.inverted_index import InvertedIndex
 from open_synthesis.types import Chunk, RetrievedChunk
 
 
+class ChunkDiff(NamedTuple):
+    """Incoming chunks classified against what a collection already holds."""
+
+    new: list[Chunk]  # documents not seen before
+    updated: list[Chunk]  # changed or added paragraphs of known documents
+    unchanged: int
+    stale_ids: list[str]  # stored chunks of these documents that no longer exist
+    moved: list[Chunk] = []  # unchanged text whose position in the document shifted
+
+    @property
+    def changed(self) -> list[Chunk]:
+        return self.new + self.updated
+
+
 class VectorStore:
-    """Persistent ChromaDB store with sentence-transformer embeddings."""
+    """Persistent ChromaDB store with sentence-transformer embeddings.
+
+    The embedding model and Chroma client come from the process-wide
+    registry and are loaded on first use, so any number of stores over the
+    same path and model share one of each. Each collection has a BM25
+    inverted index under ``<persist_path>/sparse/<domain>`` that is updated
+    on every write and delete.
+    """
+
+    def __init__(
+        self,
+        persist_path: str = "./vectorstore",
+        embedding_model: str = "all-MiniLM-L6-v2",
+        batch_size: int = 64,
+        embedding_cache: EmbeddingCache | None = None,
+        analyzer: Analyzer = DEFAULT_ANALYZER,
+    ) -> None:
+        self.persist_path = persist_path
+        self.embedding_model = embedding_model
+        self.batch_size = batch_size
+        self.embedding_cache = embedding_cache
+        self.analyzer = analyzer
 
-    def __init__(self, persist_path: str = "./vectorstore", embedding_model: str = "all-MiniLM-L6-v2") -> None:
-        self._client = chromadb.PersistentClient(path=str(Path(persist_path).resolve()))
-        self._embedder = SentenceTransformer(embedding_model)
+    @classmethod
+    def from_settings(cls, settings: Settings) -> VectorStore:
+        """Build a store, with its embedding cache when enabled, from settings."""
+        emb = settings.embedding
+        ret = settings.retrieval
+        cache = None
+        if emb.cache_enabled:
+            cache = get_embedding_cache(emb.cache_path, emb.model, max_bytes=emb.cache_max_mb * 1024 * 1024)
+        return cls(
+            persist_path=settings.vector_store_path,
+            embedding_model=emb.model,
+            batch_size=emb.batch_size,
+            embedding_cache=cache,
+            analyzer=Analyzer(stopwords=ret.stopwords, stemming=ret.stemming),
+        )
+
+    @property
+    def _client(self) -> Any:
+        return get_chroma_client(self.persist_path)
+
+    @property
+    def _embedder(self) -> SentenceTransformer:
+        return get_embedder(self.embedding_model)
+
+    def warm_up(self) -> None:
+        """Load the embedding model, open the Chroma client and load each domain's sparse index.
+
+        Indexes persisted by an earlier run load without a rebuild; missing
+        or outdated ones are rebuilt here rather than inside a first query.
+        """
+        get_embedder(self.embedding_model)
+        for collection in self._client.list_collections():
+            self._sparse_index(collection.name, collection)
 
     def add_chunks(self, domain: str, chunks: list[Chunk]) -> int:
-        """Add chunks to a domain collection. Returns count added."""
+        """Embed and store chunks in a domain collection. Returns count written.
+
+        This is the bulk path: pass chunks from many documents at once so the
+        encoder and Chroma both see large batches. Chunks already stored with
+        identical content are skipped before embedding.
+        """
         if not chunks:
             return 0
+        diff = self.diff_chunks(domain, chunks)
+        changed = diff.changed
+        written = self.write(domain, changed, self.embed([c.text for c in changed]))
+        self.reindex(domain, diff.moved)
+        self.delete(domain, diff.stale_ids)
+        return written
+
+    def diff_chunks(self, domain: str, chunks: list[Chunk]) -> ChunkDiff:
+        """Bulk-check which chunks need embedding.
+
+        Chunk IDs are content-addressed, so an ID already in the collection
+        means the text is unchanged. A document whose stored chunk IDs differ
+        from the incoming set has been updated; its leftover chunks are stale.
+        Each document's chunks must be passed together. Unchanged chunks whose
+        index moved (a paragraph was inserted above them) are returned in
+        ``moved`` so ``reindex`` can fix their metadata without re-embedding.
+        """
         collection = self._client.get_or_create_collection(domain)
-        embeddings = self._embedder.encode([c.text for c in chunks]).tolist()
-        collection.add(
-            ids=[c.chunk_id for c in chunks],
-            embeddings=embeddings,
-            documents=[c.text for c in chunks],
-            metadatas=[c.metadata for c in chunks],
-        )
+        incoming = list({c.chunk_id: c for c in chunks}.values())
+        doc_ids = sorted({c.document_id for c in incoming})
+        step = self._max_batch_size()
+
+        existing: dict[str, int | None] = {}  # chunk ID -> stored chunk_index
+        ids = [c.chunk_id for c in incoming]
+        for start in range(0, len(ids), step):
+            found = collection.get(ids=ids[start:start + step], include=["metadatas"])
+            for cid, meta in zip(found["ids"], found["metadatas"]):
+                existing[cid] = (meta or {}).get("chunk_index")
+
+        stored_by_doc: dict[str, list[str]] = {}
+        for start in range(0, len(doc_ids), step):
+            batch = doc_ids[start:start + step]
+            found = collection.get(where={"source_id": {"$in": batch}}, include=["metadatas"])
+            for cid, meta in zip(found["ids"], found["metadatas"]):
+                stored_by_doc.setdefault(meta.get("source_id", ""), []).append(cid)
+
+        incoming_ids = set(ids)
+        new: list[Chunk] = []
+        updated: list[Chunk] = []
+        moved: list[Chunk] = []
+        for c in incoming:
+            if c.chunk_id in existing:
+                if existing[c.chunk_id] != c.index:
+                    moved.append(c)
+                continue
+            (updated if c.document_id in stored_by_doc else new).append(c)
+        stale = [
+            cid
+            for stored in stored_by_doc.values()
+            for cid in stored
+            if cid not in incoming_ids
+        ]
+        return ChunkDiff(new, updated, len(existing), stale, moved)
+
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        """Encode texts with the store's embedding model. CPU-bound; call off the event loop.
+
+        Texts already in the embedding cache are not re-encoded. The rest are
+        encoded in length-sorted batches so each batch pads to similar
+        lengths; results are returned in input order.
+        """
+        embeddings: list[list[float]] = [[] for _ in texts]
+        cache = self.embedding_cache
+        missing = list(range(len(texts)))
+        if cache is not None and texts:
+            for i, vector in cache.get_many(texts).items():
+                embeddings[i] = vector
+            missing = [i for i in missing if not embeddings[i]]
+
+        order = sorted(missing, key=lambda i: len(texts[i]))
+        for start in range(0, len(order), self.batch_size):
+            batch = order[start:start + self.batch_size]
+            batch_texts = [texts[i] for i in batch]
+            vectors = self._embedder.encode(batch_texts, batch_size=self.batch_size)
+            # Serve fresh vectors at cache precision so a text embeds the same on every run.
+            rows = cache.put_many(batch_texts, vectors) if cache is not None else vectors.tolist()
+            for i, vector in zip(batch, rows):
+                embeddings[i] = vector
+        return embeddings
+
+    def write(self, domain: str, chunks: list[Chunk], embeddings: list[list[float]]) -> int:
+        """Upsert pre-embedded chunks into a domain collection. Returns count written."""
+        if not chunks:
+            return 0
+        collection = self._client.get_or_create_collection(domain)
+        step = self._max_batch_size()
+        for start in range(0, len(chunks), step):
+            batch = chunks[start:start + step]
+            collection.upsert(
+                ids=[c.chunk_id for c in batch],
+                embeddings=embeddings[start:start + step],
+                documents=[c.text for c in batch],
+                metadatas=[c.metadata for c in batch],
+            )
+        self._sparse_index(domain, collection, reconcile=False).add((c.chunk_id, c.text) for c in chunks)
         return len(chunks)
 
-    def query(self, domain: str, query_text: str, n_results: int = 20) -> list[RetrievedChunk]:
-        """Query a domain collection by text similarity."""
+    def reindex(self, domain: str, chunks: list[Chunk]) -> None:
+        """Rewrite the metadata of stored chunks (e.g. a shifted chunk_index); no re-embedding."""
+        if not chunks:
+            return
+        collection = self._client.get_or_create_collection(domain)
+        step = self._max_batch_size()
+        for start in range(0, len(chunks), step):
+            batch = chunks[start:start + step]
+            collection.update(ids=[c.chunk_id for c in batch], metadatas=[c.metadata for c in batch])
+
+    def delete(self, domain: str, ids: list[str]) -> None:
+        """Remove chunks by ID from a domain collection."""
+        if not ids:
+            return
+        collection = self._client.get_or_create_collection(domain)
+        step = self._max_batch_size()
+        for start in range(0, len(ids), step):
+            collection.delete(ids=ids[start:start + step])
+        self._sparse_index(domain, collection, reconcile=False).delete(ids)
+
+    def _sparse_index(self, domain: str, collection: Any, reconcile: bool = True) -> InvertedIndex:
+        """Return the domain's sparse index, rebuilding it from Chroma if missing or outdated.
+
+        With ``reconcile`` the index is also rebuilt when its chunk count
+        differs from the collection's. Writers pass False: mid-write the two
+        legitimately differ.
+        """
+        index = get_inverted_index(Path(self.persist_path) / "sparse" / domain, self.analyzer)
+        index.ensure_built(lambda: self._iter_texts(collection), collection.count() if reconcile else None)
+        return index
+
+    def _iter_texts(self, collection: Any) -> Iterator[tuple[str, str]]:
+        step = self._max_batch_size()
+        offset = 0
+        while True:
+            page = collection.get(include=["documents"], limit=step, offset=offset)
+            yield from zip(page["ids"], page["documents"])
+            if len(page["ids"]) < step:
+                return
+            offset += step
+
+    def _max_batch_size(self) -> int:
+        """Largest batch Chroma accepts in one add/upsert call."""
+        get_max = getattr(self._client, "get_max_batch_size", None)
+        return get_max() if get_max else 5461
+
+    def query(
+        self, domain: str, query_text: str, n_results: int = 20, include_embeddings: bool = False,
+    ) -> list[RetrievedChunk]:
+        """Query a domain collection by text similarity.
+
+        Chunks keep their stored IDs and indices; with ``include_embeddings``
+        each also carries its stored vector.
+        """
+        return self.query_many(domain, [query_text], n_results, include_embeddings)[0][0]
+
+    def query_many(
+        self, domain: str, queries: list[str], n_results: int = 20, include_embeddings: bool = False,
+    ) -> tuple[list[list[RetrievedChunk]], list[RetrievedChunk]]:
+        """Query a domain collection with several texts at once.
+
+        The queries are embedded in one encoder batch and sent to Chroma as
+        one multi-embedding query. Returns the per-query results and their
+        reciprocal rank fusion.
+        """
+        if not queries:
+            return [], []
         collection = self._client.get_collection(domain)
-        query_embedding = self._embedder.encode(query_text).tolist()
+        include = ["documents", "metadatas", "distances"]
+        if include_embeddings:
+            include.append("embeddings")
         results = collection.query(
-            query_embeddings=[query_embedding],
-            n_results=n_results,
-            include=["documents", "metadatas", "distances"],
+            query_embeddings=self.embed(queries), n_results=n_results, include=include,
         )
-        chunks = []
-        for doc, meta, dist in zip(
-            results["documents"][0],
-            results["metadatas"][0],
-            results["distances"][0],
+        vectors = results["embeddings"] if include_embeddings else [None] * len(queries)
+        per_query = []
+        for ids, docs, metas, dists, embs in zip(
+            results["ids"], results["documents"], results["metadatas"], results["distances"], vectors,
         ):
-            chunk = Chunk(
-                chunk_id=meta.get("source_id", "") + ":q",
-                document_id=meta.get("source_id", ""),
-                text=doc,
-                index=0,
-                metadata=meta,
-            )
+            embs = embs if embs is not None else [None] * len(ids)
             # ChromaDB returns L2 distances; convert to similarity score
-            score = 1.0 / (1.0 + dist)
-            chunks.append(RetrievedChunk(chunk=chunk, score=score, retrieval_method="dense"))
+            per_query.append([
+                RetrievedChunk(chunk=_to_chunk(cid, doc, meta, emb), score=1.0 / (1.0 + dist), retrieval_method="dense")
+                for cid, doc, meta, dist, emb in zip(ids, docs, metas, dists, embs)
+            ])
+        fused = per_query[0] if len(per_query) == 1 else reciprocal_rank_fusion(per_query, n_results=n_results)
+        return per_query, fused
+
+    def sparse_query(self, domain: str, query_text: str, n_results: int = 20) -> list[RetrievedChunk]:
+        """Query a domain's BM25 index over every stored chunk."""
+        return self.sparse_query_many(domain, [query_text], n_results)[0]
+
+    def sparse_query_many(self, domain: str, queries: list[str], n_results: int = 20) -> list[list[RetrievedChunk]]:
+        """BM25 results for several queries: one scoring pass and one bulk chunk fetch."""
+        if not queries:
+            return []
+        collection = self._client.get_collection(domain)
+        hits = self._sparse_index(domain, collection).search_many(queries, n_results=n_results)
+        chunks = self.get_by_ids(domain, list({cid: None for found in hits for cid, _ in found}))
+        return [
+            [
+                RetrievedChunk(chunk=chunks[cid], score=score, retrieval_method="sparse")
+                for cid, score in found
+                if cid in chunks
+            ]
+            for found in hits
+        ]
+
+    def get_by_ids(self, domain: str, ids: list[str], include_embeddings: bool = False) -> dict[str, Chunk]:
+        """Bulk-fetch stored chunks by ID, e.g. to hydrate ranked IDs lazily. Missing IDs are left out."""
+        if not ids:
+            return {}
+        collection = self._client.get_collection(domain)
+        include = ["documents", "metadatas", "embeddings"] if include_embeddings else ["documents", "metadatas"]
+        step = self._max_batch_size()
+        chunks: dict[str, Chunk] = {}
+        for start in range(0, len(ids), step):
+            found = collection.get(ids=ids[start:start + step], include=include)
+            embs = found["embeddings"] if include_embeddings else [None] * len(found["ids"])
+            for cid, doc, meta, emb in zip(found["ids"], found["documents"], found["metadatas"], embs):
+                chunks[cid] = _to_chunk(cid, doc, meta, emb)
         return chunks
 
     def list_collections(self) -> list[str]:
@@ -68,3 +333,14 @@ class VectorStore:
             return self._client.get_collection(domain).count()
         except Exception:
             return 0
+
+
+def _to_chunk(chunk_id: str, text: str, meta: dict[str, Any], embedding: Any = None) -> Chunk:
+    return Chunk(
+        chunk_id=chunk_id,
+        document_id=meta.get("source_id", ""),
+        text=text,
+        index=meta.get("chunk_index", 0),
+        metadata=meta,
+        embedding=[float(x) for x in embedding] if embedding is not None else None,
+    )
@@ -0,0 +1,232 @@
+"""Process-wide pooled HTTP transport shared by all data sources."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from datetime import UTC, datetime
+from email.utils import parsedate_to_datetime
+from typing import Any
+
+import httpx
+
+from open_synthesis.config import HttpSettings
+from open_synthesis.corpus.http_cache import HttpCache, request_key
+from open_synthesis.corpus.ratelimit import RateLimit, RateLimiter
+
+logger = logging.getLogger(__name__)
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class _HostPoolTransport(httpx.AsyncBaseTransport):
+    """Routes each request to a keep-alive connection pool dedicated to its origin.
+
+    A single httpx pool caps connections globally; keeping one pool per
+    (scheme, host, port) lets the limits apply per API host instead.
+    """
+
+    def __init__(self, settings: HttpSettings) -> None:
+        self._limits = httpx.Limits(
+            max_connections=settings.max_connections_per_host,
+            max_keepalive_connections=settings.max_keepalive_per_host,
+            keepalive_expiry=settings.keepalive_expiry,
+        )
+        # HTTP/2 is negotiated via ALPN, so hosts without it fall back to 1.1.
+        self._http2 = settings.http2 and _http2_available()
+        self._pools: dict[tuple[str, str, int | None], httpx.AsyncHTTPTransport] = {}
+
+    def _pool(self, url: httpx.URL) -> httpx.AsyncHTTPTransport:
+        key = (url.scheme, url.host, url.port)
+        pool = self._pools.get(key)
+        if pool is None:
+            pool = httpx.AsyncHTTPTransport(http2=self._http2, limits=self._limits)
+            self._pools[key] = pool
+        return pool
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        return await self._pool(request.url).handle_async_request(request)
+
+    async def aclose(self) -> None:
+        pools, self._pools = list(self._pools.values()), {}
+        for pool in pools:
+            await pool.aclose()
+
+
+def _retry_after(response: httpx.Response, default: float) -> float:
+    value = response.headers.get("Retry-After")
+    if not value:
+        return default
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(UTC)).total_seconds())
+    except (TypeError, ValueError):
+        return default
+
+
+class _BorrowedTransport(httpx.AsyncBaseTransport):
+    """Per-client view of the shared pools; closing it leaves the pools open.
+
+    Requests are answered from the on-disk response cache when possible.
+    Otherwise, when the owning source declares a rate limit, each request
+    first takes a slot from the shared per-host scheduler, and 429 responses
+    are retried after the server's Retry-After instead of surfacing as lost
+    documents.
+    """
+
+    def __init__(
+        self,
+        manager: TransportManager,
+        rate_limit: RateLimit | None = None,
+        cache_ttl: float | None = None,
+    ) -> None:
+        self._manager = manager
+        self._rate_limit = rate_limit
+        self._cache_ttl = cache_ttl
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        cache = self._manager.cache
+        if cache is None or request.method not in ("GET", "POST"):
+            return await self._send(request)
+
+        key = request_key(request)
+        entry = await cache.get(key)
+        if entry is not None and (entry.fresh or cache.offline):
+            return cache.response(entry, request)
+        if cache.offline:
+            return httpx.Response(504, text="Offline mode: response not in cache", request=request)
+        cache.misses += 1
+        if entry is not None:
+            cache.add_validators(request, entry)
+
+        try:
+            response = await self._send(request)
+        except httpx.TransportError:
+            if entry is None:
+                raise
+            logger.warning("Network error for %s; serving stale cached response", request.url.host)
+            return cache.response(entry, request)
+
+        ttl = self._cache_ttl if self._cache_ttl is not None else cache.default_ttl
+        if response.status_code == 304 and entry is not None:
+            await response.aclose()
+            await cache.mark_revalidated(key, ttl)
+            return cache.response(entry, request)
+        if response.status_code == 200:
+            return await cache.store(key, request, response, ttl)
+        return response
+
+    async def _send(self, request: httpx.Request) -> httpx.Response:
+        limiter = self._manager.limiter
+        host = request.url.host
+        retries = self._manager.settings.rate_limit_retries
+        while True:
+            if self._rate_limit is not None:
+                await limiter.acquire(host, self._rate_limit)
+            response = await self._manager.shared().handle_async_request(request)
+            if response.status_code != 429 or retries <= 0:
+                return response
+            retries -= 1
+            default = 1.0 / self._rate_limit.rate if self._rate_limit else 1.0
+            delay = _retry_after(response, default)
+            await response.aclose()
+            logger.warning("429 from %s; retrying in %.1fs", host, delay)
+            if self._rate_limit is not None:
+                # The next acquire() waits out the penalty for every caller on this host.
+                limiter.backoff(host, delay)
+            else:
+                await asyncio.sleep(delay)
+
+    async def aclose(self) -> None:
+        pass
+
+
+class TransportManager:
+    """Owns the per-host connection pools that every DataSource borrows from.
+
+    Connections stay warm across ingests, so a long-running server or a paper
+    run pays the TCP/TLS handshake once per host rather than once per query.
+    """
+
+    def __init__(self, settings: HttpSettings | None = None) -> None:
+        self.settings = settings or HttpSettings()
+        self.limiter = RateLimiter()
+        self._cache: HttpCache | None = None
+        self._transport: _HostPoolTransport | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def shared(self) -> _HostPoolTransport:
+        """Return the pooled transport for the running event loop."""
+        loop = asyncio.get_running_loop()
+        if self._transport is None or self._loop is not loop:
+            # Pooled connections are bound to the loop that opened them, so a
+            # new loop (e.g. a second asyncio.run) starts from fresh pools.
+            self._transport = _HostPoolTransport(self.settings)
+            self._loop = loop
+        return self._transport
+
+    @property
+    def cache(self) -> HttpCache | None:
+        """The on-disk response cache, opened on first use (None when disabled)."""
+        if self._cache is None and self.settings.cache_enabled:
+            self._cache = HttpCache(
+                self.settings.cache_path,
+                max_bytes=self.settings.cache_max_mb * 1024 * 1024,
+                default_ttl=self.settings.cache_ttl,
+                offline=self.settings.offline,
+            )
+        return self._cache
+
+    def client(
+        self,
+        rate_limit: RateLimit | None = None,
+        cache_ttl: float | None = None,
+        **kwargs: Any,
+    ) -> httpx.AsyncClient:
+        """Create a lightweight client that sends requests through the shared pools.
+
+        Requests are paced per host according to ``rate_limit``, if given, and
+        cached responses live for ``cache_ttl`` seconds (default from settings).
+        """
+        kwargs.setdefault("timeout", self.settings.timeout)
+        return httpx.AsyncClient(transport=_BorrowedTransport(self, rate_limit, cache_ttl), **kwargs)
+
+    async def aclose(self) -> None:
+        """Close all pooled connections."""
+        transport, self._transport = self._transport, None
+        self._loop = None
+        if transport is not None:
+            await transport.aclose()
+
+
+_manager: TransportManager | None = None
+
+
+def get_transport_manager() -> TransportManager:
+    """Return the process-wide transport manager, creating it with defaults if needed."""
+    global _manager
+    if _manager is None:
+        _manager = TransportManager()
+    return _manager
+
+
+def configure_transport(settings: HttpSettings) -> TransportManager:
+    """Install HTTP settings for the process-wide transport manager.
+
+    The existing manager (and its warm pools) is kept when the settings are unchanged.
+    """
+    global _manager
+    if _manager is None or _manager.settings != settings:
+        if _manager is not None:
+            logger.debug("Reconfiguring shared HTTP transport; existing pools are dropped")
+        _manager = TransportManager(settings)
+    return _manager
@@ -0,0 +1,70 @@
+"""Text analyzer shared by the in-memory and on-disk BM25 indexes."""
+
+from __future__ import annotations
+
+import logging
+import re
+import unicodedata
+from functools import lru_cache
+
+logger = logging.getLogger(__name__)
+
+# Bump when tokenization changes so persisted indexes are rebuilt.
+ANALYZER_VERSION = 2
+
+_TOKEN = re.compile(r"\w+")
+
+STOPWORDS = frozenset("""
+a about above after again against all am an and any are as at be because been before being
+below between both but by can could did do does doing down during each few for from further
+had has have having he her here hers herself him himself his how i if in into is it its itself
+just me more most my myself no nor not now of off on once only or other our ours ourselves out
+over own same she should so some such than that the their theirs them themselves then there
+these they this those through to too under until up very was we were what when where which
+while who whom why will with would you your yours yourself yourselves
+""".split())
+
+
+def _load_stemmer():
+    try:
+        import Stemmer
+    except ImportError:
+        logger.warning("PyStemmer not installed; BM25 stemming disabled (uv sync --extra stem)")
+        return None
+    return Stemmer.Stemmer("english")
+
+
+class Analyzer:
+    """NFKC-normalize, casefold, split on word characters, drop stopwords, optionally stem.
+
+    Per-term normalization and whole-query analysis are memoized, so repeated
+    vocabulary and repeated queries cost a dictionary lookup.
+    """
+
+    def __init__(self, stopwords: bool = True, stemming: bool = False) -> None:
+        self._stopwords = STOPWORDS if stopwords else frozenset()
+        self._stemmer = _load_stemmer() if stemming else None
+        # Persisted with on-disk indexes; a mismatch triggers a rebuild.
+        self.signature = f"v{ANALYZER_VERSION}:stop={int(stopwords)}:stem={int(self._stemmer is not None)}"
+        self._term = lru_cache(maxsize=131072)(self._normalize_term)
+        self._query = lru_cache(maxsize=4096)(self._analyze)
+
+    def _normalize_term(self, token: str) -> str:
+        if token in self._stopwords:
+            return ""
+        return self._stemmer.stemWord(token) if self._stemmer is not None else token
+
+    def _analyze(self, text: str) -> tuple[str, ...]:
+        text = unicodedata.normalize("NFKC", text).casefold()
+        return tuple(term for token in _TOKEN.findall(text) if (term := self._term(token)))
+
+    def __call__(self, text: str) -> list[str]:
+        """Terms of a document."""
+        return list(self._analyze(text))
+
+    def query(self, text: str) -> tuple[str, ...]:
+        """Terms of a query, cached across calls."""
+        return self._query(text)
+
+
+DEFAULT_ANALYZER = Analyzer()
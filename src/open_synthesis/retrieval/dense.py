@@ -14,3 +14,13 @@ def dense_search(
 ) -> list[RetrievedChunk]:
     """Embed query and search ChromaDB for nearest neighbors."""
     return store.query(domain, query, n_results=n_results)
+
+
+def dense_search_many(
+    store: VectorStore,
+    domain: str,
+    queries: list[str],
+    n_results: int = 20,
+) -> list[list[RetrievedChunk]]:
+    """Embed several queries in one batch and search ChromaDB once; one list per query."""
+    return store.query_many(domain, queries, n_results=n_results)[0]
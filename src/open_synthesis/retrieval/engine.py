@@ -0,0 +1,304 @@
+"""Retrieval engine: candidate generation → fusion → reranking → post-filters.
+
+One ``Retriever`` is built from settings and shared by the CLI pipelines
+and the server, so a change in retrieval strategy happens in one place.
+Every stage is timed and its output counted; ``retrieve_traced`` returns
+the breakdown for one query and ``stats`` aggregates it across queries.
+
+``aretrieve`` is the event-loop-friendly entry point. Encoding, HNSW and
+BM25 work runs on a bounded thread pool, the candidate sources run
+concurrently, and a per-request deadline or task cancellation stops the
+remaining stages at the next stage boundary.
+
+``retrieve_many`` / ``aretrieve_many`` take several queries (e.g. a
+question and its decomposed sub-queries). Each source returns one list
+per query, using its batched ``search_many`` when it has one, and every
+list is fused together before reranking against a single query.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import NamedTuple
+
+from pydantic import BaseModel, Field
+
+from open_synthesis.config import Settings
+from open_synthesis.corpus.store import VectorStore
+from open_synthesis.retrieval.dense import dense_search, dense_search_many
+from open_synthesis.retrieval.hybrid import reciprocal_rank_fusion
+from open_synthesis.retrieval.reranker import CrossEncoderReranker
+from open_synthesis.retrieval.sparse import sparse_search, sparse_search_many
+from open_synthesis.types import RetrievedChunk
+
+logger = logging.getLogger(__name__)
+
+# (domain, query, n_results) -> candidates
+Generator = Callable[[str, str, int], list[RetrievedChunk]]
+# (domain, queries, n_results) -> candidates per query
+BatchGenerator = Callable[[str, list[str], int], list[list[RetrievedChunk]]]
+# (result lists, weights, n_results) -> fused list
+Fusion = Callable[..., list[RetrievedChunk]]
+# (query, chunks, n_results) -> reordered chunks
+Reranker = Callable[[str, list[RetrievedChunk], int], list[RetrievedChunk]]
+# (query, chunks) -> kept chunks
+PostFilter = Callable[[str, list[RetrievedChunk]], list[RetrievedChunk]]
+
+
+class RetrievalTimeout(TimeoutError):
+    """Retrieval did not finish within its deadline."""
+
+
+class _Cancelled(Exception):
+    """Raised inside a worker thread when the awaiting request has gone away."""
+
+
+class CandidateSource(NamedTuple):
+    name: str
+    search: Generator
+    weight: float = 1.0
+    search_many: BatchGenerator | None = None
+
+    def run(self, domain: str, queries: list[str], n: int) -> list[list[RetrievedChunk]]:
+        """Candidates for each query, batched when the source supports it."""
+        if len(queries) > 1 and self.search_many is not None:
+            return self.search_many(domain, queries, n)
+        return [self.search(domain, q, n) for q in queries]
+
+
+class StageTiming(BaseModel):
+    stage: str
+    seconds: float
+    candidates: int
+
+
+class RetrievalTrace(BaseModel):
+    """Per-stage wall time and output size for one query."""
+
+    query: str
+    domain: str
+    stages: list[StageTiming] = Field(default_factory=list)
+
+    @property
+    def total_seconds(self) -> float:
+        return sum(s.seconds for s in self.stages)
+
+
+class Retriever:
+    """Chains candidate sources, fusion, rerankers and post-filters."""
+
+    def __init__(
+        self,
+        sources: list[CandidateSource],
+        fusion: Fusion = reciprocal_rank_fusion,
+        rerankers: list[tuple[str, Reranker]] | None = None,
+        filters: list[tuple[str, PostFilter]] | None = None,
+        n_results: int = 20,
+        workers: int = 4,
+        timeout: float | None = None,
+        fusion_depth: int = 0,
+    ) -> None:
+        self.sources = sources
+        self.fusion = fusion
+        self.rerankers = rerankers or []
+        self.filters = filters or []
+        self.n_results = n_results
+        self.timeout = timeout
+        self.fusion_depth = fusion_depth  # fused candidates handed to the rerankers
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="retrieval")
+        self._lock = threading.Lock()
+        self._stats: dict[str, list[float]] = {}  # stage -> [calls, seconds, candidates]
+
+    @classmethod
+    def from_settings(cls, settings: Settings, store: VectorStore) -> Retriever:
+        """Dense + BM25 candidates, weighted RRF, then the cross-encoder."""
+        r = settings.retrieval
+        rerankers: list[tuple[str, Reranker]] = []
+        if settings.rerank.enabled:
+            rerankers.append(("rerank", CrossEncoderReranker.from_settings(settings)))
+        return cls(
+            sources=[
+                CandidateSource(
+                    "dense", partial(dense_search, store), r.dense_weight, partial(dense_search_many, store),
+                ),
+                CandidateSource(
+                    "sparse", partial(sparse_search, store), r.sparse_weight, partial(sparse_search_many, store),
+                ),
+            ],
+            rerankers=rerankers,
+            n_results=r.n_results,
+            workers=r.workers,
+            timeout=r.timeout,
+            fusion_depth=settings.rerank.max_candidates,
+        )
+
+    def retrieve(self, query: str, domain: str, n_results: int | None = None) -> list[RetrievedChunk]:
+        return self.retrieve_traced(query, domain, n_results)[0]
+
+    def retrieve_traced(
+        self, query: str, domain: str, n_results: int | None = None,
+    ) -> tuple[list[RetrievedChunk], RetrievalTrace]:
+        """Run every stage and return the results with their timing trace."""
+        return self._retrieve([query], query, domain, n_results)
+
+    def retrieve_many(
+        self,
+        queries: list[str],
+        domain: str,
+        n_results: int | None = None,
+        rank_query: str | None = None,
+    ) -> list[RetrievedChunk]:
+        """Fused results for several queries, reranked against ``rank_query`` (default: the first)."""
+        return self._retrieve(queries, rank_query or queries[0], domain, n_results)[0]
+
+    def _retrieve(
+        self, queries: list[str], rank_query: str, domain: str, n_results: int | None,
+    ) -> tuple[list[RetrievedChunk], RetrievalTrace]:
+        n = n_results or self.n_results
+        trace = RetrievalTrace(query=" | ".join(queries), domain=domain)
+        per_source = [
+            self._timed(trace, None, src.name, src.run, domain, queries, n) for src in self.sources
+        ]
+        chunks = self._rank(rank_query, per_source, n, trace, None)
+        _log_trace(trace)
+        return chunks, trace
+
+    async def aretrieve(
+        self, query: str, domain: str, n_results: int | None = None, timeout: float | None = None,
+    ) -> list[RetrievedChunk]:
+        return (await self.aretrieve_traced(query, domain, n_results, timeout))[0]
+
+    async def aretrieve_traced(
+        self, query: str, domain: str, n_results: int | None = None, timeout: float | None = None,
+    ) -> tuple[list[RetrievedChunk], RetrievalTrace]:
+        """Async ``retrieve_traced`` that never blocks the event loop.
+
+        Raises RetrievalTimeout when ``timeout`` (default: the retriever's)
+        elapses. On timeout or cancellation, stages not yet started are skipped.
+        """
+        return await self._aretrieve([query], query, domain, n_results, timeout)
+
+    async def aretrieve_many(
+        self,
+        queries: list[str],
+        domain: str,
+        n_results: int | None = None,
+        rank_query: str | None = None,
+        timeout: float | None = None,
+    ) -> list[RetrievedChunk]:
+        """Async ``retrieve_many``."""
+        return (await self._aretrieve(queries, rank_query or queries[0], domain, n_results, timeout))[0]
+
+    async def _aretrieve(
+        self,
+        queries: list[str],
+        rank_query: str,
+        domain: str,
+        n_results: int | None,
+        timeout: float | None,
+    ) -> tuple[list[RetrievedChunk], RetrievalTrace]:
+        n = n_results or self.n_results
+        timeout = self.timeout if timeout is None else timeout
+        trace = RetrievalTrace(query=" | ".join(queries), domain=domain)
+        cancel = threading.Event()
+        loop = asyncio.get_running_loop()
+
+        def run(fn: Callable, *args: object) -> asyncio.Future:
+            return loop.run_in_executor(self._executor, partial(fn, *args))
+
+        try:
+            async with asyncio.timeout(timeout):
+                per_source = await asyncio.gather(*(
+                    run(self._timed, trace, cancel, src.name, src.run, domain, queries, n)
+                    for src in self.sources
+                ))
+                chunks = await run(self._rank, rank_query, list(per_source), n, trace, cancel)
+        except TimeoutError as exc:
+            raise RetrievalTimeout(f"Retrieval exceeded {timeout:.1f}s for domain '{domain}'") from exc
+        finally:
+            cancel.set()
+        _log_trace(trace)
+        return chunks, trace
+
+    def _rank(
+        self,
+        query: str,
+        per_source: list[list[list[RetrievedChunk]]],
+        n: int,
+        trace: RetrievalTrace,
+        cancel: threading.Event | None,
+    ) -> list[RetrievedChunk]:
+        """Fusion of every source's per-query lists, then rerankers and post-filters."""
+        lists: list[list[RetrievedChunk]] = []
+        weights: list[float] = []
+        for src, results in zip(self.sources, per_source):
+            lists.extend(results)
+            weights.extend([src.weight] * len(results))
+        depth = max(n, self.fusion_depth) if self.rerankers else n
+        chunks = self._timed(trace, cancel, "fusion", self.fusion, lists, weights=weights, n_results=depth)
+        for name, reranker in self.rerankers:
+            chunks = self._timed(trace, cancel, name, reranker, query, chunks, n)
+        for name, keep in self.filters:
+            chunks = self._timed(trace, cancel, name, keep, query, chunks)
+        return chunks
+
+    def _timed(
+        self,
+        trace: RetrievalTrace,
+        cancel: threading.Event | None,
+        stage: str,
+        fn: Callable,
+        *args,
+        **kwargs,
+    ) -> list:
+        if cancel is not None and cancel.is_set():
+            raise _Cancelled(stage)
+        start = time.perf_counter()
+        result = fn(*args, **kwargs)
+        elapsed = time.perf_counter() - start
+        # Candidate sources return one list per query.
+        count = sum(map(len, result)) if result and isinstance(result[0], list) else len(result)
+        trace.stages.append(StageTiming(stage=stage, seconds=elapsed, candidates=count))
+        with self._lock:
+            totals = self._stats.setdefault(stage, [0, 0.0, 0])
+            totals[0] += 1
+            totals[1] += elapsed
+            totals[2] += count
+        return result
+
+    def stats(self) -> dict[str, dict[str, float]]:
+        """Mean wall time and output size per stage across all queries so far."""
+        with self._lock:
+            return {
+                stage: {
+                    "calls": int(calls),
+                    "mean_ms": round(seconds / calls * 1000, 2),
+                    "mean_candidates": round(candidates / calls, 1),
+                }
+                for stage, (calls, seconds, candidates) in self._stats.items()
+            }
+
+    def warm_up(self) -> None:
+        """Load reranker models before serving, so no request's deadline pays for them."""
+        for _, reranker in self.rerankers:
+            warm_up = getattr(reranker, "warm_up", None)
+            if warm_up is not None:
+                warm_up()
+
+    def close(self) -> None:
+        """Stop the worker pool; queued retrieval work is dropped."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _log_trace(trace: RetrievalTrace) -> None:
+    logger.debug(
+        "Retrieval for %r in %.1f ms: %s",
+        trace.query, trace.total_seconds * 1000,
+        ", ".join(f"{s.stage}={s.seconds * 1000:.1f}ms/{s.candidates}" for s in trace.stages),
+    )
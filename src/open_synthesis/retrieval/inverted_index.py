@@ -0,0 +1,407 @@
+"""Persistent per-domain BM25 inverted index with incremental updates.
+
+The index lives next to the Chroma collection as a set of immutable
+segments, one per write batch, plus a JSON manifest. Each segment stores
+its term dictionary, posting lists, term frequencies and document lengths
+as ``.npy`` files. Posting lists are memory-mapped, so a query reads only
+the postings of its own terms. Deletes are recorded as per-segment
+tombstones. Small segments are merged as they accumulate, and the merge
+drops tombstoned documents.
+
+Document frequencies count tombstoned documents until their segment is
+merged, the same approximation Lucene makes. The index is kept in step
+with the collection by ``VectorStore.write`` and ``VectorStore.delete``.
+It is rebuilt from the collection when it is missing, was built by a
+different analyzer, or holds a different number of chunks than the
+collection (e.g. after a write that died between Chroma and the index).
+
+Several processes (``serve``, a CLI ``ingest``) may share one index.
+Segment names are unique, every update holds an exclusive lock file and
+first re-reads the manifest, and segment or temporary directories no
+manifest references are removed under that lock.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import threading
+import uuid
+from collections import Counter
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+
+from open_synthesis.retrieval.analyzer import DEFAULT_ANALYZER, Analyzer
+
+try:
+    import fcntl
+except ImportError:  # Windows: updates are only serialized within one process
+    fcntl = None
+
+
+def bm25_idf(n_docs: int | np.ndarray, df: int | np.ndarray) -> float | np.ndarray:
+    """BM25 inverse document frequency (the non-negative Lucene variant)."""
+    return np.log((n_docs - df + 0.5) / (df + 0.5) + 1.0)
+
+
+class _Segment:
+    """One immutable batch of indexed documents."""
+
+    def __init__(self, path: Path, deleted: Iterable[int] = ()) -> None:
+        self.path = path
+        self.name = path.name
+        self.ids: list[str] = json.loads((path / "ids.json").read_text())
+        self.term_list: list[str] = json.loads((path / "terms.json").read_text())
+        self.terms = {t: i for i, t in enumerate(self.term_list)}
+        self.offsets = np.load(path / "offsets.npy", mmap_mode="r")
+        self.postings = np.load(path / "postings.npy", mmap_mode="r")
+        self.tfs = np.load(path / "tfs.npy", mmap_mode="r")
+        self.doc_len = np.load(path / "doc_len.npy")
+        self.deleted = np.zeros(len(self.ids), dtype=bool)
+        self.deleted[list(deleted)] = True
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def live(self) -> int:
+        return len(self.ids) - int(self.deleted.sum())
+
+    def df(self, term: str) -> int:
+        i = self.terms.get(term)
+        return 0 if i is None else int(self.offsets[i + 1] - self.offsets[i])
+
+    def postings_for(self, term: str) -> tuple[np.ndarray, np.ndarray] | None:
+        i = self.terms.get(term)
+        if i is None:
+            return None
+        start, end = int(self.offsets[i]), int(self.offsets[i + 1])
+        return self.postings[start:end], self.tfs[start:end]
+
+    @staticmethod
+    def write(
+        path: Path,
+        ids: list[str],
+        terms: list[str],
+        term_ids: np.ndarray,
+        docs: np.ndarray,
+        tfs: np.ndarray,
+        doc_len: np.ndarray,
+    ) -> None:
+        """Write a segment from (term, doc, tf) triples. The directory appears atomically."""
+        order = np.lexsort((docs, term_ids))
+        counts = np.bincount(term_ids, minlength=len(terms))
+        offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+
+        tmp = path.with_name(path.name + ".tmp")
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir(parents=True)
+        (tmp / "ids.json").write_text(json.dumps(ids))
+        (tmp / "terms.json").write_text(json.dumps(terms))
+        np.save(tmp / "offsets.npy", offsets)
+        np.save(tmp / "postings.npy", docs[order].astype(np.int32))
+        np.save(tmp / "tfs.npy", tfs[order].astype(np.float32))
+        np.save(tmp / "doc_len.npy", doc_len.astype(np.float32))
+        os.replace(tmp, path)
+
+
+class InvertedIndex:
+    """On-disk BM25 index over one domain's chunks."""
+
+    def __init__(
+        self,
+        path: str | Path,
+        analyzer: Analyzer = DEFAULT_ANALYZER,
+        k1: float = 1.5,
+        b: float = 0.75,
+        max_segments: int = 8,
+    ) -> None:
+        self.path = Path(path)
+        self.analyzer = analyzer
+        self.k1 = k1
+        self.b = b
+        self.max_segments = max_segments
+        self._lock = threading.RLock()
+        self._segments: list[_Segment] = []
+        self._live: dict[str, tuple[_Segment, int]] = {}
+        self._built_with: str | None = None
+        self._stamp: tuple[int, ...] | None = None  # manifest file identity last loaded
+        with self._lock, self._file_lock():
+            self._refresh()
+            self._remove_orphans()
+
+    # -- persistence ---------------------------------------------------------
+
+    @property
+    def _manifest_path(self) -> Path:
+        return self.path / "manifest.json"
+
+    @contextmanager
+    def _file_lock(self) -> Iterator[None]:
+        """Exclusive lock shared with other processes using this index."""
+        self.path.mkdir(parents=True, exist_ok=True)
+        with open(self.path / ".lock", "a") as handle:
+            if fcntl is not None:
+                fcntl.flock(handle, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(handle, fcntl.LOCK_UN)
+
+    def _refresh(self) -> None:
+        """Reload the manifest if another writer replaced it since we last read it."""
+        try:
+            st = self._manifest_path.stat()
+        except FileNotFoundError:
+            return
+        stamp = (st.st_ino, st.st_mtime_ns, st.st_size)
+        if stamp == self._stamp:
+            return
+        manifest = json.loads(self._manifest_path.read_text())
+        self._built_with = manifest["analyzer"]
+        self._segments = [
+            _Segment(self.path / s["name"], s["deleted"]) for s in manifest["segments"]
+        ]
+        self._live = {}
+        for seg in self._segments:
+            for ordinal, cid in enumerate(seg.ids):
+                if not seg.deleted[ordinal]:
+                    self._live[cid] = (seg, ordinal)
+        self._stamp = stamp
+
+    def _save(self) -> None:
+        manifest = {
+            "analyzer": self.analyzer.signature,
+            "segments": [
+                {"name": s.name, "deleted": np.flatnonzero(s.deleted).tolist()}
+                for s in self._segments
+            ],
+        }
+        self.path.mkdir(parents=True, exist_ok=True)
+        tmp = self._manifest_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(manifest))
+        os.replace(tmp, self._manifest_path)
+        st = self._manifest_path.stat()
+        self._stamp = (st.st_ino, st.st_mtime_ns, st.st_size)
+        self._built_with = self.analyzer.signature
+        self._remove_orphans()
+
+    def _remove_orphans(self) -> None:
+        """Delete segment and temp directories the manifest does not reference.
+
+        These are merged-away segments, or ones left by a writer that died
+        before saving its manifest. Call under the file lock.
+        """
+        if not self.path.exists():
+            return
+        keep = {s.name for s in self._segments}
+        for child in self.path.iterdir():
+            if child.is_dir() and child.name not in keep:
+                shutil.rmtree(child, ignore_errors=True)
+
+    @property
+    def needs_rebuild(self) -> bool:
+        """True when the index is missing or was built with a different analyzer."""
+        return self._built_with != self.analyzer.signature
+
+    def _new_segment_path(self) -> Path:
+        return self.path / f"seg-{uuid.uuid4().hex}"
+
+    # -- updates -------------------------------------------------------------
+
+    def add(self, docs: Iterable[tuple[str, str]]) -> int:
+        """Index (chunk_id, text) pairs as a new segment. Returns count added.
+
+        Chunk IDs are content-addressed, so IDs already indexed are skipped.
+        """
+        with self._lock, self._file_lock():
+            self._refresh()
+            return self._add(docs)
+
+    def _add(self, docs: Iterable[tuple[str, str]]) -> int:
+        ids: list[str] = []
+        seen: set[str] = set()
+        vocab: dict[str, int] = {}
+        term_ids: list[int] = []
+        doc_ids: list[int] = []
+        tfs: list[int] = []
+        doc_len: list[int] = []
+        for cid, text in docs:
+            if cid in self._live or cid in seen:
+                continue
+            seen.add(cid)
+            tokens = self.analyzer(text)
+            ordinal = len(ids)
+            ids.append(cid)
+            doc_len.append(len(tokens))
+            for term, tf in Counter(tokens).items():
+                term_ids.append(vocab.setdefault(term, len(vocab)))
+                doc_ids.append(ordinal)
+                tfs.append(tf)
+        if not ids:
+            if self.needs_rebuild:
+                self._save()
+            return 0
+
+        path = self._new_segment_path()
+        _Segment.write(
+            path, ids, list(vocab),
+            np.array(term_ids, dtype=np.int64), np.array(doc_ids, dtype=np.int64),
+            np.array(tfs), np.array(doc_len),
+        )
+        seg = _Segment(path)
+        self._segments.append(seg)
+        for ordinal, cid in enumerate(ids):
+            self._live[cid] = (seg, ordinal)
+        if len(self._segments) > self.max_segments:
+            self._merge_smallest()
+        self._save()
+        return len(ids)
+
+    def delete(self, ids: Iterable[str]) -> None:
+        """Tombstone chunks by ID."""
+        with self._lock, self._file_lock():
+            self._refresh()
+            changed = False
+            for cid in ids:
+                loc = self._live.pop(cid, None)
+                if loc is not None:
+                    seg, ordinal = loc
+                    seg.deleted[ordinal] = True
+                    changed = True
+            if changed:
+                self._segments = [s for s in self._segments if s.live]
+                self._save()
+
+    def ensure_built(self, load: Callable[[], Iterable[tuple[str, str]]], expected: int | None = None) -> None:
+        """Pick up other writers' changes, then rebuild from ``load()`` if needed.
+
+        The index is rebuilt when it is missing, was built by another
+        analyzer, or does not hold ``expected`` chunks.
+        """
+        with self._lock, self._file_lock():
+            self._refresh()
+            if self.needs_rebuild or (expected is not None and len(self._live) != expected):
+                self._rebuild(load())
+
+    def rebuild(self, docs: Iterable[tuple[str, str]]) -> int:
+        """Drop every segment and index ``docs`` from scratch."""
+        with self._lock, self._file_lock():
+            return self._rebuild(docs)
+
+    def _rebuild(self, docs: Iterable[tuple[str, str]]) -> int:
+        self._segments = []
+        self._live = {}
+        self._built_with = None
+        added = self._add(docs)
+        self._save()
+        return added
+
+    def _merge_smallest(self) -> None:
+        """Merge the smaller half of the segments (and their tombstones) into one."""
+        by_size = sorted(self._segments, key=lambda s: s.live)
+        merging = by_size[:max(2, len(by_size) // 2)]
+        vocab: dict[str, int] = {}
+        ids: list[str] = []
+        term_parts, doc_parts, tf_parts, len_parts = [], [], [], []
+        for seg in merging:
+            live = ~seg.deleted
+            remap = np.cumsum(live) - 1 + len(ids)
+            gids = np.array([vocab.setdefault(t, len(vocab)) for t in seg.term_list], dtype=np.int64)
+            postings = np.asarray(seg.postings)
+            keep = live[postings]
+            term_parts.append(np.repeat(gids, np.diff(seg.offsets))[keep])
+            doc_parts.append(remap[postings[keep]])
+            tf_parts.append(np.asarray(seg.tfs)[keep])
+            len_parts.append(seg.doc_len[live])
+            ids.extend(cid for cid, alive in zip(seg.ids, live) if alive)
+
+        path = self._new_segment_path()
+        _Segment.write(
+            path, ids, list(vocab),
+            np.concatenate(term_parts), np.concatenate(doc_parts),
+            np.concatenate(tf_parts), np.concatenate(len_parts),
+        )
+        merged = _Segment(path)
+        names = {s.name for s in merging}
+        self._segments = [s for s in self._segments if s.name not in names] + [merged]
+        for ordinal, cid in enumerate(ids):
+            self._live[cid] = (merged, ordinal)
+
+    # -- queries -------------------------------------------------------------
+
+    def __len__(self) -> int:
+        return len(self._live)
+
+    def __contains__(self, chunk_id: str) -> bool:
+        return chunk_id in self._live
+
+    def search(self, query: str, n_results: int = 20) -> list[tuple[str, float]]:
+        """Return the top (chunk_id, BM25 score) pairs for a query, best first."""
+        return self.search_many([query], n_results)[0]
+
+    def search_many(self, queries: list[str], n_results: int = 20) -> list[list[tuple[str, float]]]:
+        """Score a batch of queries in one pass over the postings; one result list per query.
+
+        Each distinct term's posting list is read and its BM25 term weights
+        computed once, then added to every query that uses it as a
+        (documents × queries) outer product.
+        """
+        results: list[list[tuple[str, float]]] = [[] for _ in queries]
+        with self._lock:
+            n_docs = len(self._live)
+            if not n_docs or not queries:
+                return results
+            total_len = sum(float(s.doc_len[~s.deleted].sum()) for s in self._segments)
+            avgdl = total_len / n_docs or 1.0
+
+            # term -> per-query weight (query tf × idf)
+            weights: dict[str, np.ndarray] = {}
+            for j, query in enumerate(queries):
+                for term, qtf in Counter(self.analyzer.query(query)).items():
+                    if term not in weights:
+                        weights[term] = np.zeros(len(queries), dtype=np.float32)
+                    weights[term][j] = qtf
+            for term in list(weights):
+                df = sum(s.df(term) for s in self._segments)
+                if df:
+                    weights[term] *= float(bm25_idf(n_docs, df))
+                else:
+                    del weights[term]
+            if not weights:
+                return results
+
+            candidates: list[list[tuple[str, float]]] = [[] for _ in queries]
+            for seg in self._segments:
+                scores = np.zeros((len(seg), len(queries)), dtype=np.float32)
+                norm = self.k1 * (1.0 - self.b + self.b * seg.doc_len / avgdl)
+                for term, weight in weights.items():
+                    hit = seg.postings_for(term)
+                    if hit is None:
+                        continue
+                    docs, tf = hit
+                    # Posting lists hold each document once, so fancy-index += is safe.
+                    scores[docs] += np.outer(tf * (self.k1 + 1.0) / (tf + norm[docs]), weight)
+                scores[seg.deleted] = 0.0
+                for j in range(len(queries)):
+                    top = top_k(scores[:, j], n_results)
+                    candidates[j].extend((seg.ids[i], float(scores[i, j])) for i in top)
+
+        for j, found in enumerate(candidates):
+            found.sort(key=lambda x: x[1], reverse=True)
+            results[j] = found[:n_results]
+        return results
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest positive scores, unordered."""
+    hits = np.flatnonzero(scores > 0)
+    if len(hits) > k:
+        hits = hits[np.argpartition(scores[hits], -k)[-k:]]
+    return hits
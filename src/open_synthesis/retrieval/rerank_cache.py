@@ -0,0 +1,65 @@
+"""Persistent cross-encoder score cache keyed by query and chunk."""
+
+from __future__ import annotations
+
+import hashlib
+import struct
+from pathlib import Path
+
+from open_synthesis.cache import DiskCache
+
+
+class RerankCache:
+    """Relevance scores keyed by (reranker model, sha256 of query, chunk id).
+
+    A repeated query, or the next page of one, rescoring chunks it has
+    already seen reads their scores instead of running the model.
+    """
+
+    def __init__(self, path: str | Path, model: str, max_bytes: int, ttl: float | None) -> None:
+        self._store = DiskCache(Path(path) / "scores.sqlite", max_bytes)
+        self.model = model
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, query_hash: str, chunk_id: str) -> str:
+        return f"{self.model}:{query_hash}:{chunk_id}"
+
+    @staticmethod
+    def query_hash(query: str) -> str:
+        return hashlib.sha256(query.encode()).hexdigest()
+
+    def get_many(self, query: str, chunk_ids: list[str]) -> dict[str, float]:
+        """Fresh cached scores by chunk id."""
+        qh = self.query_hash(query)
+        keys = {self._key(qh, cid): cid for cid in chunk_ids}
+        entries = self._store.get_many(keys)
+        found = {
+            keys[k]: struct.unpack("<f", entry.value)[0]
+            for k, entry in entries.items()
+            if entry.fresh
+        }
+        self.hits += len(found)
+        self.misses += len(chunk_ids) - len(found)
+        return found
+
+    def put_many(self, query: str, scores: dict[str, float]) -> None:
+        qh = self.query_hash(query)
+        self._store.put_many(
+            ((self._key(qh, cid), struct.pack("<f", score)) for cid, score in scores.items()),
+            ttl=self.ttl,
+        )
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self) -> dict[str, float]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hit_rate, 3),
+            "bytes": self._store.size_bytes,
+        }
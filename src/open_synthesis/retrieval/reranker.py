@@ -1,19 +1,149 @@
-"""Cross-encoder reranker placeholder."""
+"""Cross-encoder reranking of fused candidates on CPU.
+
+``CrossEncoderReranker`` scores (query, chunk) pairs for the top
+``max_candidates`` fused chunks, best fused rank first, in batches of
+``batch_size``. Each pair is truncated to the model's ``max_length``
+tokens. Once at least ``n_results`` candidates are scored, scoring stops
+when the top ``n_results`` set survives ``early_stop_batches``
+consecutive batches unchanged: candidates further down the fused list
+rarely displace it. With the defaults (batches of 8, top 20 of 50) the
+earliest stop is after 32 candidates; the saving grows with
+``max_candidates``.
+
+Scores are cached by (query hash, chunk id), so a repeated query or the
+next page of one only scores chunks it has not seen. The ``onnx``
+backend with an int8-quantized export is roughly three times faster on
+CPU; it needs the ``onnx`` extra and falls back to torch without it.
+If the model cannot be loaded at all, reranking is a passthrough.
+"""
 
 from __future__ import annotations
 
+import heapq
+import logging
+import threading
+from typing import Any
+
+from open_synthesis.config import Settings
+from open_synthesis.corpus.registry import get_cross_encoder, get_rerank_cache
+from open_synthesis.retrieval.rerank_cache import RerankCache
 from open_synthesis.types import RetrievedChunk
 
+logger = logging.getLogger(__name__)
+
+# Characters kept per token of max_length; trims long chunks before tokenizing.
+_CHARS_PER_TOKEN = 8
+
+
+class CrossEncoderReranker:
+    """Reorders chunks by cross-encoder relevance to the query."""
+
+    def __init__(
+        self,
+        model: str,
+        max_length: int = 256,
+        batch_size: int = 8,
+        max_candidates: int = 50,
+        early_stop_batches: int = 1,
+        backend: str = "torch",
+        onnx_file: str = "",
+        cache: RerankCache | None = None,
+        encoder: Any = None,
+    ) -> None:
+        self.model = model
+        self.max_length = max_length
+        self.batch_size = batch_size
+        self.max_candidates = max_candidates
+        self.early_stop_batches = early_stop_batches
+        self.backend = backend
+        self.onnx_file = onnx_file
+        self.cache = cache
+        self._encoder = encoder
+        self._loaded = encoder is not None
+        self._lock = threading.Lock()
+        self.scored = 0
+        self.skipped = 0
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> CrossEncoderReranker:
+        r = settings.rerank
+        cache = (
+            get_rerank_cache(r.cache_path, r.model, r.cache_max_mb * 1024 * 1024, r.cache_ttl)
+            if r.cache_enabled else None
+        )
+        return cls(
+            r.model,
+            max_length=r.max_length,
+            batch_size=r.batch_size,
+            max_candidates=r.max_candidates,
+            early_stop_batches=r.early_stop_batches,
+            backend=r.backend,
+            onnx_file=r.onnx_file,
+            cache=cache,
+        )
+
+    @property
+    def encoder(self) -> Any:
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    self._encoder = self._load()
+                    self._loaded = True
+        return self._encoder
+
+    def warm_up(self) -> None:
+        """Load (and if needed download) the model ahead of the first query."""
+        self.encoder
+
+    def _load(self) -> Any:
+        if self.backend != "torch":
+            try:
+                return get_cross_encoder(self.model, self.max_length, self.backend, self.onnx_file)
+            except Exception as exc:
+                logger.warning(
+                    "Cross-encoder %s backend unavailable (%s); using torch (uv sync --extra onnx)",
+                    self.backend, exc,
+                )
+        try:
+            return get_cross_encoder(self.model, self.max_length)
+        except Exception as exc:
+            logger.warning("Cross-encoder %s unavailable (%s); reranking disabled", self.model, exc)
+            return None
+
+    def __call__(self, query: str, chunks: list[RetrievedChunk], n_results: int) -> list[RetrievedChunk]:
+        encoder = self.encoder
+        if encoder is None or not chunks:
+            return chunks[:n_results]
+        candidates = {rc.chunk.chunk_id: rc for rc in chunks[:self.max_candidates]}
+        scores = self.cache.get_many(query, list(candidates)) if self.cache is not None else {}
+        pending = [cid for cid in candidates if cid not in scores]
+
+        fresh: dict[str, float] = {}
+        top: set[str] = set()
+        stable = 0
+        for start in range(0, len(pending), self.batch_size):
+            batch = pending[start:start + self.batch_size]
+            limit = self.max_length * _CHARS_PER_TOKEN
+            pairs = [(query, candidates[cid].chunk.text[:limit]) for cid in batch]
+            values = encoder.predict(pairs, batch_size=self.batch_size, show_progress_bar=False)
+            fresh.update(zip(batch, map(float, values)))
+            scores.update(fresh)
+
+            current = set(heapq.nlargest(n_results, scores, key=scores.__getitem__))
+            stable = stable + 1 if current == top else 0
+            top = current
+            if self.early_stop_batches and stable >= self.early_stop_batches:
+                break
 
-def rerank(
-    query: str,
-    chunks: list[RetrievedChunk],
-    n_results: int = 20,
-) -> list[RetrievedChunk]:
-    """Rerank chunks using a cross-encoder model.
+        if self.cache is not None and fresh:
+            self.cache.put_many(query, fresh)
+        self.scored += len(fresh)
+        self.skipped += len(pending) - len(fresh)
+        ranked = sorted(scores, key=scores.__getitem__, reverse=True)[:n_results]
+        return [candidates[cid].model_copy(update={"score": scores[cid]}) for cid in ranked]
 
-    Currently a passthrough — returns chunks in their existing order,
-    truncated to n_results. Replace with a cross-encoder (e.g.
-    cross-encoder/ms-marco-MiniLM-L-6-v2) for production use.
-    """
-    return chunks[:n_results]
+    def stats(self) -> dict[str, Any]:
+        stats: dict[str, Any] = {"scored": self.scored, "skipped": self.skipped}
+        if self.cache is not None:
+            stats["cache"] = self.cache.stats()
+        return stats
@@ -2,31 +2,120 @@
 
 from __future__ import annotations
 
-from rank_bm25 import BM25Okapi
+from collections import Counter
 
+import numpy as np
+from scipy import sparse
+
+from open_synthesis.corpus.store import VectorStore
+from open_synthesis.retrieval.analyzer import DEFAULT_ANALYZER, Analyzer
+from open_synthesis.retrieval.inverted_index import bm25_idf, top_k
 from open_synthesis.types import Chunk, RetrievedChunk
 
 
+def sparse_search(
+    store: VectorStore,
+    domain: str,
+    query: str,
+    n_results: int = 20,
+) -> list[RetrievedChunk]:
+    """Search the domain's persistent BM25 index over every stored chunk."""
+    return store.sparse_query(domain, query, n_results=n_results)
+
+
+def sparse_search_many(
+    store: VectorStore,
+    domain: str,
+    queries: list[str],
+    n_results: int = 20,
+) -> list[list[RetrievedChunk]]:
+    """Score several queries against the domain's BM25 index in one pass; one list per query."""
+    return store.sparse_query_many(domain, queries, n_results=n_results)
+
+
 class BM25Index:
-    """In-memory BM25 index over chunk texts."""
+    """In-memory BM25 index over chunk texts.
 
-    def __init__(self, chunks: list[Chunk]) -> None:
+    Per-(chunk, term) BM25 weights are precomputed into a sparse matrix,
+    so scoring a query is one sparse matrix-vector product and scoring a
+    batch of queries is one sparse matrix-matrix product.
+    """
+
+    def __init__(
+        self,
+        chunks: list[Chunk],
+        analyzer: Analyzer = DEFAULT_ANALYZER,
+        k1: float = 1.5,
+        b: float = 0.75,
+    ) -> None:
         self._chunks = chunks
-        tokenized = [c.text.lower().split() for c in chunks]
-        self._bm25 = BM25Okapi(tokenized)
+        self.analyzer = analyzer
+        self._vocab: dict[str, int] = {}
+        rows: list[int] = []
+        cols: list[int] = []
+        tfs: list[int] = []
+        doc_len = np.zeros(len(chunks), dtype=np.float32)
+        for i, chunk in enumerate(chunks):
+            terms = analyzer(chunk.text)
+            doc_len[i] = len(terms)
+            for term, tf in Counter(terms).items():
+                rows.append(i)
+                cols.append(self._vocab.setdefault(term, len(self._vocab)))
+                tfs.append(tf)
 
-    def search(self, query: str, n_results: int = 20) -> list[RetrievedChunk]:
-        tokenized_query = query.lower().split()
-        scores = self._bm25.get_scores(tokenized_query)
+        rows_a = np.array(rows, dtype=np.int64)
+        cols_a = np.array(cols, dtype=np.int64)
+        tf_a = np.array(tfs, dtype=np.float32)
+        df = np.bincount(cols_a, minlength=len(self._vocab))
+        idf = bm25_idf(len(chunks), df).astype(np.float32)
+        avgdl = float(doc_len.mean()) if len(chunks) and doc_len.any() else 1.0
+        norm = k1 * (1.0 - b + b * doc_len / avgdl)
+        weights = idf[cols_a] * tf_a * (k1 + 1.0) / (tf_a + norm[rows_a])
+        # Column-major, so a query touches only the postings of its own terms.
+        self._matrix = sparse.csc_matrix(
+            (weights, (rows_a, cols_a)), shape=(len(chunks), len(self._vocab)), dtype=np.float32,
+        )
 
-        scored_pairs = sorted(
-            zip(scores, self._chunks),
-            key=lambda x: x[0],
-            reverse=True,
-        )[:n_results]
+    def _query_matrix(self, queries: list[str]) -> sparse.csc_matrix:
+        """Term-count columns, one per query, over the index vocabulary."""
+        rows: list[int] = []
+        cols: list[int] = []
+        counts: list[int] = []
+        for j, query in enumerate(queries):
+            for term, qtf in Counter(self.analyzer.query(query)).items():
+                col = self._vocab.get(term)
+                if col is not None:
+                    rows.append(col)
+                    cols.append(j)
+                    counts.append(qtf)
+        return sparse.csc_matrix(
+            (np.array(counts, dtype=np.float32), (rows, cols)),
+            shape=(len(self._vocab), len(queries)),
+        )
 
+    def _top(self, scores: np.ndarray, n_results: int) -> list[RetrievedChunk]:
+        top = top_k(scores, n_results)
+        top = top[np.argsort(-scores[top], kind="stable")]
         return [
-            RetrievedChunk(chunk=chunk, score=float(score), retrieval_method="sparse")
-            for score, chunk in scored_pairs
-            if score > 0
+            RetrievedChunk(chunk=self._chunks[i], score=float(scores[i]), retrieval_method="sparse")
+            for i in top
         ]
+
+    def search(self, query: str, n_results: int = 20) -> list[RetrievedChunk]:
+        if not self._chunks:
+            return []
+        terms = Counter(t for t in self.analyzer.query(query) if t in self._vocab)
+        if not terms:
+            return []
+        cols = [self._vocab[t] for t in terms]
+        scores = self._matrix[:, cols] @ np.fromiter(terms.values(), dtype=np.float32, count=len(cols))
+        return self._top(np.asarray(scores).ravel(), n_results)
+
+    def search_many(self, queries: list[str], n_results: int = 20) -> list[list[RetrievedChunk]]:
+        """Score a batch of queries in one pass; returns one result list per query."""
+        if not queries:
+            return []
+        if not self._chunks:
+            return [[] for _ in queries]
+        scores = (self._matrix @ self._query_matrix(queries)).toarray()
+        return [self._top(scores[:, j], n_results) for j in range(len(queries))]
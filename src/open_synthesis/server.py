@@ -3,27 +3,31 @@
 from __future__ import annotations
 
 import asyncio
+import json
 import logging
-from contextlib import asynccontextmanager
+import time
+from contextlib import aclosing, asynccontextmanager
 from typing import AsyncIterator
 
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from sse_starlette.sse import EventSourceResponse
+from starlette.background import BackgroundTask
 
+from open_synthesis.admission import AdmissionController, QueueFull, QueueTimeout
 from open_synthesis.config import Settings
 from open_synthesis.corpus.store import VectorStore
-from open_synthesis.retrieval.dense import dense_search
-from open_synthesis.retrieval.hybrid import reciprocal_rank_fusion
-from open_synthesis.retrieval.reranker import rerank
-from open_synthesis.retrieval.sparse import BM25Index
+from open_synthesis.retrieval.engine import RetrievalTimeout, Retriever
 from open_synthesis.synthesis.client import RunPodClient
-from open_synthesis.synthesis.prompts import format_context, format_template
+from open_synthesis.synthesis.prompts import format_template
 from open_synthesis.types import RetrievedChunk, SynthesisResult
 
 logger = logging.getLogger(__name__)
 
+# How often a queued SSE client is told its position.
+QUEUE_POLL_INTERVAL = 1.0
+
 
 class ChatRequest(BaseModel):
     question: str
@@ -37,45 +41,35 @@ class HealthResponse(BaseModel):
     domains: list[str]
 
 
-def _hybrid_retrieve(
-    store: VectorStore, settings: Settings, question: str, domain: str,
-) -> list[RetrievedChunk]:
-    """Run the hybrid retrieval pipeline (dense + BM25 + fusion + rerank)."""
-    n = settings.retrieval.n_results
-    dense_results = dense_search(store, domain, question, n_results=n)
-    all_chunks = [rc.chunk for rc in dense_results]
-    if all_chunks:
-        bm25 = BM25Index(all_chunks)
-        sparse_results = bm25.search(question, n_results=n)
-    else:
-        sparse_results = []
-    fused = reciprocal_rank_fusion(
-        [dense_results, sparse_results],
-        weights=[settings.retrieval.dense_weight, settings.retrieval.sparse_weight],
-        n_results=n,
-    )
-    return rerank(question, fused, n_results=n)
+async def _hybrid_retrieve(retriever: Retriever, question: str, domain: str) -> list[RetrievedChunk]:
+    """Run the hybrid retrieval pipeline (dense + BM25 + fusion + rerank) off the event loop."""
+    return await retriever.aretrieve(question, domain)
 
 
 def create_app(settings: Settings, origins: list[str] | None = None) -> FastAPI:
     """Create and configure the FastAPI application."""
 
-    gpu_semaphore = asyncio.Semaphore(1)
+    admission = AdmissionController(
+        max_concurrent=settings.server.max_concurrent,
+        max_queue=settings.server.max_queue,
+        queue_timeout=settings.server.queue_timeout,
+    )
 
     @asynccontextmanager
     async def lifespan(app: FastAPI) -> AsyncIterator[None]:
         # Startup: store pipeline components in app state
         app.state.settings = settings
-        app.state.store = VectorStore(
-            persist_path=settings.vector_store_path,
-            embedding_model=settings.embedding.model,
-        )
-        app.state.runpod = RunPodClient(settings.runpod)
-        app.state.semaphore = gpu_semaphore
+        app.state.store = VectorStore.from_settings(settings)
+        app.state.retriever = Retriever.from_settings(settings, app.state.store)
+        # Load models and sparse indexes before serving so the first request isn't charged for them.
+        await asyncio.to_thread(app.state.store.warm_up)
+        await asyncio.to_thread(app.state.retriever.warm_up)
+        app.state.runpod = RunPodClient.from_settings(settings)
         logger.info("Server started — vLLM target: %s", settings.runpod.base_url or "pod proxy")
         yield
         # Shutdown
         await app.state.runpod.close()
+        app.state.retriever.close()
         logger.info("Server stopped")
 
     app = FastAPI(
@@ -83,6 +77,9 @@ def create_app(settings: Settings, origins: list[str] | None = None) -> FastAPI:
         version="0.1.0",
         lifespan=lifespan,
     )
+    app.state.admission = admission
+    # Streams abandoned by their client, and the generation budget left unspent.
+    app.state.streams = {"completed": 0, "disconnected": 0, "tokens_streamed": 0, "tokens_saved": 0}
 
     allowed_origins = origins or [
         "https://opensynthesis.dev",
@@ -104,72 +101,113 @@ def create_app(settings: Settings, origins: list[str] | None = None) -> FastAPI:
     async def health(request: Request) -> HealthResponse:
         store: VectorStore = request.app.state.store
         s: Settings = request.app.state.settings
-        domains = store.list_collections()
+        domains = await asyncio.to_thread(store.list_collections)
         vllm_url = s.runpod.base_url or f"https://{s.runpod.pod_id}-8000.proxy.runpod.net"
         return HealthResponse(status="ok", vllm_url=vllm_url, domains=domains)
 
     @app.get("/api/domains")
     async def domains(request: Request) -> list[str]:
         store: VectorStore = request.app.state.store
-        return store.list_collections()
+        return await asyncio.to_thread(store.list_collections)
+
+    @app.get("/api/metrics")
+    async def metrics(request: Request) -> dict:
+        retriever: Retriever = request.app.state.retriever
+        return {
+            "admission": request.app.state.admission.stats(),
+            "retrieval": retriever.stats(),
+            "inference": request.app.state.runpod.stats(),
+            "streams": request.app.state.streams,
+        }
 
     @app.post("/api/chat")
     async def chat(body: ChatRequest, request: Request) -> dict:
-        sem: asyncio.Semaphore = request.app.state.semaphore
-        if not sem._value:
-            raise HTTPException(429, "Server busy — another request is in progress")
-        async with sem:
-            return await _do_chat(body, request)
+        admission: AdmissionController = request.app.state.admission
+        try:
+            async with admission.slot():
+                return await _do_chat(body, request)
+        except QueueFull as exc:
+            raise HTTPException(429, str(exc))
+        except QueueTimeout as exc:
+            raise HTTPException(503, str(exc))
 
     async def _do_chat(body: ChatRequest, request: Request) -> dict:
-        store: VectorStore = request.app.state.store
+        retriever: Retriever = request.app.state.retriever
         s: Settings = request.app.state.settings
         runpod: RunPodClient = request.app.state.runpod
 
         try:
-            chunks = _hybrid_retrieve(store, s, body.question, body.domain)
+            chunks = await _hybrid_retrieve(retriever, body.question, body.domain)
+        except RetrievalTimeout as exc:
+            raise HTTPException(504, str(exc))
         except Exception as exc:
             raise HTTPException(404, f"Domain '{body.domain}' not found or empty: {exc}")
 
-        context = format_context(chunks)
         prompt = format_template("synthesis", question=body.question)
+        packed = await runpod.pack_context(
+            prompt, chunks, s.inference.max_new_tokens, s.inference.max_context_tokens,
+        )
         text = await runpod.generate(
             prompt=prompt,
-            context=context,
+            context=packed.text,
             temperature=s.inference.temperature,
             max_tokens=s.inference.max_new_tokens,
+            seed=s.inference.seed,
         )
 
         result = SynthesisResult(
             question=body.question,
             domain=body.domain,
             synthesis=text,
-            chunks_used=chunks,
+            chunks_used=packed.chunks,
+            context_sources=packed.sources,
         )
         return result.model_dump(mode="json")
 
     @app.post("/api/chat/stream")
     async def chat_stream(body: ChatRequest, request: Request) -> EventSourceResponse:
-        sem: asyncio.Semaphore = request.app.state.semaphore
-        if not sem._value:
-            raise HTTPException(429, "Server busy — another request is in progress")
+        admission: AdmissionController = request.app.state.admission
+        streams: dict[str, int] = request.app.state.streams
+        try:
+            ticket = admission.enter()
+        except QueueFull as exc:
+            raise HTTPException(429, str(exc))
 
         async def event_generator() -> AsyncIterator[dict]:
-            async with sem:
-                store: VectorStore = request.app.state.store
+            try:
+                deadline = time.monotonic() + admission.queue_timeout
+                while not ticket.admitted:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        admission.timed_out += 1
+                        yield {"event": "error", "data": "Timed out waiting in queue"}
+                        return
+                    yield {"event": "queued", "data": json.dumps({"position": ticket.position})}
+                    await ticket.wait(min(QUEUE_POLL_INTERVAL, remaining))
+
+                retriever: Retriever = request.app.state.retriever
                 s: Settings = request.app.state.settings
                 runpod: RunPodClient = request.app.state.runpod
 
                 # Retrieval phase
                 try:
-                    chunks = _hybrid_retrieve(store, s, body.question, body.domain)
+                    chunks = await _hybrid_retrieve(retriever, body.question, body.domain)
+                except RetrievalTimeout as exc:
+                    yield {"event": "error", "data": str(exc)}
+                    return
                 except Exception as exc:
                     yield {"event": "error", "data": f"Domain '{body.domain}' not found: {exc}"}
                     return
 
+                # Pack first, so the sources sent match the [SOURCE N] citations
+                prompt = format_template("synthesis", question=body.question)
+                packed = await runpod.pack_context(
+                    prompt, chunks, s.inference.max_new_tokens, s.inference.max_context_tokens,
+                )
+
                 # Send sources
                 sources = []
-                for rc in chunks:
+                for rc in packed.chunks:
                     meta = rc.chunk.metadata
                     sources.append({
                         "authors": meta.get("authors", "Unknown"),
@@ -178,26 +216,49 @@ def create_app(settings: Settings, origins: list[str] | None = None) -> FastAPI:
                         "source_type": meta.get("source_type", ""),
                         "score": round(rc.score, 3),
                     })
-                import json
                 yield {"event": "sources", "data": json.dumps(sources)}
 
                 # Streaming synthesis
-                context = format_context(chunks)
-                prompt = format_template("synthesis", question=body.question)
+                emitted = 0
                 try:
-                    async for token in runpod.generate_stream(
+                    # aclosing() closes the upstream response as soon as this
+                    # generator is closed, so vLLM aborts the sequence.
+                    async with aclosing(runpod.generate_stream(
                         prompt=prompt,
-                        context=context,
+                        context=packed.text,
                         temperature=s.inference.temperature,
                         max_tokens=s.inference.max_new_tokens,
-                    ):
-                        yield {"event": "chunk", "data": token}
+                        seed=s.inference.seed,
+                    )) as tokens:
+                        async for token in tokens:
+                            emitted += 1
+                            yield {"event": "chunk", "data": token}
+                except (asyncio.CancelledError, GeneratorExit):
+                    streams["disconnected"] += 1
+                    streams["tokens_streamed"] += emitted
+                    # Upper bound: vLLM may have hit EOS before the full budget.
+                    streams["tokens_saved"] += max(0, s.inference.max_new_tokens - emitted)
+                    logger.info("Client disconnected after %d tokens; upstream generation cancelled", emitted)
+                    raise
                 except Exception as exc:
                     yield {"event": "error", "data": str(exc)}
                     return
 
+                streams["completed"] += 1
+                streams["tokens_streamed"] += emitted
                 yield {"event": "done", "data": ""}
+            finally:
+                ticket.release()
+
+        stream = event_generator()
+
+        async def close_stream() -> None:
+            # Runs once the response ends, including on client disconnect:
+            # closing the generator cancels upstream generation and frees the slot,
+            # even if the generator was suspended or never started.
+            await stream.aclose()
+            ticket.release()
 
-        return EventSourceResponse(event_generator())
+        return EventSourceResponse(stream, background=BackgroundTask(close_stream))
 
     return app
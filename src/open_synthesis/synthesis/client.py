@@ -2,13 +2,25 @@
 
 from __future__ import annotations
 
+import asyncio
 import json
+import logging
 from collections.abc import AsyncIterator
 from typing import Any
 
 import httpx
 
-from open_synthesis.config import RunPodSettings
+from open_synthesis.config import RunPodSettings, Settings
+from open_synthesis.synthesis.context import pack_context
+from open_synthesis.synthesis.prompts import build_messages, shared_prefix_chars
+from open_synthesis.synthesis.response_cache import ResponseCache, is_deterministic
+from open_synthesis.synthesis.tokens import get_token_counter
+from open_synthesis.types import PackedContext, RetrievedChunk
+
+logger = logging.getLogger(__name__)
+
+# Share of the prompt's free window always kept for sources, however large max_tokens is.
+MIN_CONTEXT_SHARE = 0.5
 
 
 class RunPodClient:
@@ -17,11 +29,15 @@ class RunPodClient:
     Connects to the OpenAI-compatible API exposed by vLLM at
     https://{pod_id}-8000.proxy.runpod.net/v1/chat/completions
     or a custom base URL (e.g. http://localhost:8000 via SSH tunnel).
+
+    With a ``ResponseCache``, deterministic requests (temperature 0 or a
+    fixed seed) are answered from the cache when the same model, messages
+    and sampling parameters were seen before.
     """
 
     DEFAULT_MAX_CONTEXT = 131072
 
-    def __init__(self, settings: RunPodSettings) -> None:
+    def __init__(self, settings: RunPodSettings, cache: ResponseCache | None = None) -> None:
         self.pod_id = settings.pod_id
         self.api_key = settings.api_key
         self.model = settings.model
@@ -31,6 +47,18 @@ class RunPodClient:
         self._base_url = settings.base_url or f"https://{self.pod_id}-8000.proxy.runpod.net"
         self._client: httpx.AsyncClient | None = None
         self._max_context_len: int | None = None
+        self._prefix = {"calls": 0, "prefix_chars": 0, "prompt_chars": 0, "prompt_tokens": 0, "cached_tokens": 0}
+        self.cache = cache
+        self.tokens = get_token_counter(settings.tokenizer or settings.model)
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> RunPodClient:
+        """Client for ``settings.runpod`` with the response cache if enabled."""
+        inf = settings.inference
+        cache = None
+        if inf.cache_enabled:
+            cache = ResponseCache(inf.cache_path, inf.cache_max_mb * 1024 * 1024, inf.cache_ttl)
+        return cls(settings.runpod, cache=cache)
 
     async def _http(self) -> httpx.AsyncClient:
         if self._client is None or self._client.is_closed:
@@ -42,17 +70,61 @@ class RunPodClient:
 
     def _build_messages(self, prompt: str, context: str) -> list[dict[str, str]]:
         """Build the chat messages list from prompt and context."""
-        return [
-            {
-                "role": "system",
-                "content": (
-                    "You are a research synthesis tool. Synthesize the following "
-                    "retrieved source material accurately and cite sources inline.\n\n"
-                    f"<retrieved_sources>\n{context}\n</retrieved_sources>"
-                ),
-            },
-            {"role": "user", "content": prompt},
-        ]
+        return build_messages(prompt, context)
+
+    def _record_prefix(self, messages: list[dict[str, str]], usage: dict[str, Any] | None) -> None:
+        """Log and accumulate the shared-prefix length of one call.
+
+        ``cached_tokens`` is reported by vLLM only when it runs with
+        ``--enable-prompt-tokens-details``; otherwise it stays at zero.
+        """
+        prefix = shared_prefix_chars(messages)
+        total = sum(len(m["content"]) for m in messages)
+        usage = usage or {}
+        cached = (usage.get("prompt_tokens_details") or {}).get("cached_tokens") or 0
+        stats = self._prefix
+        stats["calls"] += 1
+        stats["prefix_chars"] += prefix
+        stats["prompt_chars"] += total
+        stats["prompt_tokens"] += usage.get("prompt_tokens") or 0
+        stats["cached_tokens"] += cached
+        logger.debug(
+            "Prompt prefix %d of %d chars (%.0f%%), %s cached tokens",
+            prefix, total, 100 * prefix / total if total else 0.0, cached,
+        )
+
+    def stats(self) -> dict[str, Any]:
+        """Shared-prefix share of prompt text and vLLM prefix-cache hits so far."""
+        s = self._prefix
+        return {
+            **s,
+            "prefix_share": round(s["prefix_chars"] / s["prompt_chars"], 3) if s["prompt_chars"] else 0.0,
+            "cache_hit_rate": round(s["cached_tokens"] / s["prompt_tokens"], 3) if s["prompt_tokens"] else 0.0,
+            "response_cache": self.cache.stats() if self.cache is not None else None,
+        }
+
+    def _request_body(
+        self, messages: list[dict[str, str]], temperature: float, max_tokens: int, seed: int | None,
+    ) -> dict[str, Any]:
+        body: dict[str, Any] = {
+            "model": self.model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "top_p": 0.9,
+            "repetition_penalty": 1.1,
+        }
+        if seed is not None:
+            body["seed"] = seed
+        if "qwen3" in self.model.lower():
+            body["chat_template_kwargs"] = {"enable_thinking": False}
+        return body
+
+    def _cache_key(self, body: dict[str, Any], seed: int | None) -> str | None:
+        """Cache key for a deterministic request; None when caching does not apply."""
+        if self.cache is None or not is_deterministic(body["temperature"], seed):
+            return None
+        return self.cache.key(body)
 
     async def _get_max_context_len(self) -> int:
         """Query vLLM for the model's max context length, cached after first call."""
@@ -77,38 +149,69 @@ class RunPodClient:
     ) -> int:
         """Clamp max_tokens to fit within the model's context window."""
         max_context = await self._get_max_context_len()
-        input_chars = sum(len(m["content"]) for m in messages)
-        estimated_input_tokens = input_chars // 3  # conservative estimate
-        available_for_output = max_context - estimated_input_tokens
+        # Tokenizing a long context takes tens of milliseconds; keep it off the loop.
+        input_tokens = await asyncio.to_thread(self.tokens.count_messages, messages)
+        available_for_output = max_context - input_tokens
         if available_for_output < 256:
+            estimate = "" if self.tokens.exact else "~"
             raise ValueError(
-                f"Input too long (~{estimated_input_tokens} tokens estimated). "
+                f"Input too long ({estimate}{input_tokens} tokens). "
                 f"Max context is {max_context}. Reduce retrieval results or context size."
             )
         return min(max_tokens, available_for_output)
 
+    async def pack_context(
+        self,
+        prompt: str,
+        chunks: list[RetrievedChunk],
+        max_tokens: int,
+        max_context_tokens: int = 0,
+    ) -> PackedContext:
+        """Pack ranked chunks into the window left by ``prompt`` and ``max_tokens`` of output.
+
+        The output reservation is capped so at least ``MIN_CONTEXT_SHARE`` of
+        the free window holds sources; ``_clamp_max_tokens`` then trims the
+        request to what is left. ``max_context_tokens`` caps the source
+        block below that; 0 means no cap.
+        """
+        max_context = await self._get_max_context_len()
+        bare = await asyncio.to_thread(self.tokens.count_messages, self._build_messages(prompt, ""))
+        room = max(0, max_context - bare)
+        reserved = min(max_tokens, int(room * (1 - MIN_CONTEXT_SHARE)))
+        budget = room - reserved
+        if max_context_tokens:
+            budget = min(budget, max_context_tokens)
+        packed = await asyncio.to_thread(pack_context, chunks, self.tokens, budget)
+        if chunks and not packed.chunks:
+            logger.warning(
+                "No retrieved chunk fits the %d-token context budget; synthesizing without sources",
+                budget,
+            )
+        logger.debug(
+            "Packed %d of %d chunks into %d sources, %d/%d tokens (%d redundant, %d over budget)",
+            len(chunks) - len(packed.redundant) - len(packed.over_budget), len(chunks),
+            len(packed.sources), packed.tokens, budget, len(packed.redundant), len(packed.over_budget),
+        )
+        return packed
+
     async def generate(
         self,
         prompt: str,
         context: str,
         temperature: float = 0.3,
         max_tokens: int = 4096,
+        seed: int | None = None,
     ) -> str:
         """Send a chat completion request to vLLM and return the response text."""
         messages = self._build_messages(prompt, context)
-        max_tokens = await self._clamp_max_tokens(messages, max_tokens)
+        # Keyed on the requested max_tokens, so a hit needs no round trip to the pod.
+        body = self._request_body(messages, temperature, max_tokens, seed)
+        key = self._cache_key(body, seed)
+        if key is not None and (cached := await asyncio.to_thread(self.cache.get, key)) is not None:
+            return "".join(cached)
+        body["max_tokens"] = await self._clamp_max_tokens(messages, max_tokens)
 
         http = await self._http()
-        body: dict[str, Any] = {
-            "model": self.model,
-            "messages": messages,
-            "temperature": temperature,
-            "max_tokens": max_tokens,
-            "top_p": 0.9,
-            "repetition_penalty": 1.1,
-        }
-        if "qwen3" in self.model.lower():
-            body["chat_template_kwargs"] = {"enable_thinking": False}
         resp = await http.post(
             f"{self._base_url}/v1/chat/completions",
             json=body,
@@ -117,7 +220,11 @@ class RunPodClient:
             detail = resp.text[:500]
             raise RuntimeError(f"vLLM returned {resp.status_code}: {detail}")
         data = resp.json()
-        return data["choices"][0]["message"]["content"]
+        self._record_prefix(messages, data.get("usage"))
+        text = data["choices"][0]["message"]["content"]
+        if key is not None:
+            await asyncio.to_thread(self.cache.put, key, [text])
+        return text
 
     async def generate_stream(
         self,
@@ -125,23 +232,27 @@ class RunPodClient:
         context: str,
         temperature: float = 0.3,
         max_tokens: int = 4096,
+        seed: int | None = None,
     ) -> AsyncIterator[str]:
-        """Stream chat completion tokens from vLLM as an async iterator."""
+        """Stream chat completion tokens from vLLM as an async iterator.
+
+        Closing the iterator early (``aclose()``) closes the HTTP response,
+        which makes vLLM abort the sequence instead of finishing it. A cache
+        hit replays the stored tokens; only complete streams are cached.
+        """
         messages = self._build_messages(prompt, context)
-        max_tokens = await self._clamp_max_tokens(messages, max_tokens)
+        body = self._request_body(messages, temperature, max_tokens, seed)
+        key = self._cache_key(body, seed)
+        if key is not None and (cached := await asyncio.to_thread(self.cache.get, key)) is not None:
+            for piece in cached:
+                yield piece
+            return
+        body["max_tokens"] = await self._clamp_max_tokens(messages, max_tokens)
+        body["stream"] = True
+        body["stream_options"] = {"include_usage": True}
 
         http = await self._http()
-        body: dict[str, Any] = {
-            "model": self.model,
-            "messages": messages,
-            "temperature": temperature,
-            "max_tokens": max_tokens,
-            "top_p": 0.9,
-            "repetition_penalty": 1.1,
-            "stream": True,
-        }
-        if "qwen3" in self.model.lower():
-            body["chat_template_kwargs"] = {"enable_thinking": False}
+        pieces: list[str] = []
         async with http.stream(
             "POST",
             f"{self._base_url}/v1/chat/completions",
@@ -152,6 +263,8 @@ class RunPodClient:
                 raise RuntimeError(
                     f"vLLM returned {resp.status_code}: {err_body.decode()[:500]}"
                 )
+            usage = None
+            finished = False
             async for line in resp.aiter_lines():
                 if not line.startswith("data: "):
                     continue
@@ -160,12 +273,23 @@ class RunPodClient:
                     break
                 try:
                     chunk = json.loads(payload)
-                    delta = chunk["choices"][0].get("delta", {})
-                    content = delta.get("content")
-                    if content:
-                        yield content
-                except (json.JSONDecodeError, KeyError, IndexError):
+                except json.JSONDecodeError:
                     continue
+                # vLLM reports a mid-stream failure as an error event, then [DONE].
+                if "error" in chunk:
+                    raise RuntimeError(f"vLLM stream failed: {str(chunk['error'])[:500]}")
+                # With include_usage, the final chunk has usage and no choices.
+                usage = chunk.get("usage") or usage
+                choices = chunk.get("choices") or [{}]
+                finished = finished or bool(choices[0].get("finish_reason"))
+                content = choices[0].get("delta", {}).get("content")
+                if content:
+                    pieces.append(content)
+                    yield content
+            self._record_prefix(messages, usage)
+        # Only a stream the model finished is a complete, replayable response.
+        if key is not None and finished:
+            await asyncio.to_thread(self.cache.put, key, pieces)
 
     async def runsync(self, payload: dict[str, Any]) -> dict[str, Any]:
         """Legacy-compatible interface used by the pipeline."""
@@ -174,9 +298,12 @@ class RunPodClient:
             context=payload.get("context", ""),
             temperature=payload.get("temperature", 0.3),
             max_tokens=payload.get("max_new_tokens", 4096),
+            seed=payload.get("seed"),
         )
         return {"synthesis": text}
 
     async def close(self) -> None:
         if self._client and not self._client.is_closed:
             await self._client.aclose()
+        if self.cache is not None:
+            self.cache.close()
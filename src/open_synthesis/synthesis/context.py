@@ -0,0 +1,141 @@
+"""Pack ranked chunks into a token-budgeted source context.
+
+``pack_context`` replaces rendering every retrieved chunk. It
+
+1. drops chunks whose words are mostly contained in a higher-ranked
+   chunk (duplicates and overlapping paragraphs),
+2. fills the token budget greedily by relevance per token, and
+3. merges selected chunks that are adjacent in the same document into
+   one source block, which saves a header and keeps the passage intact.
+
+The packed chunks are returned alongside the rendered text, so
+``format_context(packed.chunks)`` reproduces it exactly: validation
+re-renders the same sources, and [SOURCE N] numbers stay aligned.
+"""
+
+from __future__ import annotations
+
+from itertools import groupby
+
+from open_synthesis.retrieval.analyzer import DEFAULT_ANALYZER
+from open_synthesis.synthesis.prompts import CONTEXT_SEPARATOR, format_context, format_source
+from open_synthesis.synthesis.tokens import TokenCounter
+from open_synthesis.types import Chunk, ContextSource, PackedContext, RetrievedChunk
+
+# Fraction of a chunk's terms found in a kept chunk above which it is redundant.
+REDUNDANCY_THRESHOLD = 0.8
+
+
+def pack_context(
+    chunks: list[RetrievedChunk],
+    counter: TokenCounter,
+    budget: int,
+    redundancy: float = REDUNDANCY_THRESHOLD,
+) -> PackedContext:
+    """Select, merge and render ``chunks`` (best first) within ``budget`` tokens."""
+    unique, redundant = _drop_redundant(chunks, redundancy)
+
+    # Header size depends on the source number; price every block at the widest.
+    width = len(unique)
+    sep = counter.count(CONTEXT_SEPARATOR)
+    cost = {
+        rc.chunk.chunk_id: counter.count(format_source(width, rc)) + sep
+        for rc in unique
+    }
+    low = min((rc.score for rc in unique), default=0.0)
+    by_density = sorted(
+        unique,
+        # Shift scores positive so negative reranker logits still rank sensibly.
+        key=lambda rc: (rc.score - low + 1e-6) / cost[rc.chunk.chunk_id],
+        reverse=True,
+    )
+
+    selected: list[RetrievedChunk] = []
+    used = 0
+    for rc in by_density:
+        if used + cost[rc.chunk.chunk_id] <= budget:
+            selected.append(rc)
+            used += cost[rc.chunk.chunk_id]
+
+    while True:
+        blocks = _merge_adjacent(selected)
+        text = format_context(blocks)
+        tokens = counter.count(text)
+        if tokens <= budget or not selected:
+            break
+        # Per-block estimates ran over; shed the least dense chunk and retry.
+        selected.remove(min(selected, key=lambda rc: (rc.score - low + 1e-6) / cost[rc.chunk.chunk_id]))
+
+    kept = {cid for rc in blocks for cid in rc.chunk.metadata.get("packed_chunk_ids", [rc.chunk.chunk_id])}
+    manifest = [
+        ContextSource(
+            source=i,
+            document_id=rc.chunk.document_id,
+            chunk_ids=rc.chunk.metadata.get("packed_chunk_ids", [rc.chunk.chunk_id]),
+            score=rc.score,
+            tokens=counter.count(format_source(i, rc)),
+        )
+        for i, rc in enumerate(blocks, 1)
+    ]
+    return PackedContext(
+        text=text,
+        chunks=blocks,
+        sources=manifest,
+        tokens=tokens,
+        budget=budget,
+        redundant=[rc.chunk.chunk_id for rc in redundant],
+        over_budget=[rc.chunk.chunk_id for rc in unique if rc.chunk.chunk_id not in kept],
+    )
+
+
+def _drop_redundant(
+    chunks: list[RetrievedChunk], threshold: float,
+) -> tuple[list[RetrievedChunk], list[RetrievedChunk]]:
+    """Keep chunks in rank order unless mostly contained in one already kept."""
+    kept: list[tuple[RetrievedChunk, frozenset[str]]] = []
+    dropped: list[RetrievedChunk] = []
+    seen: set[str] = set()
+    for rc in chunks:
+        terms = frozenset(DEFAULT_ANALYZER(rc.chunk.text))
+        if rc.chunk.chunk_id in seen or any(
+            len(terms & other) >= threshold * len(terms)
+            for _, other in kept
+            if terms and other
+        ):
+            dropped.append(rc)
+        else:
+            kept.append((rc, terms))
+            seen.add(rc.chunk.chunk_id)
+    return [rc for rc, _ in kept], dropped
+
+
+def _merge_adjacent(selected: list[RetrievedChunk]) -> list[RetrievedChunk]:
+    """Join runs of consecutive chunks from one document; order blocks by best score."""
+    by_doc = sorted(selected, key=lambda rc: (rc.chunk.document_id, rc.chunk.index))
+    blocks: list[RetrievedChunk] = []
+    for _, group in groupby(by_doc, key=lambda rc: rc.chunk.document_id):
+        run: list[RetrievedChunk] = []
+        for rc in group:
+            if run and rc.chunk.index != run[-1].chunk.index + 1:
+                blocks.append(_join(run))
+                run = []
+            run.append(rc)
+        blocks.append(_join(run))
+    blocks.sort(key=lambda rc: rc.score, reverse=True)
+    return blocks
+
+
+def _join(run: list[RetrievedChunk]) -> RetrievedChunk:
+    if len(run) == 1:
+        return run[0]
+    first = run[0].chunk
+    ids = [rc.chunk.chunk_id for rc in run]
+    merged = Chunk(
+        chunk_id="+".join(ids),
+        document_id=first.document_id,
+        text="\n\n".join(rc.chunk.text for rc in run),
+        index=first.index,
+        metadata={**first.metadata, "packed_chunk_ids": ids},
+    )
+    best = max(run, key=lambda rc: rc.score)
+    return RetrievedChunk(chunk=merged, score=best.score, retrieval_method=best.retrieval_method)
@@ -3,35 +3,49 @@
 from __future__ import annotations
 
 import asyncio
+import logging
 import re
+import time
+from collections.abc import Callable
+from contextvars import ContextVar
+from functools import partial
 
 from rich.console import Console
+from rich.progress import Progress, SpinnerColumn, TextColumn, TimeElapsedColumn
 
 from open_synthesis.config import Settings
 from open_synthesis.corpus.manager import CorpusManager
-from open_synthesis.corpus.store import VectorStore
-from open_synthesis.retrieval.dense import dense_search
-from open_synthesis.retrieval.hybrid import reciprocal_rank_fusion
-from open_synthesis.retrieval.reranker import rerank
-from open_synthesis.retrieval.sparse import BM25Index
+from open_synthesis.retrieval.engine import Retriever
 from open_synthesis.synthesis.client import RunPodClient
-from open_synthesis.synthesis.prompts import format_context, format_template
-from open_synthesis.types import Chunk, PaperResult, PaperSection, RetrievedChunk
+from open_synthesis.synthesis.prompts import format_template
+from open_synthesis.types import PaperResult, PaperSection, RetrievedChunk
 
 console = Console()
+logger = logging.getLogger(__name__)
+
+# Seconds the running section has spent queued for a generation slot. Stage
+# times exclude it, so overlap_saved_seconds compares work, not waiting.
+_generation_wait: ContextVar[list[float] | None] = ContextVar("_generation_wait", default=None)
 
 
 class PaperPipeline:
-    """Generates multi-section research papers via per-section retrieval and synthesis."""
+    """Generates multi-section research papers via per-section retrieval and synthesis.
+
+    Each section is prepared (queries → ingest → retrieve), then
+    synthesized. Up to ``paper.max_concurrent_sections`` sections synthesize
+    at once, and up to ``paper.prefetch_sections`` more prepare ahead of a
+    free slot, so the next section's network-bound work runs while the GPU
+    is busy. vLLM requests are capped at ``paper.max_concurrent_generations``
+    so a paper cannot monopolize the pod. Sections keep their outline order.
+    """
 
     def __init__(self, settings: Settings) -> None:
         self.settings = settings
-        self.store = VectorStore(
-            persist_path=settings.vector_store_path,
-            embedding_model=settings.embedding.model,
-        )
-        self.runpod = RunPodClient(settings.runpod)
         self.corpus = CorpusManager(settings)
+        self.store = self.corpus.store
+        self.retriever = Retriever.from_settings(settings, self.store)
+        self.runpod = RunPodClient.from_settings(settings)
+        self._generation = asyncio.Semaphore(settings.paper.max_concurrent_generations)
 
     async def run(
         self,
@@ -48,53 +62,145 @@ class PaperPipeline:
             for i, s in enumerate(sections, 1):
                 console.print(f"    {i}. {s.title}")
 
-            # Step 2: Process each section sequentially
-            for i, section in enumerate(sections, 1):
-                console.print(f"\n[bold]Step 2.{i}:[/bold] Processing section: [cyan]{section.title}[/cyan]")
-
-                # 2a: Generate search queries
-                console.print("  Generating search queries...")
-                queries = await self._generate_queries(topic, section)
-                section.search_queries = queries
-                console.print(f"  Queries: {queries}")
-
-                # 2b: Ingest papers for each query
-                console.print("  Ingesting papers...")
-                for query in queries:
-                    await self.corpus.ingest(query, domain, source_names=source_names)
-
-                # 2c: Hybrid retrieval
-                console.print("  Retrieving relevant chunks...")
-                combined_query = f"{section.title}: {section.description}"
-                chunks = self._hybrid_retrieve(combined_query, domain)
-                section.chunks_used = chunks
-                console.print(f"  Retrieved {len(chunks)} chunks")
-
-                # 2d: Synthesize section
-                console.print("  Synthesizing section...")
-                synthesis = await self._synthesize_section(topic, section, chunks)
-                section.synthesis = synthesis
-                word_count = len(synthesis.split())
-                console.print(f"  [green]Done[/green] ({word_count} words)")
+            # Step 2: Process sections concurrently
+            console.print("\n[bold]Step 2:[/bold] Processing sections...")
+            cfg = self.settings.paper
+            start = time.perf_counter()
+            started = asyncio.Semaphore(cfg.max_concurrent_sections + cfg.prefetch_sections)
+            synthesizing = asyncio.Semaphore(cfg.max_concurrent_sections)
+            with Progress(
+                SpinnerColumn(),
+                TextColumn("{task.description}"),
+                TextColumn("[dim]{task.fields[stage]}"),
+                TimeElapsedColumn(),
+                console=console,
+            ) as progress:
+                async with asyncio.TaskGroup() as tg:
+                    for i, section in enumerate(sections, 1):
+                        task = progress.add_task(f"{i}. {section.title}", stage="queued")
+                        report = partial(progress.update, task)
+                        tg.create_task(self._process_section(
+                            topic, domain, section, source_names, started, synthesizing, report,
+                        ))
+            elapsed = time.perf_counter() - start
+            busy = sum(sum(s.stage_seconds.values()) for s in sections)
+            saved = max(0.0, busy - elapsed)
+            logger.info("Paper sections took %.1fs; overlap saved %.1fs of %.1fs", elapsed, saved, busy)
 
             # Step 3: Combine
             console.print("\n[bold]Step 3:[/bold] Combining sections...")
-            result = PaperResult(topic=topic, domain=domain, sections=sections)
+            result = PaperResult(
+                topic=topic,
+                domain=domain,
+                sections=sections,
+                elapsed_seconds=round(elapsed, 3),
+                overlap_saved_seconds=round(saved, 3),
+            )
             total_words = sum(len(s.synthesis.split()) for s in sections)
-            console.print(f"[bold green]Paper complete.[/bold green] {len(sections)} sections, {total_words} total words.")
+            console.print(
+                f"[bold green]Paper complete.[/bold green] {len(sections)} sections, "
+                f"{total_words} total words, sections took {elapsed:.0f}s "
+                f"(overlap saved {saved:.0f}s)."
+            )
+            failed = [s.title for s in sections if s.error]
+            if failed:
+                console.print(f"  [red]{len(failed)} section(s) failed:[/red] {', '.join(failed)}")
+            if self.corpus.ledger is not None:
+                ledger = self.corpus.ledger.stats()
+                console.print(
+                    f"  Ingest ledger skipped {ledger['skipped']} of "
+                    f"{ledger['skipped'] + ledger['searched']} source searches."
+                )
 
             return result
         finally:
             await self.runpod.close()
+            await self.corpus.close()
+
+    async def _process_section(
+        self,
+        topic: str,
+        domain: str,
+        section: PaperSection,
+        source_names: list[str] | None,
+        started: asyncio.Semaphore,
+        synthesizing: asyncio.Semaphore,
+        report: Callable[..., None],
+    ) -> None:
+        """Prepare, then synthesize one section in place, recording stage times.
+
+        A failure is recorded on the section instead of raised, so it does
+        not cancel the sibling sections in the task group.
+        """
+        async with started:
+            try:
+                await self._prepare_and_synthesize(topic, domain, section, source_names, synthesizing, report)
+            except Exception as exc:
+                if isinstance(exc, ExceptionGroup) and len(exc.exceptions) == 1:
+                    exc = exc.exceptions[0]
+                logger.exception("Section %r failed", section.title)
+                section.error = f"{type(exc).__name__}: {exc}"
+                report(stage=f"[red]failed[/red] ({type(exc).__name__})")
+
+    async def _prepare_and_synthesize(
+        self,
+        topic: str,
+        domain: str,
+        section: PaperSection,
+        source_names: list[str] | None,
+        synthesizing: asyncio.Semaphore,
+        report: Callable[..., None],
+    ) -> None:
+        waited = [0.0]
+        _generation_wait.set(waited)
+        prepare_start = time.perf_counter()
+        report(stage="generating queries")
+        section.search_queries = await self._generate_queries(topic, section)
+
+        report(stage=f"ingesting {len(section.search_queries)} queries")
+        # A failing ingest cancels its siblings, so none outlive the section.
+        async with asyncio.TaskGroup() as tg:
+            for query in section.search_queries:
+                tg.create_task(self.corpus.ingest(query, domain, source_names=source_names))
+
+        report(stage="retrieving")
+        # One batched dense query for the section and its search queries.
+        combined_query = f"{section.title}: {section.description}"
+        chunks = await self.retriever.aretrieve_many(
+            [combined_query, *section.search_queries],
+            domain,
+            rank_query=combined_query,
+            timeout=self.settings.paper.retrieval_timeout,
+        )
+        section.chunks_used = chunks
+        section.stage_seconds["prepare"] = round(time.perf_counter() - prepare_start - waited[0], 3)
+
+        report(stage=f"prefetched {len(chunks)} chunks")
+        async with synthesizing:
+            waited[0] = 0.0
+            synthesis_start = time.perf_counter()
+            report(stage=f"synthesizing from {len(chunks)} chunks")
+            section.synthesis = await self._synthesize_section(topic, section, chunks)
+            section.stage_seconds["synthesis"] = round(time.perf_counter() - synthesis_start - waited[0], 3)
+        report(stage=f"[green]done[/green] ({len(section.synthesis.split())} words)")
+
+    async def _generate(self, **kwargs) -> str:
+        """``runpod.generate`` under the paper's cap on in-flight generations."""
+        queued = time.perf_counter()
+        async with self._generation:
+            if (waited := _generation_wait.get()) is not None:
+                waited[0] += time.perf_counter() - queued
+            return await self.runpod.generate(**kwargs)
 
     async def _generate_outline(self, topic: str) -> list[PaperSection]:
         """Ask the LLM to produce a structured outline."""
         prompt = format_template("outline", topic=topic)
-        text = await self.runpod.generate(
+        text = await self._generate(
             prompt=prompt,
             context="",
             temperature=0.4,
             max_tokens=2048,
+            seed=self.settings.inference.seed,
         )
         return self._parse_outline(text)
 
@@ -123,49 +229,41 @@ class PaperPipeline:
             section_title=section.title,
             section_description=section.description,
         )
-        text = await self.runpod.generate(
+        text = await self._generate(
             prompt=prompt,
             context="",
             temperature=0.3,
             max_tokens=512,
+            seed=self.settings.inference.seed,
         )
         queries = [q.strip() for q in text.strip().splitlines() if q.strip()]
         return queries[:3]  # Cap at 3 queries
 
-    def _hybrid_retrieve(self, question: str, domain: str) -> list[RetrievedChunk]:
-        """Hybrid retrieval — same logic as SynthesisPipeline."""
-        n = self.settings.retrieval.n_results
-        dense_results = dense_search(self.store, domain, question, n_results=n)
-        all_chunks: list[Chunk] = [rc.chunk for rc in dense_results]
-        if all_chunks:
-            bm25 = BM25Index(all_chunks)
-            sparse_results = bm25.search(question, n_results=n)
-        else:
-            sparse_results = []
-        fused = reciprocal_rank_fusion(
-            [dense_results, sparse_results],
-            weights=[self.settings.retrieval.dense_weight, self.settings.retrieval.sparse_weight],
-            n_results=n,
-        )
-        return rerank(question, fused, n_results=n)
-
     async def _synthesize_section(
         self,
         topic: str,
         section: PaperSection,
         chunks: list[RetrievedChunk],
     ) -> str:
-        """Synthesize a single section using retrieved chunks as context."""
-        context = format_context(chunks)
+        """Synthesize a single section using retrieved chunks as context.
+
+        ``section.chunks_used`` is replaced by the packed sources, whose
+        order matches the section's [SOURCE N] citations.
+        """
+        inf = self.settings.inference
         prompt = format_template(
             "section_synthesis",
             topic=topic,
             section_title=section.title,
             section_description=section.description,
         )
-        return await self.runpod.generate(
+        packed = await self.runpod.pack_context(prompt, chunks, inf.max_new_tokens, inf.max_context_tokens)
+        section.chunks_used = packed.chunks
+        section.context_sources = packed.sources
+        return await self._generate(
             prompt=prompt,
-            context=context,
+            context=packed.text,
             temperature=self.settings.inference.temperature,
             max_tokens=self.settings.inference.max_new_tokens,
+            seed=self.settings.inference.seed,
         )
@@ -2,30 +2,36 @@
 
 from __future__ import annotations
 
+import asyncio
+import logging
+import time
+
 from open_synthesis.config import Settings
 from open_synthesis.corpus.store import VectorStore
-from open_synthesis.retrieval.dense import dense_search
-from open_synthesis.retrieval.hybrid import reciprocal_rank_fusion
-from open_synthesis.retrieval.reranker import rerank
-from open_synthesis.retrieval.sparse import BM25Index
+from open_synthesis.retrieval.engine import Retriever
 from open_synthesis.synthesis.client import RunPodClient
 from open_synthesis.synthesis.prompts import format_context, format_template
-from open_synthesis.types import Chunk, ConfidenceLevel, RetrievedChunk, SynthesisResult
-from open_synthesis.validation.citation import check_citations
+from open_synthesis.types import SynthesisResult
 from open_synthesis.validation.hallucination import check_hallucinations
 from open_synthesis.validation.uncertainty import assess_uncertainty
 
+logger = logging.getLogger(__name__)
+
+_VALIDATION_MAX_TOKENS = {
+    "citation_check": 2048,
+    "hallucination_check": 2048,
+    "uncertainty": 1024,
+}
+
 
 class SynthesisPipeline:
     """Orchestrates: retrieval → context formatting → RunPod inference → validation."""
 
     def __init__(self, settings: Settings) -> None:
         self.settings = settings
-        self.store = VectorStore(
-            persist_path=settings.vector_store_path,
-            embedding_model=settings.embedding.model,
-        )
-        self.runpod = RunPodClient(settings.runpod)
+        self.store = VectorStore.from_settings(settings)
+        self.retriever = Retriever.from_settings(settings, self.store)
+        self.runpod = RunPodClient.from_settings(settings)
 
     async def run(
         self,
@@ -34,26 +40,32 @@ class SynthesisPipeline:
         validate: bool = True,
     ) -> SynthesisResult:
         """Full pipeline: retrieve → synthesize → optionally validate."""
-        # Retrieve
-        chunks = self._hybrid_retrieve(question, domain)
-
-        # Format context and prompt
-        context = format_context(chunks)
+        # Retrieve, with the question's sub-queries if decomposition is on
+        queries = [question]
+        if self.settings.retrieval.decompose_queries:
+            queries += await self._decompose(question)
+        chunks = self.retriever.retrieve_many(queries, domain, rank_query=question)
+
+        # Pack the chunks that fit into the context window
+        inf = self.settings.inference
         prompt = format_template("synthesis", question=question)
+        packed = await self.runpod.pack_context(prompt, chunks, inf.max_new_tokens, inf.max_context_tokens)
 
         # Call RunPod
         output = await self.runpod.runsync({
             "prompt": prompt,
-            "context": context,
+            "context": packed.text,
             "temperature": self.settings.inference.temperature,
             "max_new_tokens": self.settings.inference.max_new_tokens,
+            "seed": self.settings.inference.seed,
         })
 
         result = SynthesisResult(
             question=question,
             domain=domain,
             synthesis=output.get("synthesis", str(output)),
-            chunks_used=chunks,
+            chunks_used=packed.chunks,
+            context_sources=packed.sources,
         )
 
         if validate:
@@ -61,75 +73,70 @@ class SynthesisPipeline:
 
         return result
 
-    def _hybrid_retrieve(self, question: str, domain: str) -> list[RetrievedChunk]:
-        n = self.settings.retrieval.n_results
-
-        # Dense retrieval from ChromaDB
-        dense_results = dense_search(self.store, domain, question, n_results=n)
-
-        # Build BM25 index from dense results for sparse re-scoring
-        all_chunks: list[Chunk] = [rc.chunk for rc in dense_results]
-        if all_chunks:
-            bm25 = BM25Index(all_chunks)
-            sparse_results = bm25.search(question, n_results=n)
-        else:
-            sparse_results = []
-
-        # Fuse
-        fused = reciprocal_rank_fusion(
-            [dense_results, sparse_results],
-            weights=[self.settings.retrieval.dense_weight, self.settings.retrieval.sparse_weight],
-            n_results=n,
-        )
-
-        # Rerank
-        return rerank(question, fused, n_results=n)
+    async def _decompose(self, question: str) -> list[str]:
+        """Ask the LLM for 2-4 focused sub-queries of the question."""
+        output = await self.runpod.runsync({
+            "prompt": format_template("query_decomposition", question=question),
+            "context": "",
+            "temperature": 0.3,
+            "max_new_tokens": 256,
+            "seed": self.settings.inference.seed,
+        })
+        lines = output.get("synthesis", "").splitlines()
+        return [q.strip() for q in lines if q.strip()][:4]
 
     async def validate_result(self, result: SynthesisResult) -> SynthesisResult:
-        """Run validation passes on a synthesis result."""
+        """Run the enabled validation passes concurrently on a synthesis result.
+
+        The sources are rendered once and sent as the context of every pass,
+        so each call opens with the same prefix as the synthesis call and vLLM
+        reuses its cached prefill. Each pass has its own timeout; a pass that
+        fails or times out is recorded in ``result.validation_errors`` without
+        affecting the others. Per-pass latency is recorded in
+        ``result.validation_seconds``.
+        """
         cfg = self.settings.validation
-
-        if cfg.citation_check:
-            citation_prompt = format_template(
-                "citation_check",
-                synthesis=result.synthesis,
-                sources=format_context(result.chunks_used),
-            )
-            citation_output = await self.runpod.runsync({
-                "prompt": citation_prompt,
-                "context": "",
-                "temperature": 0.1,
-                "max_new_tokens": 2048,
-            })
-            result.citation_check = citation_output
-
-        if cfg.hallucination_check:
-            hallucination_prompt = format_template(
-                "hallucination_check",
-                synthesis=result.synthesis,
-                sources=format_context(result.chunks_used),
-            )
-            hallucination_output = await self.runpod.runsync({
-                "prompt": hallucination_prompt,
-                "context": "",
-                "temperature": 0.1,
-                "max_new_tokens": 2048,
-            })
-            flags = check_hallucinations(hallucination_output)
-            result.hallucination_flags = flags
-
-        if cfg.uncertainty_quantification:
-            uncertainty_prompt = format_template(
-                "uncertainty",
-                synthesis=result.synthesis,
-                sources=format_context(result.chunks_used),
-            )
-            uncertainty_output = await self.runpod.runsync({
-                "prompt": uncertainty_prompt,
-                "context": "",
-                "temperature": 0.1,
-                "max_new_tokens": 1024,
-            })
-            result.confidence = assess_uncertainty(uncertainty_output)
-
+        enabled = {
+            "citation_check": cfg.citation_check,
+            "hallucination_check": cfg.hallucination_check,
+            "uncertainty": cfg.uncertainty_quantification,
+        }
+        passes = [name for name, on in enabled.items() if on]
+        if not passes:
+            return result
+
+        sources = format_context(result.chunks_used)
+        outputs = await asyncio.gather(
+            *(self._validation_pass(name, result, sources) for name in passes),
+            return_exceptions=True,
+        )
+        for name, output in zip(passes, outputs):
+            if isinstance(output, BaseException):
+                if isinstance(output, TimeoutError):
+                    reason = f"timed out after {cfg.pass_timeout:.0f}s"
+                else:
+                    reason = str(output) or type(output).__name__
+                logger.warning("Validation pass %s failed: %s", name, reason)
+                result.validation_errors[name] = reason
+            elif name == "citation_check":
+                result.citation_check = output
+            elif name == "hallucination_check":
+                result.hallucination_flags = check_hallucinations(output)
+            else:
+                result.confidence = assess_uncertainty(output)
         return result
+
+    async def _validation_pass(self, name: str, result: SynthesisResult, sources: str) -> dict:
+        prompt = format_template(name, synthesis=result.synthesis)
+        start = time.perf_counter()
+        try:
+            async with asyncio.timeout(self.settings.validation.pass_timeout):
+                return await self.runpod.runsync({
+                    "prompt": prompt,
+                    "context": sources,
+                    "temperature": 0.1,
+                    "max_new_tokens": _VALIDATION_MAX_TOKENS[name],
+                    "seed": self.settings.inference.seed,
+                })
+        finally:
+            result.validation_seconds[name] = round(time.perf_counter() - start, 3)
@@ -1,4 +1,12 @@
-"""Prompt template loader."""
+"""Prompt templates and chat message assembly.
+
+Every call is laid out as one system message holding the fixed
+instructions and the retrieved sources, followed by the task-specific
+user prompt. The system message depends only on the sources, so the
+synthesis call and its validation passes (and paper sections drawing on
+the same chunks) share a byte-identical prefix that vLLM's automatic
+prefix caching can reuse instead of prefilling it again.
+"""
 
 from __future__ import annotations
 
@@ -6,6 +14,11 @@ from pathlib import Path
 
 _PROMPTS_DIR = Path(__file__).resolve().parent.parent.parent.parent / "prompts"
 
+SYSTEM_INSTRUCTIONS = (
+    "You are a research synthesis tool. Work only from the retrieved source "
+    "material below and cite it inline as [SOURCE N]."
+)
+
 
 def load_template(name: str) -> str:
     """Load a prompt template by name (without .txt extension)."""
@@ -19,14 +32,33 @@ def format_template(name: str, **kwargs: str) -> str:
     return template.format(**kwargs)
 
 
+CONTEXT_SEPARATOR = "\n\n---\n\n"
+
+
+def format_source(number: int, rc) -> str:
+    """Render one retrieved chunk as ``[SOURCE N: ...]`` followed by its text."""
+    meta = rc.chunk.metadata
+    label = f"{meta.get('authors', 'Unknown')} ({meta.get('year', 'n.d.')})"
+    source = meta.get("source_type", "")
+    return f"[SOURCE {number}: {label} | {source}]\n{rc.chunk.text}"
+
+
 def format_context(chunks: list) -> str:
     """Format retrieved chunks into a context string for the synthesis prompt."""
-    parts = []
-    for i, rc in enumerate(chunks, 1):
-        meta = rc.chunk.metadata
-        label = f"{meta.get('authors', 'Unknown')} ({meta.get('year', 'n.d.')})"
-        source = meta.get("source_type", "")
-        parts.append(
-            f"[SOURCE {i}: {label} | {source}]\n{rc.chunk.text}"
-        )
-    return "\n\n---\n\n".join(parts)
+    return CONTEXT_SEPARATOR.join(format_source(i, rc) for i, rc in enumerate(chunks, 1))
+
+
+def build_messages(prompt: str, context: str) -> list[dict[str, str]]:
+    """Chat messages with the shared prefix (instructions + sources) first and the task last."""
+    return [
+        {
+            "role": "system",
+            "content": f"{SYSTEM_INSTRUCTIONS}\n\n<retrieved_sources>\n{context}\n</retrieved_sources>",
+        },
+        {"role": "user", "content": prompt},
+    ]
+
+
+def shared_prefix_chars(messages: list[dict[str, str]]) -> int:
+    """Length of the cacheable prefix: every message before the final task prompt."""
+    return sum(len(m["content"]) for m in messages[:-1])
@@ -0,0 +1,76 @@
+"""Persistent cache of LLM responses for deterministic requests."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+from pathlib import Path
+from typing import Any
+
+from open_synthesis.cache import DiskCache
+
+logger = logging.getLogger(__name__)
+
+# Request fields that determine the output; transport flags like ``stream`` are left out.
+_KEY_FIELDS = (
+    "model", "messages", "temperature", "top_p", "repetition_penalty",
+    "max_tokens", "seed", "chat_template_kwargs",
+)
+
+
+def is_deterministic(temperature: float, seed: int | None) -> bool:
+    """Greedy decoding, or sampling with a fixed seed, reproduces its output."""
+    return temperature == 0 or seed is not None
+
+
+class ResponseCache:
+    """Completion text keyed by a hash of the request that produced it.
+
+    Responses are stored as the list of streamed pieces, so a streaming
+    hit replays tokens with their original boundaries. Entries expire
+    after ``ttl`` seconds; least recently used entries are evicted past
+    ``max_bytes``.
+    """
+
+    def __init__(self, path: str | Path, max_bytes: int, ttl: float | None) -> None:
+        self._store = DiskCache(Path(path) / "responses.sqlite", max_bytes)
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(body: dict[str, Any]) -> str:
+        request = {k: body[k] for k in _KEY_FIELDS if k in body}
+        canonical = json.dumps(request, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+        return hashlib.sha256(canonical.encode()).hexdigest()
+
+    def get(self, key: str) -> list[str] | None:
+        """Cached pieces for ``key``, or None on a miss or expired entry."""
+        entry = self._store.get(key)
+        if entry is None or not entry.fresh:
+            self.misses += 1
+            logger.info("LLM response cache miss (%d hits, %d misses)", self.hits, self.misses)
+            return None
+        self.hits += 1
+        logger.info("LLM response cache hit (%d hits, %d misses)", self.hits, self.misses)
+        return json.loads(entry.value)
+
+    def put(self, key: str, pieces: list[str]) -> None:
+        self._store.put(key, json.dumps(pieces).encode(), ttl=self.ttl)
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self) -> dict[str, float]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hit_rate, 3),
+            "bytes": self._store.size_bytes,
+        }
+
+    def close(self) -> None:
+        self._store.close()
@@ -0,0 +1,106 @@
+"""Token accounting with the served model's tokenizer.
+
+The tokenizer is fetched from the Hugging Face Hub on first use and read
+from the local HF cache afterwards. Without it (offline, gated repo,
+unknown model) counts fall back to the conservative ``chars // 3``.
+
+Message contents are counted individually and memoized, so the same
+source block counted for the synthesis call and again for each
+validation pass is tokenized once. The chat template's own tokens are
+measured once per role sequence and added on top.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+from functools import lru_cache
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+# Conservative characters-per-token ratio used without a tokenizer.
+FALLBACK_CHARS_PER_TOKEN = 3
+# Template tokens assumed per message without a tokenizer.
+_FALLBACK_MESSAGE_OVERHEAD = 8
+# Tokens can merge across a content/template boundary; allow for it.
+_BOUNDARY_SLACK = 2
+
+
+class TokenCounter:
+    """Counts tokens for one model, falling back to a character estimate."""
+
+    def __init__(self, model: str | None, tokenizer: Any = None) -> None:
+        self.model = model
+        self._tokenizer = tokenizer
+        self._loaded = tokenizer is not None or not model
+        self._lock = threading.Lock()
+        self._count = lru_cache(maxsize=1024)(self._count_uncached)
+        self._overhead = lru_cache(maxsize=64)(self._overhead_uncached)
+
+    @property
+    def tokenizer(self) -> Any:
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    self._tokenizer = _load_tokenizer(self.model)
+                    self._loaded = True
+        return self._tokenizer
+
+    @property
+    def exact(self) -> bool:
+        """True when counts come from the model's tokenizer."""
+        return self.tokenizer is not None
+
+    def _count_uncached(self, text: str) -> int:
+        tokenizer = self.tokenizer
+        if tokenizer is None:
+            return -(-len(text) // FALLBACK_CHARS_PER_TOKEN)
+        return len(tokenizer(text, add_special_tokens=False)["input_ids"])
+
+    def _overhead_uncached(self, roles: tuple[str, ...]) -> int:
+        tokenizer = self.tokenizer
+        if tokenizer is None or not getattr(tokenizer, "chat_template", None):
+            return _FALLBACK_MESSAGE_OVERHEAD * len(roles)
+        empty = [{"role": role, "content": ""} for role in roles]
+        text = tokenizer.apply_chat_template(empty, tokenize=False, add_generation_prompt=True)
+        return self._count_uncached(text) + _BOUNDARY_SLACK * len(roles)
+
+    def count(self, text: str) -> int:
+        """Tokens in ``text``, without special tokens. Memoized."""
+        return self._count(text)
+
+    def count_messages(self, messages: list[dict[str, str]]) -> int:
+        """Prompt tokens of chat messages after the chat template is applied."""
+        roles = tuple(m["role"] for m in messages)
+        return self._overhead(roles) + sum(self.count(m["content"]) for m in messages)
+
+    def remaining(self, messages: list[dict[str, str]], max_context: int) -> int:
+        """Tokens left in a ``max_context`` window after ``messages``."""
+        return max_context - self.count_messages(messages)
+
+
+def _load_tokenizer(model: str) -> Any:
+    try:
+        from transformers import AutoTokenizer
+
+        return AutoTokenizer.from_pretrained(model)
+    except Exception as exc:
+        logger.warning(
+            "Tokenizer for %s unavailable (%s); estimating %d chars per token",
+            model, exc, FALLBACK_CHARS_PER_TOKEN,
+        )
+        return None
+
+
+_counters: dict[str, TokenCounter] = {}
+_counters_lock = threading.Lock()
+
+
+def get_token_counter(model: str | None) -> TokenCounter:
+    """Process-wide counter for ``model``; the tokenizer loads on first count."""
+    key = model or ""
+    with _counters_lock:
+        if key not in _counters:
+            _counters[key] = TokenCounter(model)
+        return _counters[key]
@@ -40,6 +40,8 @@ class Chunk(BaseModel):
     text: str
     index: int  # position within the document
     metadata: dict[str, Any] = Field(default_factory=dict)
+    # Stored vector, when a store query asked for it; kept out of serialized output.
+    embedding: list[float] | None = Field(default=None, exclude=True, repr=False)
 
 
 class RetrievedChunk(BaseModel):
@@ -50,6 +52,28 @@ class RetrievedChunk(BaseModel):
     retrieval_method: str  # "dense", "sparse", "hybrid"
 
 
+class ContextSource(BaseModel):
+    """One [SOURCE N] block of a packed context."""
+
+    source: int
+    document_id: str
+    chunk_ids: list[str]  # several when adjacent chunks were merged
+    score: float
+    tokens: int
+
+
+class PackedContext(BaseModel):
+    """Rendered source context and the manifest of what went into it."""
+
+    text: str
+    chunks: list[RetrievedChunk]  # one per source block, in citation order
+    sources: list[ContextSource] = Field(default_factory=list)
+    tokens: int = 0
+    budget: int = 0
+    redundant: list[str] = Field(default_factory=list)  # chunk IDs dropped as overlapping
+    over_budget: list[str] = Field(default_factory=list)  # chunk IDs that did not fit
+
+
 class SynthesisResult(BaseModel):
     """Output of the synthesis pipeline."""
 
@@ -57,9 +81,12 @@ class SynthesisResult(BaseModel):
     domain: str
     synthesis: str
     chunks_used: list[RetrievedChunk] = Field(default_factory=list)
+    context_sources: list[ContextSource] = Field(default_factory=list)  # packing manifest
     confidence: ConfidenceLevel | None = None
     citation_check: dict[str, Any] | None = None
     hallucination_flags: list[str] = Field(default_factory=list)
+    validation_seconds: dict[str, float] = Field(default_factory=dict)  # per-pass latency
+    validation_errors: dict[str, str] = Field(default_factory=dict)  # failed or timed-out passes
     created_at: datetime = Field(default_factory=lambda: datetime.now(UTC))
 
 
@@ -71,6 +98,9 @@ class PaperSection(BaseModel):
     search_queries: list[str] = Field(default_factory=list)
     synthesis: str = ""
     chunks_used: list[RetrievedChunk] = Field(default_factory=list)
+    context_sources: list[ContextSource] = Field(default_factory=list)
+    stage_seconds: dict[str, float] = Field(default_factory=dict)  # "prepare", "synthesis"
+    error: str | None = None  # why the section failed; the rest of the paper still completes
 
 
 class PaperResult(BaseModel):
@@ -79,6 +109,8 @@ class PaperResult(BaseModel):
     topic: str
     domain: str
     sections: list[PaperSection] = Field(default_factory=list)
+    elapsed_seconds: float = 0.0  # wall time of the section phase
+    overlap_saved_seconds: float = 0.0  # versus running section stages back to back
     created_at: datetime = Field(default_factory=lambda: datetime.now(UTC))
 
     def to_markdown(self) -> str:
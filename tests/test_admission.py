@@ -0,0 +1,70 @@
+"""Tests for server admission control."""
+
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from open_synthesis.admission import AdmissionController, QueueFull, QueueTimeout
+
+
+@pytest.mark.asyncio
+async def test_admits_up_to_limit_then_queues_fifo():
+    ctl = AdmissionController(max_concurrent=2, max_queue=2, queue_timeout=5)
+    a, b = ctl.enter(), ctl.enter()
+    c, d = ctl.enter(), ctl.enter()
+    assert a.admitted and b.admitted
+    assert (c.position, d.position) == (1, 2)
+    with pytest.raises(QueueFull):
+        ctl.enter()
+
+    a.release()
+    assert c.admitted and d.position == 1
+    b.release()
+    assert await d.wait(0.1)
+    stats = ctl.stats()
+    assert stats["active"] == 2 and stats["queue_depth"] == 0
+    assert stats["admitted"] == 4 and stats["rejected"] == 1 and stats["max_queue_depth"] == 2
+
+
+@pytest.mark.asyncio
+async def test_abandoned_ticket_leaves_queue():
+    ctl = AdmissionController(max_concurrent=1, max_queue=4, queue_timeout=5)
+    first = ctl.enter()
+    gone, waiting = ctl.enter(), ctl.enter()
+    gone.release()
+    gone.release()
+    assert waiting.position == 1
+    first.release()
+    assert waiting.admitted
+    assert ctl.stats()["active"] == 1
+
+
+@pytest.mark.asyncio
+async def test_slot_times_out_in_queue():
+    ctl = AdmissionController(max_concurrent=1, max_queue=4, queue_timeout=0.05)
+    async with ctl.slot():
+        with pytest.raises(QueueTimeout):
+            async with ctl.slot():
+                pass
+    assert ctl.stats()["timed_out"] == 1
+    assert ctl.stats()["active"] == 0 and ctl.stats()["queue_depth"] == 0
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_share_slots():
+    ctl = AdmissionController(max_concurrent=3, max_queue=10, queue_timeout=5)
+    running = peak = 0
+
+    async def request():
+        nonlocal running, peak
+        async with ctl.slot():
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+
+    await asyncio.gather(*(request() for _ in range(10)))
+    assert peak == 3
+    assert ctl.stats()["admitted"] == 10
@@ -23,6 +23,18 @@ def test_chunk_ids_unique(sample_document: Document):
     assert len(ids) == len(set(ids))
 
 
+def test_chunk_ids_content_addressed(sample_document: Document):
+    first = chunk_document(sample_document)
+    assert [c.chunk_id for c in chunk_document(sample_document)] == [c.chunk_id for c in first]
+
+    revised = sample_document.model_copy(update={
+        "full_text": "Preface: this paragraph was added ahead of everything else in a revision.\n\n" + sample_document.full_text,
+    })
+    revised_ids = {c.chunk_id for c in chunk_document(revised)}
+    # Inserting a paragraph shifts indices but leaves existing chunk IDs intact
+    assert {c.chunk_id for c in first} <= revised_ids
+
+
 def test_chunk_abstract_fallback():
     doc = Document(
         source_id="test:002",
@@ -0,0 +1,207 @@
+"""Tests for the vLLM client: response cache and token accounting."""
+
+from __future__ import annotations
+
+import json
+import threading
+
+import httpx
+import pytest
+import respx
+
+from open_synthesis.config import RunPodSettings
+from open_synthesis.synthesis.client import RunPodClient
+from open_synthesis.synthesis.response_cache import ResponseCache
+from open_synthesis.synthesis.tokens import TokenCounter
+from open_synthesis.types import Chunk, RetrievedChunk
+
+_BASE = "http://vllm.test"
+
+
+def _client(tmp_path, ttl: float | None = 3600) -> RunPodClient:
+    client = RunPodClient(
+        RunPodSettings(base_url=_BASE),
+        cache=ResponseCache(tmp_path / "llm", max_bytes=1 << 20, ttl=ttl),
+    )
+    client._max_context_len = 8192
+    client.tokens = TokenCounter(None)
+    return client
+
+
+def _completion(text: str) -> httpx.Response:
+    return httpx.Response(200, json={"choices": [{"message": {"content": text}}]})
+
+
+def _sse(pieces: list[str], tail: dict | None = None) -> httpx.Response:
+    events = [{"choices": [{"delta": {"content": p}, "finish_reason": None}]} for p in pieces]
+    events.append(tail or {"choices": [{"delta": {}, "finish_reason": "stop"}]})
+    lines = [f"data: {json.dumps(e)}\n\n" for e in events]
+    return httpx.Response(200, text="".join(lines) + "data: [DONE]\n\n")
+
+
+@pytest.mark.asyncio
+@respx.mock
+async def test_seeded_request_served_from_cache(tmp_path):
+    route = respx.post(f"{_BASE}/v1/chat/completions").mock(return_value=_completion("answer"))
+    client = _client(tmp_path)
+    first = await client.generate("q", "ctx", temperature=0.3, seed=7)
+    second = await client.generate("q", "ctx", temperature=0.3, seed=7)
+    other = await client.generate("q", "ctx", temperature=0.3, seed=8)
+    assert first == second == other == "answer"
+    assert route.call_count == 2
+    assert client.cache.stats()["hits"] == 1
+    await client.close()
+
+
+@pytest.mark.asyncio
+@respx.mock
+async def test_cache_io_runs_off_the_event_loop(tmp_path):
+    respx.post(f"{_BASE}/v1/chat/completions").mock(return_value=_sse(["a", "b"]))
+    client = _client(tmp_path)
+    threads: list[int] = []
+    for name in ("get", "put"):
+        original = getattr(client.cache, name)
+
+        def record(*args, _original=original):
+            threads.append(threading.get_ident())
+            return _original(*args)
+
+        setattr(client.cache, name, record)
+    [t async for t in client.generate_stream("q", "ctx", temperature=0.0)]
+    await client.generate("q", "ctx", temperature=0.0)
+    assert len(threads) == 3
+    assert threading.get_ident() not in threads
+    await client.close()
+
+
+@pytest.mark.asyncio
+@respx.mock
+async def test_sampled_request_not_cached(tmp_path):
+    route = respx.post(f"{_BASE}/v1/chat/completions").mock(return_value=_completion("answer"))
+    client = _client(tmp_path)
+    await client.generate("q", "ctx", temperature=0.3)
+    await client.generate("q", "ctx", temperature=0.3)
+    assert route.call_count == 2
+    assert client.cache.stats()["hits"] == client.cache.stats()["misses"] == 0
+    await client.close()
+
+
+@pytest.mark.asyncio
+@respx.mock
+async def test_stream_hit_replays_tokens(tmp_path):
+    route = respx.post(f"{_BASE}/v1/chat/completions").mock(return_value=_sse(["Psilo", "cybin", "."]))
+    client = _client(tmp_path)
+    first = [t async for t in client.generate_stream("q", "ctx", temperature=0.0)]
+    replay = [t async for t in client.generate_stream("q", "ctx", temperature=0.0)]
+    text = await client.generate("q", "ctx", temperature=0.0)
+    assert first == replay == ["Psilo", "cybin", "."]
+    assert text == "Psilocybin."
+    assert route.call_count == 1
+    await client.close()
+
+
+@pytest.mark.asyncio
+@respx.mock
+async def test_stream_error_raises_and_is_not_cached(tmp_path):
+    route = respx.post(f"{_BASE}/v1/chat/completions").mock(
+        return_value=_sse(["Partial "], tail={"error": {"message": "engine died", "code": 500}}),
+    )
+    client = _client(tmp_path)
+    received: list[str] = []
+    with pytest.raises(RuntimeError, match="engine died"):
+        async for piece in client.generate_stream("q", "ctx", temperature=0.0):
+            received.append(piece)
+    assert received == ["Partial "]
+
+    route.mock(return_value=_sse(["Partial "], tail={"choices": []}))  # cut off: no finish_reason
+    [t async for t in client.generate_stream("q", "ctx", temperature=0.0)]
+    [t async for t in client.generate_stream("q", "ctx", temperature=0.0)]
+    assert route.call_count == 3
+    assert client.cache.stats()["hits"] == 0
+    await client.close()
+
+
+@pytest.mark.asyncio
+@respx.mock
+async def test_expired_entry_regenerated(tmp_path):
+    route = respx.post(f"{_BASE}/v1/chat/completions").mock(return_value=_completion("answer"))
+    client = _client(tmp_path, ttl=-1)
+    await client.generate("q", "ctx", temperature=0.0)
+    await client.generate("q", "ctx", temperature=0.0)
+    assert route.call_count == 2
+    await client.close()
+
+
+class _FakeTokenizer:
+    """One token per whitespace-separated word; the template adds two per message."""
+
+    chat_template = "{% for m in messages %}<|{{ m.role }}|> {{ m.content }}{% endfor %}"
+
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def __call__(self, text, add_special_tokens=True):
+        self.calls += 1
+        return {"input_ids": text.split()}
+
+    def apply_chat_template(self, messages, tokenize, add_generation_prompt):
+        return " ".join(f"<|{m['role']}|> {m['content']}" for m in messages) + " <|assistant|>"
+
+
+def test_token_counter_counts_messages_and_memoizes():
+    tokenizer = _FakeTokenizer()
+    counter = TokenCounter("fake", tokenizer=tokenizer)
+    sources = "word " * 1000
+    messages = [{"role": "system", "content": sources}, {"role": "user", "content": "one two"}]
+    first = counter.count_messages(messages)
+    calls = tokenizer.calls
+    again = counter.count_messages([messages[0], {"role": "user", "content": "three"}])
+    assert counter.exact
+    assert first - again == 1
+    assert 1002 < first <= 1002 + 3 + 2 * 2  # content + template tokens + boundary slack
+    assert tokenizer.calls == calls + 1  # only the new user prompt was tokenized
+    assert counter.remaining(messages, 4096) == 4096 - first
+
+
+def test_token_counter_fallback_without_model():
+    counter = TokenCounter(None)
+    assert not counter.exact
+    assert counter.count("x" * 30) == 10
+    assert counter.count("x" * 31) == 11
+
+
+@pytest.mark.asyncio
+async def test_clamp_uses_token_counter(tmp_path):
+    client = _client(tmp_path)
+    client.tokens = TokenCounter("fake", tokenizer=_FakeTokenizer())
+    messages = client._build_messages("q", "word " * 7000)
+    assert await client._clamp_max_tokens(messages, 4096) < 8192 - 7000
+    with pytest.raises(ValueError, match="Input too long"):
+        await client._clamp_max_tokens(client._build_messages("q", "word " * 8000), 4096)
+    await client.close()
+
+
+def _chunk(i: int, words: int) -> RetrievedChunk:
+    chunk = Chunk(chunk_id=f"d{i}:0", document_id=f"d{i}", text="evidence " * words, index=0)
+    return RetrievedChunk(chunk=chunk, score=1.0 - i / 100, retrieval_method="hybrid")
+
+
+@pytest.mark.asyncio
+async def test_pack_context_keeps_sources_when_max_tokens_exceeds_window(tmp_path):
+    client = _client(tmp_path)  # 8192-token window, below the default max_new_tokens
+    packed = await client.pack_context("q", [_chunk(i, 100) for i in range(20)], max_tokens=16384)
+    assert packed.chunks
+    assert packed.budget >= (8192 - 1000) // 2
+    messages = client._build_messages("q", packed.text)
+    assert await client._clamp_max_tokens(messages, 16384) >= 256
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_pack_context_warns_when_no_chunk_fits(tmp_path, caplog):
+    client = _client(tmp_path)
+    packed = await client.pack_context("q", [_chunk(0, 10_000)], max_tokens=16384)
+    assert packed.chunks == []
+    assert packed.over_budget == ["d0:0"]
+    assert "No retrieved chunk fits" in caplog.text
+    await client.close()
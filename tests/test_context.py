@@ -0,0 +1,68 @@
+"""Tests for the token-budgeted context packer."""
+
+from __future__ import annotations
+
+from open_synthesis.synthesis.context import pack_context
+from open_synthesis.synthesis.prompts import format_context
+from open_synthesis.synthesis.tokens import TokenCounter
+from open_synthesis.types import Chunk, RetrievedChunk
+
+_WORDS = "psilocybin depression trial efficacy serotonin receptor dose placebo response remission".split()
+
+
+def _rc(doc: str, index: int, text: str, score: float) -> RetrievedChunk:
+    chunk = Chunk(
+        chunk_id=f"{doc}:{index}",
+        document_id=doc,
+        text=text,
+        index=index,
+        metadata={"authors": doc, "year": 2021, "source_type": "test"},
+    )
+    return RetrievedChunk(chunk=chunk, score=score, retrieval_method="hybrid")
+
+
+def _text(seed: int, n: int = 40) -> str:
+    return " ".join(f"{_WORDS[(seed + i) % len(_WORDS)]}{seed}x{i}" for i in range(n))
+
+
+def test_drops_overlapping_chunks():
+    base = _text(1)
+    chunks = [
+        _rc("a", 0, base, 0.9),
+        _rc("b", 3, base + " plus a short addendum", 0.8),  # near-duplicate from another doc
+        _rc("c", 0, _text(2), 0.7),
+    ]
+    packed = pack_context(chunks, TokenCounter(None), budget=10_000)
+    assert packed.redundant == ["b:3"]
+    assert [s.document_id for s in packed.sources] == ["a", "c"]
+
+
+def test_short_top_chunk_keeps_longer_distinct_chunks():
+    chunks = [
+        _rc("a", 0, "Psilocybin depression trial", 0.9),
+        _rc("b", 0, "psilocybin depression trial " + _text(2), 0.8),
+        _rc("c", 0, "psilocybin depression trial " + _text(3), 0.7),
+    ]
+    packed = pack_context(chunks, TokenCounter(None), budget=10_000)
+    assert packed.redundant == []
+    assert [s.document_id for s in packed.sources] == ["a", "b", "c"]
+
+
+def test_merges_adjacent_chunks_of_one_document():
+    chunks = [_rc("a", 1, _text(1), 0.9), _rc("b", 0, _text(2), 0.8), _rc("a", 2, _text(3), 0.7)]
+    packed = pack_context(chunks, TokenCounter(None), budget=10_000)
+    assert [s.chunk_ids for s in packed.sources] == [["a:1", "a:2"], ["b:0"]]
+    assert packed.chunks[0].chunk.text == _text(1) + "\n\n" + _text(3)
+    assert packed.text == format_context(packed.chunks)
+    assert packed.text.startswith("[SOURCE 1: a (2021) | test]")
+
+
+def test_fills_budget_by_score_per_token():
+    counter = TokenCounter(None)
+    long_top = _rc("long", 0, _text(1, n=400), 1.0)
+    short = [_rc(f"s{i}", 0, _text(10 + i), 0.5) for i in range(4)]
+    budget = sum(counter.count(format_context([rc])) + 5 for rc in short)
+    packed = pack_context([long_top, *short], counter, budget=budget)
+    assert packed.over_budget == ["long:0"]
+    assert len(packed.sources) == 4
+    assert packed.tokens == counter.count(packed.text) <= budget
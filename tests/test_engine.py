@@ -0,0 +1,152 @@
+"""Tests for the retrieval engine."""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from open_synthesis.retrieval.engine import CandidateSource, RetrievalTimeout, Retriever
+from open_synthesis.types import Chunk, RetrievedChunk
+
+
+def _results(*ids: str) -> list[RetrievedChunk]:
+    return [
+        RetrievedChunk(
+            chunk=Chunk(chunk_id=cid, document_id="doc", text=cid, index=0),
+            score=1.0,
+            retrieval_method="test",
+        )
+        for cid in ids
+    ]
+
+
+def test_stages_run_in_order_and_are_traced():
+    calls: list[tuple] = []
+
+    def dense(domain, query, n):
+        calls.append(("dense", domain, query, n))
+        return _results("a", "b", "c")
+
+    def sparse(domain, query, n):
+        return _results("c", "d")
+
+    def drop_d(query, chunks):
+        return [rc for rc in chunks if rc.chunk.chunk_id != "d"]
+
+    retriever = Retriever(
+        sources=[CandidateSource("dense", dense, 1.0), CandidateSource("sparse", sparse, 1.0)],
+        rerankers=[("reverse", lambda q, chunks, n: chunks[::-1][:n])],
+        filters=[("drop_d", drop_d)],
+        n_results=4,
+    )
+    chunks, trace = retriever.retrieve_traced("q", "dom")
+
+    assert calls == [("dense", "dom", "q", 4)]
+    assert [s.stage for s in trace.stages] == ["dense", "sparse", "fusion", "reverse", "drop_d"]
+    assert [s.candidates for s in trace.stages] == [3, 2, 4, 4, 3]
+    assert [rc.chunk.chunk_id for rc in chunks] == ["b", "a", "c"]
+    assert trace.total_seconds >= 0
+
+    retriever.retrieve("q", "dom")
+    stats = retriever.stats()
+    assert stats["dense"]["calls"] == 2
+    assert stats["fusion"]["mean_candidates"] == 4.0
+
+
+def test_retrieve_many_batches_and_fuses_every_query():
+    batched: list[list[str]] = []
+
+    def dense_many(domain, queries, n):
+        batched.append(queries)
+        return [_results(f"{q}1", "shared") for q in queries]
+
+    reranked: list[str] = []
+
+    def rerank(query, chunks, n):
+        reranked.append(query)
+        return chunks[:n]
+
+    retriever = Retriever(
+        sources=[
+            CandidateSource("dense", lambda d, q, n: [], 1.0, dense_many),
+            CandidateSource("sparse", lambda d, q, n: _results(f"{q}2"), 1.0),
+        ],
+        rerankers=[("rerank", rerank)],
+        n_results=10,
+    )
+    chunks = retriever.retrieve_many(["x", "y"], "dom", rank_query="question")
+
+    assert batched == [["x", "y"]]
+    assert reranked == ["question"]
+    ids = [rc.chunk.chunk_id for rc in chunks]
+    assert ids[0] == "shared"
+    assert set(ids) == {"shared", "x1", "y1", "x2", "y2"}
+
+
+@pytest.mark.asyncio
+async def test_aretrieve_runs_off_the_event_loop():
+    def slow_dense(domain, query, n):
+        time.sleep(0.2)
+        return _results("a", "b")
+
+    retriever = Retriever(sources=[CandidateSource("dense", slow_dense)], n_results=2)
+    ticks = 0
+
+    async def heartbeat():
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0.01)
+
+    beat = asyncio.create_task(heartbeat())
+    chunks = await retriever.aretrieve("q", "dom")
+    beat.cancel()
+    assert [rc.chunk.chunk_id for rc in chunks] == ["a", "b"]
+    assert ticks >= 5
+    retriever.close()
+
+
+@pytest.mark.asyncio
+async def test_aretrieve_deadline_skips_remaining_stages():
+    reranked = threading.Event()
+
+    def slow_dense(domain, query, n):
+        time.sleep(0.2)
+        return _results("a")
+
+    def reranker(query, chunks, n):
+        reranked.set()
+        return chunks
+
+    retriever = Retriever(
+        sources=[CandidateSource("dense", slow_dense)],
+        rerankers=[("rerank", reranker)],
+        timeout=0.05,
+    )
+    with pytest.raises(RetrievalTimeout):
+        await retriever.aretrieve("q", "dom")
+    await asyncio.sleep(0.3)
+    assert not reranked.is_set()
+    retriever.close()
+
+
+def test_warm_up_loads_rerankers():
+    class _Reranker:
+        loaded = False
+
+        def warm_up(self):
+            self.loaded = True
+
+        def __call__(self, query, chunks, n):
+            return chunks[:n]
+
+    reranker = _Reranker()
+    retriever = Retriever(
+        sources=[CandidateSource("dense", lambda d, q, n: [])],
+        rerankers=[("rerank", reranker), ("plain", lambda q, chunks, n: chunks)],
+    )
+    retriever.warm_up()
+    assert reranker.loaded
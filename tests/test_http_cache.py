@@ -0,0 +1,75 @@
+"""Tests for the on-disk HTTP response cache."""
+
+from __future__ import annotations
+
+import httpx
+import pytest
+import respx
+
+from open_synthesis.cache import DiskCache
+from open_synthesis.config import HttpSettings
+from open_synthesis.corpus.http_cache import request_key
+from open_synthesis.corpus.transport import TransportManager
+
+
+def _manager(tmp_path, **kwargs) -> TransportManager:
+    return TransportManager(HttpSettings(cache_path=str(tmp_path / "http"), **kwargs))
+
+
+def test_request_key_ignores_param_order():
+    a = httpx.Request("GET", "https://api.test/search?q=x&limit=5")
+    b = httpx.Request("GET", "https://api.test/search?limit=5&q=x")
+    c = httpx.Request("POST", "https://api.test/search?limit=5&q=x", json={"q": "x"})
+    assert request_key(a) == request_key(b)
+    assert request_key(a) != request_key(c)
+
+
+@pytest.mark.asyncio
+@respx.mock
+async def test_repeat_request_served_from_cache(tmp_path):
+    route = respx.get("https://api.test/search").mock(return_value=httpx.Response(200, json={"n": 1}))
+    manager = _manager(tmp_path)
+    client = manager.client()
+    first = await client.get("https://api.test/search", params={"q": "psilocybin"})
+    second = await client.get("https://api.test/search", params={"q": "psilocybin"})
+    assert first.json() == second.json() == {"n": 1}
+    assert route.call_count == 1
+    assert second.extensions.get("from_cache") is True
+
+
+@pytest.mark.asyncio
+@respx.mock
+async def test_stale_entry_revalidated_with_etag(tmp_path):
+    route = respx.get("https://api.test/item").mock(side_effect=[
+        httpx.Response(200, json={"v": 1}, headers={"ETag": '"abc"'}),
+        httpx.Response(304),
+    ])
+    manager = _manager(tmp_path)
+    client = manager.client(cache_ttl=0.0)
+    await client.get("https://api.test/item")
+    resp = await client.get("https://api.test/item")
+    assert resp.json() == {"v": 1}
+    assert route.calls[1].request.headers["If-None-Match"] == '"abc"'
+    assert manager.cache.revalidated == 1
+
+
+@pytest.mark.asyncio
+@respx.mock
+async def test_offline_serves_only_from_cache(tmp_path):
+    respx.get("https://api.test/a").mock(return_value=httpx.Response(200, text="cached"))
+    await _manager(tmp_path).client().get("https://api.test/a")
+
+    offline = _manager(tmp_path, offline=True).client()
+    assert (await offline.get("https://api.test/a")).text == "cached"
+    assert (await offline.get("https://api.test/b")).status_code == 504
+
+
+def test_disk_cache_evicts_least_recently_used(tmp_path):
+    cache = DiskCache(tmp_path / "c.sqlite", max_bytes=250)
+    cache.put("a", b"x" * 100)
+    cache.put("b", b"x" * 100)
+    cache.get("a")
+    cache.put("c", b"x" * 100)
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.size_bytes <= 250
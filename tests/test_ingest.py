@@ -0,0 +1,91 @@
+"""Tests for the staged ingestion pipeline."""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Any
+
+import pytest
+
+from open_synthesis.corpus.base import DataSource
+from open_synthesis.corpus.ingest import IngestPipeline
+from open_synthesis.corpus.store import ChunkDiff
+from open_synthesis.types import Chunk, Document
+
+
+class _FakeStore:
+    def __init__(self) -> None:
+        self.written: list[str] = []
+
+    def diff_chunks(self, domain: str, chunks: list[Chunk]) -> ChunkDiff:
+        return ChunkDiff(chunks, [], 0, [])
+
+    def delete(self, domain: str, ids: list[str]) -> None:
+        pass
+
+    def reindex(self, domain: str, chunks: list[Chunk]) -> None:
+        pass
+
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        return [[float(len(t))] for t in texts]
+
+    def write(self, domain: str, chunks: list[Chunk], embeddings: list[list[float]]) -> int:
+        self.written.extend(c.document_id for c in chunks)
+        return len(chunks)
+
+
+class _FakeSource(DataSource):
+    def __init__(self, docs: list[Document], delay: float = 0.0, fail: bool = False) -> None:
+        super().__init__()
+        self.docs = docs
+        self.delay = delay
+        self.fail = fail
+
+    @staticmethod
+    def info() -> dict[str, Any]:
+        return {}
+
+    async def search(self, query: str, max_results: int = 20) -> list[Document]:
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("boom")
+        return self.docs
+
+    async def fetch(self, identifier: str) -> Document | None:
+        return None
+
+
+def _doc(source_id: str, doi: str | None = None) -> Document:
+    return Document(
+        source_id=source_id,
+        source_type="test",
+        title=source_id,
+        doi=doi,
+        abstract=f"Abstract text for {source_id} that is long enough to form a chunk.",
+    )
+
+
+@pytest.mark.asyncio
+async def test_pipeline_dedups_and_writes_all_sources():
+    store = _FakeStore()
+    sources = [
+        _FakeSource([_doc("a:1", doi="10.1/x"), _doc("a:2")]),
+        _FakeSource([_doc("b:1", doi="10.1/x")], delay=0.01),
+        _FakeSource([], fail=True),
+    ]
+    counts = await IngestPipeline(store, "test").run(sources, "q", 20)
+    assert counts["documents"] == 2
+    assert counts["chunks"] == counts["new"] == 2
+    assert sorted(store.written) == ["a:1", "a:2"]
+
+
+@pytest.mark.asyncio
+async def test_fast_sources_written_before_slow_source_returns():
+    store = _FakeStore()
+    slow = _FakeSource([_doc("slow:1")], delay=0.2)
+    fast = _FakeSource([_doc("fast:1")])
+    run = asyncio.create_task(IngestPipeline(store, "test").run([slow, fast], "q", 20))
+    await asyncio.sleep(0.1)
+    assert store.written == ["fast:1"]
+    await run
+    assert store.written == ["fast:1", "slow:1"]
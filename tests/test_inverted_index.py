@@ -0,0 +1,125 @@
+"""Tests for the persistent BM25 inverted index."""
+
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from open_synthesis.retrieval.analyzer import Analyzer
+from open_synthesis.retrieval.inverted_index import InvertedIndex
+from open_synthesis.retrieval.sparse import BM25Index
+from open_synthesis.types import Chunk
+
+DOCS = [
+    ("a", "psilocybin therapy for major depression"),
+    ("b", "ketamine infusion for treatment resistant depression"),
+    ("c", "exercise and sleep quality in older adults"),
+]
+
+
+def test_search_ranks_matching_chunks(tmp_path):
+    index = InvertedIndex(tmp_path / "idx")
+    assert index.add(DOCS) == 3
+    hits = index.search("psilocybin depression")
+    assert [cid for cid, _ in hits][:2] == ["a", "b"]
+    assert all(score > 0 for _, score in hits)
+    assert index.search("unrelated words") == []
+
+
+def test_search_many_matches_in_memory_bm25(tmp_path):
+    docs = DOCS + [("d", "depression and sleep in adults with depression")]
+    index = InvertedIndex(tmp_path / "idx")
+    index.add(docs[:2])
+    index.add(docs[2:])  # two segments
+    reference = BM25Index([Chunk(chunk_id=cid, document_id=cid, text=t, index=0) for cid, t in docs])
+
+    queries = ["psilocybin depression", "sleep adults", "depression depression", "unrelated words"]
+    batched = index.search_many(queries, n_results=2)
+    assert len(batched) == len(queries)
+    for query, hits in zip(queries, batched):
+        expected = reference.search(query, n_results=2)
+        assert [cid for cid, _ in hits] == [rc.chunk.chunk_id for rc in expected]
+        assert [score for _, score in hits] == pytest.approx([rc.score for rc in expected], rel=1e-5)
+    assert batched[3] == []
+
+
+def test_add_is_incremental_and_skips_known_ids(tmp_path):
+    index = InvertedIndex(tmp_path / "idx")
+    index.add(DOCS[:2])
+    assert index.add(DOCS) == 1
+    assert len(index) == 3
+    assert [cid for cid, _ in index.search("sleep")] == ["c"]
+
+
+def test_delete_and_reload_from_disk(tmp_path):
+    index = InvertedIndex(tmp_path / "idx")
+    index.add(DOCS[:2])
+    index.add(DOCS[2:])
+    index.delete(["a"])
+    assert "a" not in index
+
+    reopened = InvertedIndex(tmp_path / "idx")
+    assert not reopened.needs_rebuild
+    assert len(reopened) == 2
+    assert [cid for cid, _ in reopened.search("psilocybin depression")] == ["b"]
+
+
+def test_segments_merge_and_drop_tombstones(tmp_path):
+    index = InvertedIndex(tmp_path / "idx", max_segments=2)
+    for i in range(6):
+        index.add([(f"d{i}", f"shared term{i}")])
+    index.delete(["d0", "d1"])
+    for i in range(6, 9):
+        index.add([(f"d{i}", f"shared term{i}")])
+
+    manifest = json.loads((tmp_path / "idx" / "manifest.json").read_text())
+    assert len(manifest["segments"]) <= 2
+    assert len(index) == 7
+    assert {cid for cid, _ in index.search("shared", n_results=20)} == {f"d{i}" for i in range(2, 9)}
+    assert [cid for cid, _ in index.search("term7")] == ["d7"]
+
+
+def test_interrupted_write_leaves_index_writable(tmp_path):
+    index = InvertedIndex(tmp_path / "idx")
+    index.add(DOCS[:1])
+    # A writer died after writing its segment but before saving the manifest.
+    (tmp_path / "idx" / "seg-orphan").mkdir()
+    (tmp_path / "idx" / "seg-orphan.tmp").mkdir()
+
+    reopened = InvertedIndex(tmp_path / "idx")
+    assert not (tmp_path / "idx" / "seg-orphan").exists()
+    assert not (tmp_path / "idx" / "seg-orphan.tmp").exists()
+    assert reopened.add(DOCS[1:]) == 2
+    assert len(reopened) == 3
+
+
+def test_writers_sharing_a_path_see_each_other(tmp_path):
+    first = InvertedIndex(tmp_path / "idx")
+    second = InvertedIndex(tmp_path / "idx")  # e.g. `serve` and a CLI `ingest`
+    first.add(DOCS[:1])
+    second.add(DOCS[1:])
+    first.delete(["b"])
+
+    rebuilt: list[bool] = []
+    for index in (first, second):
+        index.ensure_built(lambda: rebuilt.append(True) or [], expected=2)
+        assert {cid for cid, _ in index.search("depression", n_results=5)} == {"a"}
+        assert len(index) == 2
+    assert rebuilt == []
+
+
+def test_count_mismatch_triggers_rebuild(tmp_path):
+    index = InvertedIndex(tmp_path / "idx")
+    index.add(DOCS[:1])
+    index.ensure_built(lambda: DOCS, expected=3)  # chunks reached the collection but not the index
+    assert len(index) == 3
+
+
+def test_analyzer_change_requires_rebuild(tmp_path):
+    InvertedIndex(tmp_path / "idx").add(DOCS)
+    index = InvertedIndex(tmp_path / "idx", analyzer=Analyzer(stopwords=False))
+    assert index.needs_rebuild
+    index.ensure_built(lambda: DOCS[:1])
+    assert not index.needs_rebuild
+    assert len(index) == 1
@@ -0,0 +1,155 @@
+"""Tests for the ingest ledger and ledger-aware ingestion."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Any
+from unittest.mock import MagicMock
+
+import pytest
+
+from open_synthesis.corpus.base import DataSource
+from open_synthesis.corpus.ledger import IngestLedger
+from open_synthesis.types import Document
+
+_PARAPHRASES = {
+    "psilocybin depression rct": [1.0, 0.0, 0.1],
+    "psilocybin randomized trial depression": [0.98, 0.05, 0.12],
+    "ketamine anxiety": [0.0, 1.0, 0.0],
+}
+
+
+def _embed(texts: list[str]) -> list[list[float]]:
+    return [_PARAPHRASES.get(t, [0.0, 0.0, 1.0]) for t in texts]
+
+
+def _ledger(tmp_path, **kwargs) -> IngestLedger:
+    kwargs.setdefault("freshness", 3600)
+    return IngestLedger(tmp_path / "ledger.sqlite", **kwargs)
+
+
+async def _record(ledger: IngestLedger, query: str, sources: list[str], domain: str = "d", n: int = 20) -> None:
+    pending = ledger.begin(domain, await ledger.probe(query), sources, n)
+    ledger.finish(pending, sources, documents=5)
+
+
+async def test_exact_and_token_near_duplicates_match(tmp_path):
+    ledger = _ledger(tmp_path, token_similarity=0.6)
+    await _record(ledger, "Psilocybin therapy for depression", ["arxiv", "pubmed"])
+
+    exact = ledger.match("d", await ledger.probe("psilocybin THERAPY for depression"), ["arxiv", "crossref"], 20)
+    assert set(exact) == {"arxiv"}
+    reordered = ledger.match("d", await ledger.probe("depression psilocybin therapy trials"), ["pubmed"], 20)
+    assert set(reordered) == {"pubmed"}
+    assert ledger.match("d", await ledger.probe("ketamine anxiety"), ["arxiv"], 20) == {}
+    assert ledger.match("other", await ledger.probe("psilocybin therapy depression"), ["arxiv"], 20) == {}
+    assert ledger.stats() == {"searched": 3, "skipped": 2}
+
+
+async def test_embedding_similarity_catches_paraphrases(tmp_path):
+    ledger = _ledger(tmp_path, embedding_similarity=0.95, embed=_embed)
+    await _record(ledger, "psilocybin depression rct", ["arxiv"])
+    match = ledger.match("d", await ledger.probe("psilocybin randomized trial depression"), ["arxiv"], 20)
+    assert match["arxiv"].query == "psilocybin depression rct"
+    assert ledger.match("d", await ledger.probe("ketamine anxiety"), ["arxiv"], 20) == {}
+
+
+async def test_stale_or_smaller_ingests_do_not_match(tmp_path):
+    ledger = _ledger(tmp_path)
+    await _record(ledger, "psilocybin depression", ["arxiv"], n=10)
+    probe = await ledger.probe("psilocybin depression")
+    assert ledger.match("d", probe, ["arxiv"], 20) == {}
+    assert set(ledger.match("d", probe, ["arxiv"], 10)) == {"arxiv"}
+
+    ledger.freshness = 0.0
+    time.sleep(0.01)
+    assert ledger.match("d", probe, ["arxiv"], 10) == {}
+
+
+async def test_ledger_persists_across_instances(tmp_path):
+    await _record(_ledger(tmp_path), "psilocybin depression", ["arxiv"])
+    reopened = _ledger(tmp_path)
+    assert set(reopened.match("d", await reopened.probe("psilocybin depression"), ["arxiv"], 20)) == {"arxiv"}
+
+
+# --- CorpusManager integration ---
+
+
+class _CountingSource(DataSource):
+    def __init__(self, fail: bool = False) -> None:
+        super().__init__()
+        self.calls = 0
+        self.fail = fail
+
+    @staticmethod
+    def info() -> dict[str, Any]:
+        return {}
+
+    async def search(self, query: str, max_results: int = 20) -> list[Document]:
+        self.calls += 1
+        await asyncio.sleep(0.05)
+        if self.fail:
+            raise RuntimeError("boom")
+        return []
+
+    async def fetch(self, identifier: str) -> Document | None:
+        return None
+
+
+def _manager(tmp_path, default_settings, **sources: DataSource):
+    from open_synthesis.corpus.manager import CorpusManager
+
+    manager = CorpusManager.__new__(CorpusManager)
+    manager.settings = default_settings
+    manager.store = MagicMock(embedding_cache=None)
+    manager.transport = MagicMock()
+    manager.transport.limiter.stats.return_value = {}
+    manager._sources = sources
+    manager.ledger = _ledger(tmp_path)
+    return manager
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    from open_synthesis.corpus import manager
+
+    monkeypatch.setattr(manager, "SOURCE_REGISTRY", {"good": _CountingSource, "bad": _CountingSource})
+
+
+async def test_manager_skips_sources_already_ingested(tmp_path, default_settings, registry):
+    good, bad = _CountingSource(), _CountingSource(fail=True)
+    manager = _manager(tmp_path, default_settings, good=good, bad=bad)
+
+    await manager.ingest("psilocybin depression", "d")
+    second = await manager.ingest("depression psilocybin", "d")
+    assert second["skipped"] == {"good": "psilocybin depression"}
+    assert good.calls == 1
+    assert bad.calls == 2  # failed searches are not recorded
+
+    await manager.ingest("psilocybin depression", "d", force=True)
+    assert good.calls == 2
+
+
+async def test_concurrent_near_duplicates_wait_for_first_ingest(tmp_path, default_settings, registry):
+    good = _CountingSource()
+    manager = _manager(tmp_path, default_settings, good=good)
+    results = await asyncio.gather(
+        manager.ingest("psilocybin depression", "d", source_names=["good"]),
+        manager.ingest("psilocybin depression", "d", source_names=["good"]),
+    )
+    assert good.calls == 1
+    assert results[1]["skipped"] == {"good": "psilocybin depression"}
+
+
+async def test_waiter_searches_sources_that_failed_in_the_first_ingest(tmp_path, default_settings, registry):
+    good, bad = _CountingSource(), _CountingSource(fail=True)
+    manager = _manager(tmp_path, default_settings, good=good, bad=bad)
+    first, second = await asyncio.gather(
+        manager.ingest("psilocybin depression", "d"),
+        manager.ingest("psilocybin depression", "d"),
+    )
+    assert good.calls == 1
+    assert bad.calls == 2
+    assert second["skipped"] == {"good": "psilocybin depression"}
+    assert manager.ledger.stats() == {"searched": 3, "skipped": 1}
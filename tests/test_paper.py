@@ -0,0 +1,172 @@
+"""Tests for the multi-section paper pipeline scheduler."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from unittest.mock import AsyncMock
+
+import pytest
+
+from open_synthesis.types import PackedContext
+
+_SECTIONS = ["Background", "Mechanisms", "Clinical trials", "Safety"]
+
+
+class _FakeRunPod:
+    """Outline, query and section calls with fixed latency; tracks in-flight requests."""
+
+    def __init__(self, delay: float) -> None:
+        self.delay = delay
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.close = AsyncMock()
+
+    async def generate(self, prompt, context, temperature, max_tokens, seed):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.in_flight -= 1
+        if max_tokens == 2048:
+            return "\n".join(f"SECTION: {t} | About {t.lower()}" for t in _SECTIONS)
+        if max_tokens == 512:
+            return "query one\nquery two"
+        return f"Section text for {prompt.split('Section title: ')[1].splitlines()[0]}"
+
+    async def pack_context(self, prompt, chunks, max_tokens, max_context_tokens=0):
+        return PackedContext(text="", chunks=chunks)
+
+
+class _FakeCorpus:
+    ledger = None
+
+    def __init__(self, delay: float) -> None:
+        self.delay = delay
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.close = AsyncMock()
+
+    async def ingest(self, query, domain, source_names=None):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.in_flight -= 1
+        return {}
+
+
+class _FakeRetriever:
+    def __init__(self, fail: str | None = None) -> None:
+        self.fail = fail
+        self.timeouts: list[float | None] = []
+
+    async def aretrieve_many(self, queries, domain, rank_query=None, timeout=None):
+        self.timeouts.append(timeout)
+        if self.fail and rank_query.startswith(self.fail):
+            raise TimeoutError("retrieval deadline")
+        return []
+
+
+def _pipeline(default_settings, delay: float = 0.1):
+    from open_synthesis.synthesis.paper import PaperPipeline
+
+    pipeline = PaperPipeline.__new__(PaperPipeline)
+    pipeline.settings = default_settings
+    pipeline.runpod = _FakeRunPod(delay)
+    pipeline.corpus = _FakeCorpus(delay)
+    pipeline.retriever = _FakeRetriever()
+    pipeline._generation = asyncio.Semaphore(default_settings.paper.max_concurrent_generations)
+    return pipeline
+
+
+async def test_sections_run_concurrently_in_order(default_settings):
+    default_settings.paper.max_concurrent_sections = 4
+    default_settings.paper.max_concurrent_generations = 4
+    pipeline = _pipeline(default_settings)
+
+    start = time.perf_counter()
+    result = await pipeline.run("psilocybin", "d")
+    elapsed = time.perf_counter() - start
+
+    # Outline + one section (queries, ingest, synthesis) ≈ 0.4s; sequential would be ≈ 1.3s.
+    assert elapsed < 0.8
+    assert [s.title for s in result.sections] == _SECTIONS
+    assert [s.synthesis for s in result.sections] == [f"Section text for {t}" for t in _SECTIONS]
+    assert all(s.search_queries == ["query one", "query two"] for s in result.sections)
+
+
+async def test_generation_cap_bounds_in_flight_requests(default_settings):
+    default_settings.paper.max_concurrent_sections = 4
+    default_settings.paper.max_concurrent_generations = 2
+    pipeline = _pipeline(default_settings, delay=0.05)
+    await pipeline.run("psilocybin", "d")
+    assert pipeline.runpod.max_in_flight == 2
+
+
+async def test_prefetch_overlaps_next_section_with_synthesis(default_settings):
+    default_settings.paper.max_concurrent_sections = 1
+    default_settings.paper.max_concurrent_generations = 2
+
+    default_settings.paper.prefetch_sections = 0
+    sequential = await _pipeline(default_settings, delay=0.05).run("psilocybin", "d")
+    default_settings.paper.prefetch_sections = 1
+    pipeline = _pipeline(default_settings, delay=0.05)
+    prefetched = await pipeline.run("psilocybin", "d")
+
+    assert sequential.overlap_saved_seconds < 0.05
+    assert prefetched.elapsed_seconds < sequential.elapsed_seconds - 0.1
+    assert prefetched.overlap_saved_seconds > 0.1
+    # Two queries per section, at most one section ingesting ahead of the one in synthesis.
+    assert pipeline.corpus.max_in_flight <= 4
+    assert [s.title for s in prefetched.sections] == _SECTIONS
+    assert all(set(s.stage_seconds) == {"prepare", "synthesis"} for s in prefetched.sections)
+
+
+async def test_failed_section_does_not_cancel_siblings(default_settings):
+    pipeline = _pipeline(default_settings, delay=0.01)
+    pipeline.retriever = _FakeRetriever(fail="Mechanisms")
+    result = await pipeline.run("psilocybin", "d")
+
+    failed = [s for s in result.sections if s.error]
+    assert [s.title for s in failed] == ["Mechanisms"]
+    assert "retrieval deadline" in failed[0].error
+    assert all(s.synthesis for s in result.sections if s.title != "Mechanisms")
+    assert set(pipeline.retriever.timeouts) == {default_settings.paper.retrieval_timeout}
+
+
+async def test_overlap_saving_excludes_waits_for_generation_slots(default_settings):
+    default_settings.paper.max_concurrent_sections = 4
+    default_settings.paper.max_concurrent_generations = 1
+    delay = 0.05
+    result = await _pipeline(default_settings, delay=delay).run("psilocybin", "d")
+
+    # Each section does three delay-long steps: queries, ingest, synthesis.
+    back_to_back = 3 * delay * len(_SECTIONS)
+    busy = sum(sum(s.stage_seconds.values()) for s in result.sections)
+    assert busy == pytest.approx(back_to_back, rel=0.25)
+    assert result.overlap_saved_seconds <= back_to_back - result.elapsed_seconds + 0.05
+
+
+async def test_failed_ingest_cancels_the_sections_other_ingests(default_settings):
+    pipeline = _pipeline(default_settings, delay=0.01)
+    cancelled: list[str] = []
+
+    async def ingest(query, domain, source_names=None):
+        if query == "query one":
+            raise RuntimeError("source down")
+        try:
+            await asyncio.sleep(1)
+        except asyncio.CancelledError:
+            cancelled.append(query)
+            raise
+        return {}
+
+    pipeline.corpus.ingest = ingest
+    result = await pipeline.run("psilocybin", "d")
+
+    assert all(s.error == "RuntimeError: source down" for s in result.sections)
+    assert cancelled == ["query two"] * len(_SECTIONS)
+    pipeline.corpus.close.assert_awaited_once()
@@ -0,0 +1,64 @@
+"""Tests for per-host rate limiting."""
+
+from __future__ import annotations
+
+import asyncio
+
+import httpx
+import pytest
+import respx
+
+from open_synthesis.config import HttpSettings
+from open_synthesis.corpus.ratelimit import RateLimit, RateLimiter
+from open_synthesis.corpus.sources.pubmed import PubMedSource
+from open_synthesis.corpus.transport import TransportManager
+
+
+@pytest.mark.asyncio
+async def test_burst_passes_without_waiting():
+    limiter = RateLimiter()
+    limit = RateLimit(requests=5, period=1.0)
+    waits = [await limiter.acquire("api.test", limit) for _ in range(5)]
+    assert waits == [0.0] * 5
+    assert limiter.stats()["api.test"]["delayed"] == 0
+
+
+@pytest.mark.asyncio
+async def test_requests_beyond_burst_are_spaced():
+    limiter = RateLimiter()
+    limit = RateLimit(requests=100, period=1.0, burst=1)
+    waits = await asyncio.gather(*(limiter.acquire("api.test", limit) for _ in range(3)))
+    assert waits[0] == 0.0
+    assert 0.0 < waits[1] < waits[2] <= 0.03
+    stats = limiter.stats()["api.test"]
+    assert stats["requests"] == 3
+    assert stats["delayed"] == 2
+
+
+@pytest.mark.asyncio
+async def test_stricter_limit_wins_for_shared_host():
+    limiter = RateLimiter()
+    await limiter.acquire("eutils", RateLimit(requests=10, period=1.0))
+    await limiter.acquire("eutils", RateLimit(requests=3, period=1.0))
+    assert limiter._buckets["eutils"].limit.requests == 3
+
+
+def test_authenticated_limit_applies_with_key():
+    assert PubMedSource().effective_rate_limit() == RateLimit(requests=3, period=1.0)
+    assert PubMedSource(api_key="k").effective_rate_limit() == RateLimit(requests=10, period=1.0)
+
+
+@pytest.mark.asyncio
+@respx.mock
+async def test_429_is_retried_after_retry_after():
+    route = respx.get("https://api.test/search").mock(side_effect=[
+        httpx.Response(429, headers={"Retry-After": "0"}),
+        httpx.Response(200, json={"ok": True}),
+    ])
+    manager = TransportManager(HttpSettings(rate_limit_retries=1, cache_enabled=False))
+    client = manager.client(rate_limit=RateLimit(requests=100, period=1.0))
+    resp = await client.get("https://api.test/search")
+    assert resp.status_code == 200
+    assert route.call_count == 2
+    assert manager.limiter.stats()["api.test"]["throttled"] == 1
+    await manager.aclose()
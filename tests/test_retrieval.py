@@ -2,7 +2,11 @@
 
 from __future__ import annotations
 
+from open_synthesis.retrieval.analyzer import Analyzer
 from open_synthesis.retrieval.hybrid import reciprocal_rank_fusion
+from open_synthesis.retrieval.rerank_cache import RerankCache
+from open_synthesis.retrieval.reranker import CrossEncoderReranker
+from open_synthesis.retrieval.sparse import BM25Index
 from open_synthesis.types import Chunk, RetrievedChunk
 
 
@@ -53,3 +57,117 @@ def test_rrf_all_hybrid_method():
     list1 = [_make_chunk("a")]
     fused = reciprocal_rank_fusion([list1])
     assert all(rc.retrieval_method == "hybrid" for rc in fused)
+
+
+def test_analyzer_normalizes_and_drops_stopwords():
+    analyzer = Analyzer()
+    assert analyzer("The ＳＳＲＩ effect, and STRASSE vs straße") == ["ssri", "effect", "strasse", "vs", "strasse"]
+    assert Analyzer(stopwords=False)("the effect") == ["the", "effect"]
+    assert analyzer.query("The effect") == ("effect",)
+
+
+def test_bm25_ranks_and_limits():
+    chunks = [
+        _make_chunk("a", "psilocybin therapy for depression").chunk,
+        _make_chunk("b", "ketamine for depression").chunk,
+        _make_chunk("c", "sleep quality in adults").chunk,
+    ]
+    index = BM25Index(chunks)
+    results = index.search("psilocybin depression", n_results=2)
+    assert [rc.chunk.chunk_id for rc in results] == ["a", "b"]
+    assert results[0].score > results[1].score > 0
+    assert all(rc.retrieval_method == "sparse" for rc in results)
+    assert index.search("the of and") == []
+
+
+def test_bm25_search_many_matches_single_queries():
+    chunks = [_make_chunk(str(i), f"term{i % 5} shared common{i % 3}").chunk for i in range(30)]
+    index = BM25Index(chunks)
+    queries = ["term1", "shared common2", "missing"]
+    batched = index.search_many(queries, n_results=5)
+    for query, results in zip(queries, batched):
+        single = index.search(query, n_results=5)
+        assert [(rc.chunk.chunk_id, rc.score) for rc in results] == [
+            (rc.chunk.chunk_id, rc.score) for rc in single
+        ]
+    assert batched[2] == []
+    assert BM25Index([]).search("anything") == []
+
+
+class _FakeCrossEncoder:
+    """Scores a pair by the number in the chunk text; records every batch."""
+
+    def __init__(self) -> None:
+        self.batches: list[list[tuple[str, str]]] = []
+
+    def predict(self, pairs, batch_size, show_progress_bar):
+        self.batches.append(pairs)
+        return [float(text.split()[-1]) for _, text in pairs]
+
+
+def _scored(n: int) -> list[RetrievedChunk]:
+    # Fused order puts the best cross-encoder scores first, as RRF usually does.
+    return [_make_chunk(f"c{i}", f"chunk {n - i}") for i in range(n)]
+
+
+def test_reranker_batches_truncates_and_reorders():
+    encoder = _FakeCrossEncoder()
+    reranker = CrossEncoderReranker(
+        "fake", max_length=2, batch_size=3, max_candidates=5, early_stop_batches=0, encoder=encoder,
+    )
+    chunks = [_make_chunk("low", "x 1"), _make_chunk("high", "x 9"), *_scored(4)]
+    chunks.append(_make_chunk("beyond-cap", "x 100"))
+    ranked = reranker("q", chunks, 3)
+
+    assert [len(b) for b in encoder.batches] == [3, 2]
+    assert all(len(text) <= 16 for b in encoder.batches for _, text in b)
+    assert [rc.chunk.chunk_id for rc in ranked] == ["high", "c0", "c1"]
+    assert ranked[0].score == 9.0
+
+
+def test_reranker_stops_when_top_k_is_stable():
+    encoder = _FakeCrossEncoder()
+    reranker = CrossEncoderReranker(
+        "fake", batch_size=2, max_candidates=20, early_stop_batches=2, encoder=encoder,
+    )
+    ranked = reranker("q", _scored(20), 2)
+    assert len(encoder.batches) == 3
+    assert reranker.skipped == 14
+    assert [rc.chunk.chunk_id for rc in ranked] == ["c0", "c1"]
+
+
+def test_reranker_default_settings_can_stop_early(default_settings):
+    r = default_settings.rerank
+    encoder = _FakeCrossEncoder()
+    reranker = CrossEncoderReranker(
+        "fake",
+        batch_size=r.batch_size,
+        max_candidates=r.max_candidates,
+        early_stop_batches=r.early_stop_batches,
+        encoder=encoder,
+    )
+    ranked = reranker("q", _scored(r.max_candidates), default_settings.retrieval.n_results)
+    assert reranker.skipped >= r.max_candidates - 32
+    assert [rc.chunk.chunk_id for rc in ranked] == [f"c{i}" for i in range(20)]
+
+
+def test_reranker_reuses_cached_scores(tmp_path):
+    encoder = _FakeCrossEncoder()
+    cache = RerankCache(tmp_path, "fake", max_bytes=1 << 20, ttl=None)
+    reranker = CrossEncoderReranker(
+        "fake", batch_size=4, max_candidates=8, early_stop_batches=0, cache=cache, encoder=encoder,
+    )
+    page = _scored(6)
+    first = reranker("q", page, 3)
+    second = reranker("q", [*page, _make_chunk("d0", "x 0.5"), _make_chunk("d1", "x 0.2")], 3)
+
+    assert [len(b) for b in encoder.batches] == [4, 2, 2]
+    assert cache.stats()["hits"] == 6
+    assert [rc.chunk.chunk_id for rc in first] == [rc.chunk.chunk_id for rc in second] == ["c0", "c1", "c2"]
+
+
+def test_reranker_passthrough_without_model(monkeypatch):
+    reranker = CrossEncoderReranker("missing/model")
+    monkeypatch.setattr(reranker, "_load", lambda: None)
+    chunks = _scored(5)
+    assert reranker("q", chunks, 2) == chunks[:2]
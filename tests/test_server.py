@@ -8,6 +8,8 @@ import httpx
 import pytest
 
 from open_synthesis.config import Settings
+from open_synthesis.synthesis.context import pack_context
+from open_synthesis.synthesis.tokens import TokenCounter
 from open_synthesis.types import Chunk, RetrievedChunk
 
 
@@ -45,12 +47,15 @@ def app(settings, mock_chunks):
     mock_runpod = AsyncMock()
     mock_runpod.generate = AsyncMock(return_value="Synthesis result text.")
     mock_runpod.close = AsyncMock()
+    mock_runpod.stats = MagicMock(return_value={"calls": 0})
+    mock_runpod.pack_context = AsyncMock(
+        side_effect=lambda prompt, chunks, *args: pack_context(chunks, TokenCounter(None), 100_000),
+    )
 
-    import asyncio
     application.state.settings = settings
     application.state.store = mock_store
+    application.state.retriever = MagicMock()
     application.state.runpod = mock_runpod
-    application.state.semaphore = asyncio.Semaphore(1)
 
     return application
 
@@ -142,3 +147,85 @@ async def test_chat_missing_domain(client):
                 json={"question": "Test", "domain": "nonexistent"},
             )
     assert resp.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_chat_retrieval_timeout(client):
+    from open_synthesis.retrieval.engine import RetrievalTimeout
+
+    with patch(
+        "open_synthesis.server._hybrid_retrieve",
+        side_effect=RetrievalTimeout("Retrieval exceeded 10.0s"),
+    ):
+        async with client:
+            resp = await client.post("/api/chat", json={"question": "Test", "domain": "default"})
+    assert resp.status_code == 504
+
+
+@pytest.mark.asyncio
+async def test_metrics(client, app):
+    app.state.retriever.stats.return_value = {"dense": {"calls": 1, "mean_ms": 2.0, "mean_candidates": 20}}
+    async with client:
+        resp = await client.get("/api/metrics")
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["admission"]["queue_depth"] == 0
+    assert data["retrieval"]["dense"]["calls"] == 1
+
+
+@pytest.mark.asyncio
+async def test_chat_stream_rejected_when_queue_full(client, app):
+    from open_synthesis.admission import AdmissionController
+
+    app.state.admission = AdmissionController(max_concurrent=1, max_queue=0, queue_timeout=1)
+    app.state.admission.enter()
+    async with client:
+        resp = await client.post("/api/chat/stream", json={"question": "Test", "domain": "default"})
+    assert resp.status_code == 429
+
+
+@pytest.mark.asyncio
+async def test_chat_stream_disconnect_cancels_upstream(app, mock_chunks):
+    import asyncio
+    import json
+
+    upstream_closed = asyncio.Event()
+    got_chunk = asyncio.Event()
+
+    async def endless_stream(*args, **kwargs):
+        try:
+            while True:
+                yield "tok"
+                await asyncio.sleep(0.01)
+        finally:
+            upstream_closed.set()
+
+    app.state.runpod.generate_stream = endless_stream
+    body = json.dumps({"question": "Test", "domain": "default"}).encode()
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+        "scheme": "http", "path": "/api/chat/stream", "raw_path": b"/api/chat/stream",
+        "query_string": b"", "root_path": "", "server": ("test", 80), "client": ("test", 1234),
+        "headers": [(b"host", b"test"), (b"content-type", b"application/json")],
+    }
+    requested = False
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await got_chunk.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.body" and b"event: chunk" in message.get("body", b""):
+            got_chunk.set()
+
+    with patch("open_synthesis.server._hybrid_retrieve", return_value=mock_chunks):
+        await asyncio.wait_for(app(scope, receive, send), timeout=5)
+
+    assert upstream_closed.is_set()
+    assert app.state.streams["disconnected"] == 1
+    assert app.state.streams["tokens_saved"] > 0
+    assert app.state.admission.stats()["active"] == 0
@@ -0,0 +1,234 @@
+"""Tests for the ChromaDB vector store wrapper."""
+
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from open_synthesis.corpus.chunker import chunk_document
+from open_synthesis.types import Document
+
+
+class _FakeEncoder:
+    """Deterministic stand-in for SentenceTransformer: embeds text length."""
+
+    def __init__(self, *args, **kwargs) -> None:
+        self.batches: list[list[str]] = []
+
+    def encode(self, texts, batch_size: int = 32, **kwargs):
+        single = isinstance(texts, str)
+        batch = [texts] if single else list(texts)
+        self.batches.append(batch)
+        vectors = np.array([[float(len(t)), 1.0] for t in batch], dtype=np.float32)
+        return vectors[0] if single else vectors
+
+
+@pytest.fixture(autouse=True)
+def fake_encoder(monkeypatch):
+    monkeypatch.setattr("open_synthesis.corpus.registry.SentenceTransformer", _FakeEncoder)
+    monkeypatch.setattr("open_synthesis.corpus.registry._embedders", {})
+
+
+@pytest.fixture
+def store(tmp_path):
+    from open_synthesis.corpus.store import VectorStore
+
+    return VectorStore(persist_path=str(tmp_path / "vs"), batch_size=2)
+
+
+def test_embed_batches_by_length_and_keeps_order(store):
+    texts = ["cccc", "a", "dddddd", "bb"]
+    embeddings = store.embed(texts)
+    assert [e[0] for e in embeddings] == [4.0, 1.0, 6.0, 2.0]
+    assert store._embedder.batches == [["a", "bb"], ["cccc", "dddddd"]]
+
+
+def test_write_splits_into_chroma_batches(store, sample_document: Document, monkeypatch):
+    monkeypatch.setattr(store, "_max_batch_size", lambda: 2)
+    chunks = chunk_document(sample_document, min_chunk_length=10)
+    assert len(chunks) > 2
+    assert store.add_chunks("test-domain", chunks) == len(chunks)
+    assert store.collection_count("test-domain") == len(chunks)
+
+
+def test_reingest_skips_unchanged_and_replaces_updated(store, sample_document: Document):
+    chunks = chunk_document(sample_document)
+    diff = store.diff_chunks("test-domain", chunks)
+    assert len(diff.new) == len(chunks) and diff.unchanged == 0
+    store.add_chunks("test-domain", chunks)
+
+    encoded_before = len(store._embedder.batches)
+    assert store.add_chunks("test-domain", chunks) == 0
+    assert len(store._embedder.batches) == encoded_before
+
+    revised = sample_document.model_copy(update={
+        "full_text": sample_document.full_text.replace("24 participants", "27 participants"),
+    })
+    new_chunks = chunk_document(revised)
+    diff = store.diff_chunks("test-domain", new_chunks)
+    assert diff.new == []
+    assert len(diff.updated) == 1
+    assert diff.unchanged == len(new_chunks) - 1
+    assert len(diff.stale_ids) == 1
+
+    store.add_chunks("test-domain", new_chunks)
+    assert store.collection_count("test-domain") == len(new_chunks)
+
+
+def test_reingest_updates_shifted_chunk_indices(store, sample_document: Document):
+    store.add_chunks("test-domain", chunk_document(sample_document))
+    encoded_before = len(store._embedder.batches)
+
+    revised = sample_document.model_copy(update={
+        "full_text": "Preface: " + "a paragraph inserted above the rest. " * 8 + "\n\n" + sample_document.full_text,
+    })
+    new_chunks = chunk_document(revised)
+    diff = store.diff_chunks("test-domain", new_chunks)
+    assert len(diff.updated) == 1
+    assert len(diff.moved) == len(new_chunks) - 1
+
+    store.add_chunks("test-domain", new_chunks)
+    assert len(store._embedder.batches) == encoded_before + 1  # only the inserted paragraph
+    stored = store.get_by_ids("test-domain", [c.chunk_id for c in new_chunks])
+    assert [stored[c.chunk_id].index for c in new_chunks] == list(range(len(new_chunks)))
+
+
+def test_embedding_cache_shared_across_domains_and_stores(tmp_path, monkeypatch, sample_document: Document):
+    from open_synthesis.corpus.embedding_cache import EmbeddingCache
+    from open_synthesis.corpus.store import VectorStore
+
+    def make_store() -> VectorStore:
+        cache = EmbeddingCache(tmp_path / "emb", "fake-model", max_bytes=1 << 20)
+        return VectorStore(persist_path=str(tmp_path / "vs"), batch_size=2, embedding_cache=cache)
+
+    chunks = chunk_document(sample_document)
+    first = make_store()
+    first.add_chunks("domain-a", chunks)
+    assert first.embedding_cache.misses == len(chunks)
+
+    first.add_chunks("domain-b", chunks)
+    assert first.embedding_cache.hits == len(chunks)
+
+    # A new process (fresh model and cache handle, same cache file) still skips the encoder.
+    monkeypatch.setattr("open_synthesis.corpus.registry._embedders", {})
+    second = make_store()
+    second.add_chunks("domain-c", chunks)
+    assert second._embedder.batches == []
+    assert second.embedding_cache.hit_rate == 1.0
+
+    second.query("domain-c", "participants")
+    second.query("domain-c", "participants")
+    assert second._embedder.batches == [["participants"]]
+
+
+def test_stores_share_model_and_client(tmp_path):
+    from open_synthesis.corpus.store import VectorStore
+
+    a = VectorStore(persist_path=str(tmp_path / "vs"))
+    b = VectorStore(persist_path=str(tmp_path / "vs" / ".." / "vs"))
+    assert a._embedder is b._embedder
+    assert a._client is b._client
+    assert VectorStore(persist_path=str(tmp_path / "other"))._client is not a._client
+
+
+def test_sparse_query_covers_whole_collection(store, sample_document: Document):
+    chunks = chunk_document(sample_document)
+    store.add_chunks("test-domain", chunks)
+
+    hits = store.sparse_query("test-domain", "Cohen clinically significant response")
+    assert hits and hits[0].retrieval_method == "sparse"
+    assert hits[0].chunk.text.startswith("Results:")
+    assert hits[0].chunk.chunk_id in {c.chunk_id for c in chunks}
+
+    dense_ids = [rc.chunk.chunk_id for rc in store.query("test-domain", "MDD", n_results=len(chunks))]
+    assert sorted(dense_ids) == sorted(c.chunk_id for c in chunks)
+
+    store.delete("test-domain", [hits[0].chunk.chunk_id])
+    assert hits[0].chunk.chunk_id not in {
+        rc.chunk.chunk_id for rc in store.sparse_query("test-domain", "Cohen clinically significant response")
+    }
+
+
+def test_sparse_query_many_matches_single_queries(store, sample_document: Document):
+    store.add_chunks("test-domain", chunk_document(sample_document))
+    queries = ["Cohen clinically significant response", "psilocybin depression", "nothing matches zzz"]
+    batched = store.sparse_query_many("test-domain", queries, n_results=3)
+    assert [[rc.chunk.chunk_id for rc in r] for r in batched] == [
+        [rc.chunk.chunk_id for rc in store.sparse_query("test-domain", q, n_results=3)] for q in queries
+    ]
+    assert batched[2] == []
+
+
+def test_query_many_embeds_once_and_fuses(store, sample_document: Document):
+    chunks = chunk_document(sample_document)
+    store.add_chunks("test-domain", chunks)
+    encoded_before = len(store._embedder.batches)
+
+    queries = ["short q", "a considerably longer query text"]
+    per_query, fused = store.query_many("test-domain", queries, n_results=2)
+
+    assert store._embedder.batches[encoded_before:] == [["short q", "a considerably longer query text"]]
+    assert [[rc.chunk.chunk_id for rc in r] for r in per_query] == [
+        [rc.chunk.chunk_id for rc in store.query("test-domain", q, n_results=2)] for q in queries
+    ]
+    assert {rc.chunk.chunk_id for rc in fused} <= {rc.chunk.chunk_id for r in per_query for rc in r}
+    assert len(fused) == 2
+
+
+def test_query_keeps_chunk_identity_and_embeddings(store, sample_document: Document, monkeypatch):
+    chunks = chunk_document(sample_document)
+    store.add_chunks("test-domain", chunks)
+    by_id = {c.chunk_id: c for c in chunks}
+
+    hits = store.query("test-domain", "MDD", n_results=len(chunks), include_embeddings=True)
+    assert len({rc.chunk.chunk_id for rc in hits}) == len(chunks)
+    for rc in hits:
+        assert rc.chunk.index == by_id[rc.chunk.chunk_id].index
+        assert rc.chunk.embedding == [float(len(rc.chunk.text)), 1.0]
+        assert "embedding" not in rc.model_dump()["chunk"]
+    assert store.query("test-domain", "MDD", n_results=1)[0].chunk.embedding is None
+
+    monkeypatch.setattr(store, "_max_batch_size", lambda: 2)
+    ids = [c.chunk_id for c in chunks] + ["missing"]
+    fetched = store.get_by_ids("test-domain", ids, include_embeddings=True)
+    assert set(fetched) == set(by_id)
+    assert all(fetched[cid].embedding == [float(len(by_id[cid].text)), 1.0] for cid in by_id)
+
+
+def test_warm_up_builds_sparse_indexes(store, sample_document: Document, monkeypatch):
+    from open_synthesis.corpus import registry
+
+    store.add_chunks("test-domain", chunk_document(sample_document))
+    monkeypatch.setattr(registry, "_inverted_indexes", {})
+    store.warm_up()
+    assert [key[0].split("/")[-1] for key in registry._inverted_indexes] == ["test-domain"]
+
+
+def test_sparse_index_reconciles_after_failed_index_write(store, sample_document: Document, monkeypatch):
+    from open_synthesis.retrieval.inverted_index import InvertedIndex
+
+    chunks = chunk_document(sample_document)
+    store.add_chunks("test-domain", chunks[:1])
+
+    def crash(self, docs):
+        raise OSError("disk full")
+
+    with monkeypatch.context() as m:
+        m.setattr(InvertedIndex, "add", crash)
+        with pytest.raises(OSError):
+            store.add_chunks("test-domain", chunks[1:])
+
+    assert store.diff_chunks("test-domain", chunks).changed == []  # Chroma has them all
+    hits = store.sparse_query("test-domain", "Cohen clinically significant response")
+    assert hits and hits[0].chunk.text.startswith("Results:")
+
+
+def test_sparse_index_rebuilt_from_collection(store, sample_document: Document, tmp_path, monkeypatch):
+    import shutil
+
+    store.add_chunks("test-domain", chunk_document(sample_document))
+    monkeypatch.setattr("open_synthesis.corpus.registry._inverted_indexes", {})
+    shutil.rmtree(tmp_path / "vs" / "sparse" / "test-domain")
+
+    hits = store.sparse_query("test-domain", "psilocybin")
+    assert hits
@@ -0,0 +1,46 @@
+"""Tests for the shared HTTP transport."""
+
+from __future__ import annotations
+
+import httpx
+import pytest
+import respx
+
+from open_synthesis.config import HttpSettings
+from open_synthesis.corpus.transport import TransportManager, configure_transport
+
+
+@pytest.mark.asyncio
+async def test_pools_are_per_host():
+    manager = TransportManager(HttpSettings(cache_enabled=False))
+    shared = manager.shared()
+    a = shared._pool(httpx.URL("https://api.crossref.org/works"))
+    b = shared._pool(httpx.URL("https://api.crossref.org/works/10.1/x"))
+    c = shared._pool(httpx.URL("https://api.openalex.org/works"))
+    assert a is b
+    assert a is not c
+    await manager.aclose()
+
+
+@pytest.mark.asyncio
+@respx.mock
+async def test_borrowed_client_close_keeps_pools():
+    respx.get("https://api.example.org/ping").mock(return_value=httpx.Response(200, json={"ok": True}))
+    manager = TransportManager(HttpSettings(cache_enabled=False))
+
+    first = manager.client()
+    resp = await first.get("https://api.example.org/ping")
+    assert resp.json() == {"ok": True}
+    shared = manager.shared()
+    await first.aclose()
+
+    second = manager.client()
+    await second.get("https://api.example.org/ping")
+    assert manager.shared() is shared
+    await manager.aclose()
+
+
+def test_configure_transport_reuses_manager():
+    first = configure_transport(HttpSettings(max_connections_per_host=4))
+    assert configure_transport(HttpSettings(max_connections_per_host=4)) is first
+    assert configure_transport(HttpSettings(max_connections_per_host=8)) is not first
@@ -75,3 +75,91 @@ def test_uncertainty_contested():
 
 def test_uncertainty_fallback():
     assert assess_uncertainty("not json") == ConfidenceLevel.INSUFFICIENT
+
+
+# --- Validation pipeline ---
+
+class _FakeRunPod:
+    """Answers each validation prompt after a delay; fails the hallucination pass."""
+
+    def __init__(self, delay: float) -> None:
+        self.delay = delay
+        self.prompts: list[str] = []
+        self.contexts: list[str] = []
+
+    async def runsync(self, payload):
+        import asyncio
+
+        self.prompts.append(payload["prompt"])
+        self.contexts.append(payload["context"])
+        await asyncio.sleep(self.delay)
+        if "hallucination" in payload["prompt"].lower():
+            raise RuntimeError("vLLM returned 500")
+        if "confidence" in payload["prompt"].lower():
+            return {"synthesis": json.dumps({"confidence": "limited", "reasoning": "small n"})}
+        return {"synthesis": json.dumps({"valid": [1], "invalid": [], "uncited_claims": []})}
+
+
+async def test_validation_passes_run_concurrently(default_settings, sample_retrieved_chunks):
+    import time
+
+    from open_synthesis.synthesis.pipeline import SynthesisPipeline
+    from open_synthesis.types import SynthesisResult
+
+    pipeline = SynthesisPipeline.__new__(SynthesisPipeline)
+    pipeline.settings = default_settings
+    pipeline.runpod = _FakeRunPod(delay=0.2)
+    result = SynthesisResult(
+        question="q", domain="d", synthesis="Psilocybin works [SOURCE 1].", chunks_used=sample_retrieved_chunks,
+    )
+
+    start = time.perf_counter()
+    result = await pipeline.validate_result(result)
+    elapsed = time.perf_counter() - start
+
+    assert elapsed < 0.5
+    assert set(result.validation_seconds) == {"citation_check", "hallucination_check", "uncertainty"}
+    assert result.validation_errors == {"hallucination_check": "vLLM returned 500"}
+    assert result.citation_check is not None
+    assert result.confidence == ConfidenceLevel.LIMITED
+    assert all("[SOURCE 1:" in c for c in pipeline.runpod.contexts)
+    assert not any("[SOURCE 1:" in p for p in pipeline.runpod.prompts)
+
+
+async def test_validation_shares_synthesis_prompt_prefix(default_settings, sample_retrieved_chunks):
+    from open_synthesis.synthesis.pipeline import SynthesisPipeline
+    from open_synthesis.synthesis.prompts import (
+        build_messages,
+        format_context,
+        format_template,
+        shared_prefix_chars,
+    )
+    from open_synthesis.types import SynthesisResult
+
+    pipeline = SynthesisPipeline.__new__(SynthesisPipeline)
+    pipeline.settings = default_settings
+    pipeline.runpod = _FakeRunPod(delay=0)
+    await pipeline.validate_result(
+        SynthesisResult(question="q", domain="d", synthesis="s", chunks_used=sample_retrieved_chunks),
+    )
+
+    synthesis = build_messages(format_template("synthesis", question="q"), format_context(sample_retrieved_chunks))
+    for prompt, context in zip(pipeline.runpod.prompts, pipeline.runpod.contexts):
+        messages = build_messages(prompt, context)
+        assert messages[:-1] == synthesis[:-1]
+        assert shared_prefix_chars(messages) == len(synthesis[0]["content"])
+
+
+async def test_validation_pass_timeout(default_settings, sample_retrieved_chunks):
+    from open_synthesis.synthesis.pipeline import SynthesisPipeline
+    from open_synthesis.types import SynthesisResult
+
+    default_settings.validation.pass_timeout = 0.05
+    pipeline = SynthesisPipeline.__new__(SynthesisPipeline)
+    pipeline.settings = default_settings
+    pipeline.runpod = _FakeRunPod(delay=1.0)
+    result = await pipeline.validate_result(
+        SynthesisResult(question="q", domain="d", synthesis="s", chunks_used=sample_retrieved_chunks),
+    )
+    assert set(result.validation_errors) == {"citation_check", "hallucination_check", "uncertainty"}
+    assert "timed out" in result.validation_errors["citation_check"]